@@ -0,0 +1,322 @@
+import psycopg2
+import argparse
+import os
+import json
+import re
+import sys
+import time
+import yaml
+from datetime import datetime
+from pathlib import Path
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from scripts.analytics.result_cache import ResultCache  # noqa: E402
+from scripts.orchestration.logger import get_logger  # noqa: E402
+from scripts.orchestration.metrics import (  # noqa: E402
+    log_metrics,
+    peak_rss_mb,
+    track_step
+)
+from scripts.orchestration.statements import (  # noqa: E402
+    PLAN_CAPTURE_ENV,
+    statement_cursor
+)
+
+load_dotenv()
+
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST"),
+    "port": os.getenv("DB_PORT"),
+    "dbname": os.getenv("DB_NAME"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD")
+}
+
+logger = get_logger("ANALYTICS")
+
+CONFIG_PATH = "config/config.yaml"
+QUERIES_PATH = "sql/queries/analytical_queries.sql"
+AGGREGATE_QUERIES_PATH = "sql/queries/aggregate_queries.sql"
+SUMMARY_PATH = "docs/query_runner_summary.json"
+
+FACT_SOURCE = "warehouse.fact_sales"
+
+# "-- 2. Monthly Sales Trend" starts a named query
+QUERY_HEADER = re.compile(r"^-- (\d+)\. (.+)$", re.MULTILINE)
+AGGREGATE_TABLE = re.compile(r"\bwarehouse\.agg_\w+")
+
+
+# One cache per process, so repeated runs from a long-lived caller hit
+# the memory tier
+_result_cache = None
+
+
+def get_connection():
+    return psycopg2.connect(**DB_CONFIG, cursor_factory=statement_cursor())
+
+
+def load_config():
+    with open(CONFIG_PATH) as f:
+        return yaml.safe_load(f)
+
+
+def get_result_cache(config):
+    global _result_cache
+    if _result_cache is None:
+        cache_config = (config.get("analytics") or {}).get("result_cache", {})
+        _result_cache = ResultCache(
+            memory_entries=cache_config.get("memory_entries", 128),
+            disk_dir=cache_config.get("dir"),
+            disk_max_mb=cache_config.get("disk_max_mb", 256)
+        )
+    return _result_cache
+
+
+# ---------------------------------
+# QUERY FILES
+# ---------------------------------
+def query_name(title):
+    # "Day-of-Week Sales Pattern" -> "day_of_week_sales_pattern"
+    return re.sub(r"[^a-z0-9]+", "_", title.lower()).strip("_")
+
+
+def load_queries(path):
+    # {name: {"number", "title", "sql"}} in file order
+    with open(path) as f:
+        text = f.read()
+
+    headers = list(QUERY_HEADER.finditer(text))
+    queries = {}
+    for header, following in zip(headers, headers[1:] + [None]):
+        end = following.start() if following else len(text)
+        sql = text[header.end():end].strip().rstrip(";").strip()
+        queries[query_name(header.group(2))] = {
+            "number": int(header.group(1)),
+            "title": header.group(2),
+            "sql": sql
+        }
+    return queries
+
+
+def query_plans():
+    # Each analytical query with the sources that can answer it: its
+    # aggregate rewrites (if any), then the fact table
+    queries = load_queries(QUERIES_PATH)
+    rewrites = load_queries(AGGREGATE_QUERIES_PATH)
+
+    plans = {}
+    for name, query in queries.items():
+        candidates = []
+        if name in rewrites:
+            sql = rewrites[name]["sql"]
+            candidates.append({
+                "source": AGGREGATE_TABLE.search(sql).group(0),
+                "sql": sql
+            })
+        candidates.append({"source": FACT_SOURCE, "sql": query["sql"]})
+        plans[name] = {**query, "candidates": candidates}
+    return plans
+
+
+# ---------------------------------
+# ROUTING
+# ---------------------------------
+def aggregates_current(cur):
+    # The warehouse load refreshes the aggregates with the facts; they
+    # are usable once refreshed up to the facts' watermark
+    cur.execute("""
+        SELECT
+            MAX(last_loaded_at) FILTER (
+                WHERE table_name = 'warehouse.aggregates'
+            ),
+            MAX(last_loaded_at) FILTER (
+                WHERE table_name = 'warehouse.fact_sales'
+            )
+        FROM warehouse.load_watermarks
+    """)
+    aggregates, facts = cur.fetchone()
+    return aggregates is not None and aggregates == facts
+
+
+def source_size(cur, source):
+    # On-disk size with indexes, summed over the partitions of a
+    # partitioned source (its parent has no storage of its own); a plain
+    # table is its own only leaf
+    cur.execute("""
+        SELECT SUM(pg_total_relation_size(relid))
+        FROM pg_partition_tree(%s::regclass)
+        WHERE isleaf
+    """, (source,))
+    return cur.fetchone()[0] or 0
+
+
+def choose_source(cur, plan, use_aggregates=True):
+    # Smallest usable source by on-disk size; the fact table always
+    # qualifies
+    candidates = [
+        candidate for candidate in plan["candidates"]
+        if use_aggregates or candidate["source"] == FACT_SOURCE
+    ]
+    sizes = {
+        candidate["source"]: source_size(cur, candidate["source"])
+        for candidate in candidates
+    }
+
+    return min(candidates, key=lambda c: sizes[c["source"]])
+
+
+def load_version(cur):
+    # Bumped by every committed warehouse load; 0 before the first one
+    cur.execute("SELECT version FROM warehouse.load_version")
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+
+def run_query(cur, sql):
+    cur.execute(sql)
+    columns = [column.name for column in cur.description]
+    return columns, cur.fetchall()
+
+
+def same_rows(left, right):
+    # Row order only matters up to ties in the ORDER BY, so compare as
+    # multisets
+    return sorted(left, key=repr) == sorted(right, key=repr)
+
+
+# ---------------------------------
+# MAIN
+# ---------------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the named analytical queries, reading each from "
+                    "the smallest up-to-date aggregate that answers it"
+    )
+    parser.add_argument(
+        "--query", action="append", dest="queries", metavar="NAME",
+        help="Run only this query (repeatable), e.g. monthly_sales_trend"
+    )
+    parser.add_argument(
+        "--fact-only", action="store_true",
+        help="Read every query from fact_sales"
+    )
+    parser.add_argument(
+        "--verify", action="store_true",
+        help="Also run each query against fact_sales and report whether "
+             "the chosen source returned the same rows"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Run every query against the database, bypassing the result "
+             "cache"
+    )
+    parser.add_argument(
+        "--show", action="store_true",
+        help="Print the result rows of each query"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    plans = query_plans()
+    names = args.queries or list(plans)
+    unknown = [name for name in names if name not in plans]
+    if unknown:
+        raise SystemExit(
+            f"Unknown queries: {', '.join(unknown)} "
+            f"(available: {', '.join(plans)})"
+        )
+
+    # Cached answers never reach the database, so nothing would be captured
+    no_cache = args.no_cache or os.getenv(PLAN_CAPTURE_ENV)
+    cache = None if no_cache else get_result_cache(load_config())
+
+    run_started = time.perf_counter()
+    conn = get_connection()
+    # Read-only and consistent across all queries of the run
+    conn.set_session(readonly=True, isolation_level="REPEATABLE READ")
+
+    summary = {
+        "start_time": datetime.utcnow().isoformat(),
+        "queries": {},
+        "status": "SUCCESS"
+    }
+    results = {}
+
+    try:
+        with conn.cursor() as cur:
+            use_aggregates = not args.fact_only and aggregates_current(cur)
+            summary["aggregates_current"] = use_aggregates
+            version = load_version(cur)
+            summary["load_version"] = version
+
+            for name in names:
+                plan = plans[name]
+                candidate = choose_source(cur, plan, use_aggregates)
+
+                def compute():
+                    return run_query(cur, candidate["sql"])
+
+                with track_step(logger, summary["queries"], name) as step:
+                    if cache:
+                        (columns, rows), tier = cache.get_or_compute(
+                            candidate["sql"], {}, version, compute
+                        )
+                    else:
+                        (columns, rows), tier = compute(), "disabled"
+                    step.rows = len(rows)
+                summary["queries"][name]["source"] = candidate["source"]
+                summary["queries"][name]["cache"] = tier
+                results[name] = {"columns": columns, "rows": rows}
+
+                if args.verify and candidate["source"] != FACT_SOURCE:
+                    _, fact_rows = run_query(cur, plan["candidates"][-1]["sql"])
+                    summary["queries"][name]["matches_fact"] = same_rows(
+                        rows, fact_rows
+                    )
+
+        if args.verify and not all(
+            query.get("matches_fact", True)
+            for query in summary["queries"].values()
+        ):
+            summary["status"] = "FAILED"
+            summary["error"] = "Aggregate results differ from fact_sales"
+
+    except Exception as e:
+        summary["status"] = "FAILED"
+        summary["error"] = str(e)
+
+    finally:
+        conn.close()
+        if cache:
+            summary["cache"] = cache.summary()
+        summary["end_time"] = datetime.utcnow().isoformat()
+        summary["duration_sec"] = round(time.perf_counter() - run_started, 3)
+        summary["peak_rss_mb"] = peak_rss_mb()
+        log_metrics(logger, "analytics", {
+            "status": summary["status"],
+            "queries": len(summary["queries"]),
+            "duration_sec": summary["duration_sec"]
+        })
+
+        with open(SUMMARY_PATH, "w") as f:
+            json.dump(summary, f, indent=4)
+
+        if args.show:
+            for name, result in results.items():
+                print(f"-- {plans[name]['number']}. {plans[name]['title']}")
+                print(" | ".join(result["columns"]))
+                for row in result["rows"]:
+                    print(" | ".join(str(value) for value in row))
+                print()
+
+        print(json.dumps(summary, indent=2))
+
+    return summary, results
+
+
+if __name__ == "__main__":
+    main()
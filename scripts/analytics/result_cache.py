@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# ---------------------------------
+# QUERY RESULT CACHE
+# ---------------------------------
+# Results are keyed on the query text, its parameters and the warehouse
+# load version, so a new load makes every older entry unreachable
+# without an explicit invalidation. Entries live in an in-memory LRU and
+# in an on-disk tier (one pickle per entry) that survives across runs
+# and is trimmed to a size budget, least recently used first.
+
+
+def cache_key(sql, params, version):
+    # Whitespace differences do not make a different query
+    normalized = re.sub(r"\s+", " ", sql).strip()
+    payload = json.dumps([normalized, params, version], default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, memory_entries=128, disk_dir=None, disk_max_mb=256):
+        self.memory_entries = memory_entries
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = int(disk_max_mb * 1024 * 1024)
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "disk_evictions": 0,
+            "hit_sec": 0.0,
+            "miss_sec": 0.0
+        }
+
+    # ---------------------------------
+    # LOOKUP
+    # ---------------------------------
+    def get_or_compute(self, sql, params, version, compute):
+        # Returns (value, tier) where tier is "memory", "disk" or "miss";
+        # compute() is only called on a miss
+        started = time.perf_counter()
+        key = cache_key(sql, params, version)
+
+        tier = "memory"
+        value = self._memory_get(key)
+        if value is None:
+            tier = "disk"
+            value = self._disk_get(key)
+            if value is not None:
+                self._memory_put(key, value)
+
+        if value is None:
+            tier = "miss"
+            value = compute()
+            self._memory_put(key, value)
+            self._disk_put(key, value)
+
+        with self.lock:
+            if tier == "miss":
+                self.stats["misses"] += 1
+                self.stats["miss_sec"] += time.perf_counter() - started
+            else:
+                self.stats[f"{tier}_hits"] += 1
+                self.stats["hit_sec"] += time.perf_counter() - started
+
+        return value, tier
+
+    def summary(self):
+        with self.lock:
+            stats = dict(self.stats)
+
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        return {
+            "memory_hits": stats["memory_hits"],
+            "disk_hits": stats["disk_hits"],
+            "misses": stats["misses"],
+            "hit_ratio": round(hits / lookups, 3) if lookups else None,
+            "avg_hit_ms": (
+                round(stats["hit_sec"] / hits * 1000, 3) if hits else None
+            ),
+            "avg_miss_ms": (
+                round(stats["miss_sec"] / stats["misses"] * 1000, 3)
+                if stats["misses"] else None
+            ),
+            "memory_entries": len(self.memory),
+            "disk_bytes": self._disk_usage()[1],
+            "disk_evictions": stats["disk_evictions"]
+        }
+
+    # ---------------------------------
+    # MEMORY TIER
+    # ---------------------------------
+    def _memory_get(self, key):
+        with self.lock:
+            if key not in self.memory:
+                return None
+            self.memory.move_to_end(key)
+            return self.memory[key]
+
+    def _memory_put(self, key, value):
+        if not self.memory_entries:
+            return
+        with self.lock:
+            self.memory[key] = value
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+
+    # ---------------------------------
+    # DISK TIER
+    # ---------------------------------
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+        # The access time drives eviction; mtime is used because atime
+        # updates are often disabled
+        os.utime(path)
+        return value
+
+    def _disk_put(self, key, value):
+        if not self.disk_dir:
+            return
+
+        os.makedirs(self.disk_dir, exist_ok=True)
+        # Written under a temporary name so readers never see half a file
+        path = self._disk_path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+        self._evict_disk()
+
+    def _disk_usage(self):
+        # ([(mtime, size, path)], total bytes) of the cached entries
+        if not self.disk_dir or not os.path.isdir(self.disk_dir):
+            return [], 0
+
+        entries = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".pkl"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries, sum(size for _, size, _ in entries)
+
+    def _evict_disk(self):
+        entries, total = self._disk_usage()
+        for _, size, path in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            with self.lock:
+                self.stats["disk_evictions"] += 1
@@ -0,0 +1,76 @@
+import argparse
+import contextlib
+import io
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from scripts.transformation import (  # noqa: E402
+    load_to_production,
+    load_to_warehouse
+)
+
+
+# ---------------------------------
+# BENCHMARK
+# ---------------------------------
+def run_step(module, argv) -> dict:
+    # Each loader prints and writes its own summary; keep the report clean
+    with contextlib.redirect_stdout(io.StringIO()):
+        module.main(argv)
+
+    with open(module.SUMMARY_PATH) as f:
+        summary = json.load(f)
+
+    if summary["status"] != "SUCCESS":
+        raise RuntimeError(f"{module.__name__} failed: {summary.get('error')}")
+
+    return {
+        "seconds": summary["duration_sec"],
+        "tables": {
+            table: metrics["duration_sec"]
+            for table, metrics in summary["table_metrics"].items()
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare full production and warehouse reloads with and "
+                    "without bulk mode (rewrites both layers and their "
+                    "summaries)"
+    )
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    report = {}
+    for label, flag in [("maintained", "--no-bulk"), ("bulk", "--bulk")]:
+        runs = []
+        for _ in range(args.repeat):
+            runs.append({
+                "production": run_step(
+                    load_to_production, ["--mode", "full", flag]
+                ),
+                "warehouse": run_step(load_to_warehouse, [flag])
+            })
+
+        # Best of the repeats, per layer
+        report[label] = {
+            layer: min((run[layer] for run in runs), key=lambda r: r["seconds"])
+            for layer in ["production", "warehouse"]
+        }
+
+    for layer in ["production", "warehouse"]:
+        bulk = report["bulk"][layer]["seconds"]
+        if bulk:
+            report[f"{layer}_speedup"] = round(
+                report["maintained"][layer]["seconds"] / bulk, 2
+            )
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+import argparse
+import json
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from scripts.analytics.query_runner import (  # noqa: E402
+    QUERIES_PATH,
+    load_queries
+)
+from scripts.transformation.load_to_warehouse import (  # noqa: E402
+    date_key,
+    get_connection
+)
+from scripts.transformation.partitions import (  # noqa: E402
+    ensure_monthly_partitions,
+    months_between
+)
+
+BENCH_SCHEMA = "bench_fact"
+
+# Layouts of the same synthetic facts. heap_btree is fact_sales before
+# partitioning; partitioned_btree isolates the effect of the BRIN index.
+LAYOUTS = ["heap_btree", "partitioned_btree", "partitioned_brin"]
+
+# Date-filtered probes next to analytical_queries.sql, where pruning and
+# the date index matter most
+DATE_PROBES = {
+    "one_month_revenue": """
+        SELECT SUM(f.line_total), COUNT(*)
+        FROM warehouse.fact_sales f
+        WHERE f.date_key BETWEEN {month_start} AND {month_end}
+    """,
+    "one_week_revenue_by_product": """
+        SELECT f.product_key, SUM(f.line_total)
+        FROM warehouse.fact_sales f
+        WHERE f.date_key BETWEEN {week_start} AND {week_end}
+        GROUP BY f.product_key
+    """,
+}
+
+
+# ---------------------------------
+# SYNTHETIC FACTS
+# ---------------------------------
+def generate_rows(conn, rows):
+    # Facts spread evenly over dim_date in date order (as nightly loads
+    # append them), with random customers, products and payment methods
+    # drawn from the warehouse dimensions
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {BENCH_SCHEMA}.source_rows")
+        cur.execute(f"""
+            CREATE UNLOGGED TABLE {BENCH_SCHEMA}.source_rows AS
+            WITH keys AS (
+                SELECT
+                    (SELECT array_agg(date_key ORDER BY date_key)
+                     FROM warehouse.dim_date) AS dates,
+                    (SELECT array_agg(customer_key)
+                     FROM warehouse.dim_customers WHERE is_current)
+                        AS customers,
+                    (SELECT array_agg(product_key)
+                     FROM warehouse.dim_products WHERE is_current)
+                        AS products,
+                    (SELECT array_agg(payment_method_key)
+                     FROM warehouse.dim_payment_method) AS payments
+            )
+            SELECT
+                i AS sales_key,
+                k.dates[(1 + i * cardinality(k.dates) / %(rows)s)::int]
+                    AS date_key,
+                k.customers[1 + floor(random() * cardinality(k.customers))::int]
+                    AS customer_key,
+                k.products[1 + floor(random() * cardinality(k.products))::int]
+                    AS product_key,
+                k.payments[1 + floor(random() * cardinality(k.payments))::int]
+                    AS payment_method_key,
+                'TXN' || (i / 3) AS transaction_id,
+                q.quantity,
+                q.unit_price,
+                round(q.quantity * q.unit_price * q.discount, 2)
+                    AS discount_amount,
+                round(q.quantity * q.unit_price * (1 - q.discount), 2)
+                    AS line_total,
+                round(q.quantity * q.unit_price * (0.3 - q.discount), 2)
+                    AS profit
+            FROM generate_series(0::bigint, %(rows)s - 1) AS i
+            CROSS JOIN keys k
+            CROSS JOIN LATERAL (
+                SELECT
+                    1 + (i %% 5) AS quantity,
+                    round((10 + random() * 990)::numeric, 2) AS unit_price,
+                    round((random() * 0.25)::numeric, 2) AS discount
+            ) q
+        """, {"rows": rows})
+    conn.commit()
+
+
+def build_layout(conn, layout, first_day, last_day):
+    table = f"{BENCH_SCHEMA}.{layout}"
+    partitioned = layout.startswith("partitioned")
+    date_index = "BRIN" if layout.endswith("brin") else "BTREE"
+
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {table}")
+        cur.execute(
+            f"CREATE TABLE {table} "
+            "(LIKE warehouse.fact_sales INCLUDING DEFAULTS)"
+            + (" PARTITION BY RANGE (date_key)" if partitioned else "")
+        )
+        if partitioned:
+            ensure_monthly_partitions(
+                cur, table, months_between(first_day, last_day),
+                bound=date_key
+            )
+
+        # Rows first, indexes after, as a bulk warehouse rebuild does
+        started = time.perf_counter()
+        cur.execute(f"""
+            INSERT INTO {table} (
+                sales_key, date_key, customer_key, product_key,
+                payment_method_key, transaction_id, quantity, unit_price,
+                discount_amount, line_total, profit
+            )
+            SELECT
+                sales_key, date_key, customer_key, product_key,
+                payment_method_key, transaction_id, quantity, unit_price,
+                discount_amount, line_total, profit
+            FROM {BENCH_SCHEMA}.source_rows
+        """)
+        cur.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (sales_key, date_key)")
+        cur.execute(
+            f"CREATE INDEX ON {table} USING {date_index} (date_key)"
+        )
+        for column in [
+            "customer_key", "product_key", "payment_method_key",
+            "transaction_id"
+        ]:
+            cur.execute(f"CREATE INDEX ON {table} ({column})")
+        load_seconds = time.perf_counter() - started
+    conn.commit()
+
+    # Outside a transaction block
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"VACUUM ANALYZE {table}")
+    conn.autocommit = False
+
+    # Summed over the partitions of the partitioned layouts
+    with conn.cursor() as cur:
+        cur.execute("""
+            WITH relations AS (
+                SELECT %(table)s::regclass AS oid
+                UNION ALL
+                SELECT inhrelid FROM pg_inherits
+                WHERE inhparent = %(table)s::regclass
+            )
+            SELECT
+                SUM(pg_table_size(r.oid)),
+                SUM(pg_indexes_size(r.oid)),
+                (
+                    SELECT SUM(pg_relation_size(i.indexrelid))
+                    FROM pg_index i
+                    JOIN pg_attribute a
+                        ON a.attrelid = i.indrelid
+                       AND a.attnum = i.indkey[0]
+                    WHERE i.indrelid IN (SELECT oid FROM relations)
+                      AND i.indnatts = 1
+                      AND a.attname = 'date_key'
+                )
+            FROM relations r
+        """, {"table": table})
+        table_bytes, index_bytes, date_index_bytes = cur.fetchone()
+
+    return {
+        "load_sec": round(load_seconds, 3),
+        "table_mb": round(int(table_bytes) / 1024 ** 2, 1),
+        "index_mb": round(int(index_bytes) / 1024 ** 2, 1),
+        "date_index_mb": round(int(date_index_bytes or 0) / 1024 ** 2, 2)
+    }
+
+
+# ---------------------------------
+# QUERIES
+# ---------------------------------
+def bench_queries(first_day):
+    queries = {
+        name: query["sql"] for name, query in load_queries(QUERIES_PATH).items()
+    }
+    month_end = date(first_day.year, first_day.month, 28)
+    week_start = date(first_day.year, first_day.month, 8)
+    for name, sql in DATE_PROBES.items():
+        queries[name] = sql.format(
+            month_start=date_key(first_day),
+            month_end=date_key(month_end),
+            week_start=date_key(week_start),
+            week_end=date_key(week_start) + 6
+        )
+    return queries
+
+
+def time_queries(conn, layout, queries, repeat):
+    table = f"{BENCH_SCHEMA}.{layout}"
+    timings = {}
+    with conn.cursor() as cur:
+        for name, sql in queries.items():
+            sql = sql.replace("warehouse.fact_sales", table)
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                cur.execute(sql)
+                cur.fetchall()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = round(best, 4)
+    conn.rollback()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time analytical_queries.sql and date-filtered probes "
+                    "against a heap fact table and partitioned layouts of "
+                    f"the same synthetic facts (in the {BENCH_SCHEMA} "
+                    "schema; dimensions are read from the warehouse)"
+    )
+    parser.add_argument(
+        "--rows", type=int, nargs="+",
+        default=[1_000_000, 10_000_000, 50_000_000]
+    )
+    parser.add_argument(
+        "--layouts", nargs="+", choices=LAYOUTS, default=LAYOUTS
+    )
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument(
+        "--keep", action="store_true",
+        help=f"Keep the {BENCH_SCHEMA} schema afterwards"
+    )
+    args = parser.parse_args()
+
+    conn = get_connection()
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA IF NOT EXISTS {BENCH_SCHEMA}")
+        cur.execute("SELECT MIN(full_date), MAX(full_date) FROM warehouse.dim_date")
+        first_day, last_day = cur.fetchone()
+    conn.commit()
+
+    queries = bench_queries(first_day)
+    report = {}
+    try:
+        for rows in args.rows:
+            generate_rows(conn, rows)
+            result = {}
+            for layout in args.layouts:
+                result[layout] = build_layout(conn, layout, first_day, last_day)
+                result[layout]["queries"] = time_queries(
+                    conn, layout, queries, args.repeat
+                )
+                result[layout]["total_query_sec"] = round(
+                    sum(result[layout]["queries"].values()), 3
+                )
+                # Keep one layout's copy at a time
+                with conn.cursor() as cur:
+                    cur.execute(f"DROP TABLE {BENCH_SCHEMA}.{layout}")
+                conn.commit()
+
+            baseline = result.get("heap_btree")
+            if baseline:
+                for layout in args.layouts:
+                    if layout == "heap_btree":
+                        continue
+                    result[f"{layout}_speedup"] = {
+                        name: round(seconds / result[layout]["queries"][name], 2)
+                        for name, seconds in baseline["queries"].items()
+                        if result[layout]["queries"][name]
+                    }
+            report[f"{rows:,}"] = result
+            print(json.dumps({f"{rows:,}": result}, indent=2), flush=True)
+
+    finally:
+        conn.rollback()
+        if not args.keep:
+            with conn.cursor() as cur:
+                cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+            conn.commit()
+        conn.close()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from scripts.ingestion.load_to_staging import (  # noqa: E402
+    STAGING_TABLES,
+    get_connection,
+    load_csv_to_table,
+    raw_files
+)
+
+
+# ---------------------------------
+# REFERENCE (PRE-COPY) IMPLEMENTATION
+# ---------------------------------
+def legacy_load_csv_to_table(conn, csv_file, table_name):
+    df = pd.read_csv(csv_file)
+
+    cols = ",".join(df.columns)
+    placeholders = ",".join(["%s"] * len(df.columns))
+    insert_query = f"""
+        INSERT INTO {table_name} ({cols})
+        VALUES ({placeholders})
+    """
+
+    with conn.cursor() as cur:
+        cur.executemany(insert_query, df.values.tolist())
+
+
+# ---------------------------------
+# BENCHMARK
+# ---------------------------------
+def time_load(conn, loader, files, table_name) -> dict:
+    # Load into an empty temp copy of the staging table so the real
+    # staging data is never touched
+    scratch = "bench_" + table_name.split(".")[1]
+
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {scratch}")
+        cur.execute(
+            f"CREATE TEMP TABLE {scratch} "
+            f"(LIKE {table_name} INCLUDING DEFAULTS)"
+        )
+
+    started = time.perf_counter()
+    for csv_file in files:
+        loader(conn, csv_file, scratch)
+    elapsed = time.perf_counter() - started
+
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT COUNT(*) FROM {scratch}")
+        rows = cur.fetchone()[0]
+
+    return {
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed) if elapsed else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare executemany and COPY staging loads"
+    )
+    parser.add_argument(
+        "--skip-legacy", action="store_true",
+        help="Only time the COPY loader (executemany is slow at scale)"
+    )
+    args = parser.parse_args()
+
+    conn = get_connection()
+    report = {}
+
+    try:
+        for entity, table_name in STAGING_TABLES:
+            files = raw_files(entity)
+            result = {
+                "files": [os.path.basename(f) for f in files],
+                "copy": time_load(conn, load_csv_to_table, files, table_name)
+            }
+
+            if not args.skip_legacy:
+                result["executemany"] = time_load(
+                    conn, legacy_load_csv_to_table, files, table_name
+                )
+                if result["copy"]["seconds"]:
+                    result["speedup"] = round(
+                        result["executemany"]["seconds"]
+                        / result["copy"]["seconds"],
+                        1
+                    )
+
+            report[table_name] = result
+    finally:
+        conn.rollback()
+        conn.close()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from scripts.data_generation.generate_data import (  # noqa: E402
+    generate_transaction_items
+)
+
+
+# ---------------------------------
+# REFERENCE (PRE-VECTORIZATION) IMPLEMENTATION
+# ---------------------------------
+def legacy_generate_transaction_items(
+    transactions_df: pd.DataFrame,
+    products_df: pd.DataFrame
+) -> pd.DataFrame:
+
+    items = []
+    item_counter = 1
+
+    for _, txn in transactions_df.iterrows():
+        num_items = random.randint(1, 5)
+        selected_products = products_df.sample(num_items)
+
+        transaction_total = 0.0
+
+        for _, prod in selected_products.iterrows():
+            quantity = random.randint(1, 4)
+            discount = random.choice([0, 5, 10, 15, 20])
+
+            line_total = round(
+                quantity * prod["price"] * (1 - discount / 100),
+                2
+            )
+
+            transaction_total += line_total
+
+            items.append({
+                "item_id": f"ITEM{item_counter:05d}",
+                "transaction_id": txn["transaction_id"],
+                "product_id": prod["product_id"],
+                "quantity": quantity,
+                "unit_price": prod["price"],
+                "discount_percentage": discount,
+                "line_total": line_total
+            })
+
+            item_counter += 1
+
+        transactions_df.loc[
+            transactions_df["transaction_id"] == txn["transaction_id"],
+            "total_amount"
+        ] = round(transaction_total, 2)
+
+    return pd.DataFrame(items)
+
+
+# ---------------------------------
+# SYNTHETIC INPUTS
+# ---------------------------------
+def build_inputs(num_transactions: int, num_products: int):
+    generator = np.random.default_rng(0)
+
+    products_df = pd.DataFrame({
+        "product_id": [f"PROD{i:04d}" for i in range(1, num_products + 1)],
+        "price": np.round(generator.uniform(10, 1000, num_products), 2)
+    })
+    transactions_df = pd.DataFrame({
+        "transaction_id": [
+            f"TXN{i:05d}" for i in range(1, num_transactions + 1)
+        ],
+        "total_amount": 0.0
+    })
+
+    return transactions_df, products_df
+
+
+def time_run(func, num_transactions: int, num_products: int) -> dict:
+    transactions_df, products_df = build_inputs(num_transactions, num_products)
+
+    started = time.perf_counter()
+    items_df = func(transactions_df, products_df)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "transactions": num_transactions,
+        "line_items": len(items_df),
+        "seconds": round(elapsed, 3),
+        "items_per_sec": round(len(items_df) / elapsed) if elapsed else None
+    }
+
+
+# ---------------------------------
+# MAIN EXECUTION
+# ---------------------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare legacy and vectorized line item generation"
+    )
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument(
+        "--legacy-transactions", type=int, default=2000,
+        help="Transactions for the legacy run (it is quadratic, keep small)"
+    )
+    parser.add_argument(
+        "--transactions", type=int, nargs="+",
+        default=[10000, 1000000, 3333334],
+        help="Transaction counts for the vectorized runs (~3 items each)"
+    )
+    args = parser.parse_args()
+
+    legacy = time_run(
+        legacy_generate_transaction_items,
+        args.legacy_transactions,
+        args.products
+    )
+    vectorized = [
+        time_run(generate_transaction_items, n, args.products)
+        for n in args.transactions
+    ]
+
+    same_size = time_run(
+        generate_transaction_items, args.legacy_transactions, args.products
+    )
+
+    report = {
+        "legacy": legacy,
+        "vectorized": vectorized,
+        "speedup_at_legacy_size": round(
+            legacy["seconds"] / same_size["seconds"], 1
+        ) if same_size["seconds"] else None
+    }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from scripts.ingestion.load_to_staging import (  # noqa: E402
+    STAGING_TABLES,
+    get_connection,
+    load_csv_to_table,
+    raw_files
+)
+
+BENCH_SCHEMA = "bench_staging"
+
+# Table options per mode. "logged_truncate" truncates and loads in one
+# transaction, which only skips WAL when the server runs wal_level=minimal.
+MODES = {
+    "logged": "",
+    "logged_truncate": "",
+    "unlogged": "UNLOGGED",
+}
+
+
+# ---------------------------------
+# BENCHMARK
+# ---------------------------------
+def wal_lsn(cur):
+    cur.execute("SELECT pg_current_wal_lsn()")
+    return cur.fetchone()[0]
+
+
+def time_mode(conn, mode, batch_size=None) -> dict:
+    result = {"tables": {}}
+    total_wal = 0
+    total_seconds = 0.0
+
+    for entity, table_name in STAGING_TABLES:
+        scratch = f"{BENCH_SCHEMA}.{table_name.split('.')[1]}"
+
+        with conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {scratch}")
+            cur.execute(
+                f"CREATE {MODES[mode]} TABLE {scratch} "
+                f"(LIKE {table_name} INCLUDING DEFAULTS)"
+            )
+        conn.commit()
+
+        with conn.cursor() as cur:
+            lsn_before = wal_lsn(cur)
+
+        started = time.perf_counter()
+        if mode == "logged_truncate":
+            with conn.cursor() as cur:
+                cur.execute(f"TRUNCATE TABLE {scratch}")
+
+        rows = 0
+        for csv_file in raw_files(entity):
+            rows += load_csv_to_table(
+                conn, csv_file, table_name, scratch, batch_size
+            )
+        conn.commit()
+        elapsed = time.perf_counter() - started
+
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s)",
+                (lsn_before,)
+            )
+            wal_bytes = int(cur.fetchone()[0])
+
+        total_wal += wal_bytes
+        total_seconds += elapsed
+        result["tables"][table_name] = {
+            "rows": rows,
+            "seconds": round(elapsed, 3),
+            "wal_bytes": wal_bytes
+        }
+
+    result["seconds"] = round(total_seconds, 3)
+    result["wal_bytes"] = total_wal
+    result["wal_mb"] = round(total_wal / 1024 / 1024, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare WAL volume and time of logged and unlogged "
+                    "staging loads"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=None,
+        help="COPY chunk size (default: whole file in one COPY)"
+    )
+    parser.add_argument(
+        "--modes", nargs="+", choices=list(MODES), default=list(MODES)
+    )
+    args = parser.parse_args()
+
+    conn = get_connection()
+    report = {}
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SHOW wal_level")
+            report["wal_level"] = cur.fetchone()[0]
+            cur.execute(f"CREATE SCHEMA IF NOT EXISTS {BENCH_SCHEMA}")
+        conn.commit()
+
+        # WAL position is cluster-wide: run on an otherwise idle server
+        for mode in args.modes:
+            report[mode] = time_mode(conn, mode, args.batch_size)
+
+    finally:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        conn.commit()
+        conn.close()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,36 @@
 import pandas as pd
-import random
+import numpy as np
+import argparse
+import glob
 import json
 import os
+import sys
+import time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from faker import Faker
+from faker import VERSION as faker_version
 from datetime import datetime, date
 import yaml
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from scripts.orchestration.metrics import peak_rss_mb  # noqa: E402
+
 # ---------------------------------
 # INITIAL SETUP
 # ---------------------------------
 fake = Faker()
+rng = np.random.default_rng()
 
 RAW_DATA_PATH = "data/raw"
 os.makedirs(RAW_DATA_PATH, exist_ok=True)
 
+ENTITIES = ["customers", "products", "transactions", "transaction_items"]
+
+# Stable per-entity component of the shard seed (never reorder)
+ENTITY_SEED_CODES = {"customers": 0, "products": 1, "transactions": 2}
+
 
 # ---------------------------------
 # LOAD CONFIG
@@ -34,140 +51,310 @@ END_DATE = datetime.strptime(
     config["data_generation"]["end_date"], "%Y-%m-%d"
 ).date()
 
+# Line item shape (per transaction)
+MAX_ITEMS_PER_TRANSACTION = 5
+QUANTITY_RANGE = (1, 4)
+DISCOUNT_CHOICES = np.array([0, 5, 10, 15, 20])
+
+
+AGE_GROUPS = ["18-25", "26-35", "36-45", "46-60"]
+
+PRODUCT_CATEGORIES = {
+    "Electronics": (100, 1000),
+    "Clothing": (20, 200),
+    "Home & Kitchen": (50, 500),
+    "Books": (10, 100),
+    "Sports": (30, 300),
+    "Beauty": (15, 150)
+}
+
+PAYMENT_METHODS = [
+    "Credit Card", "Debit Card", "UPI",
+    "Cash on Delivery", "Net Banking"
+]
+
 
 # ---------------------------------
-# REQUIRED FUNCTIONS (MANDATORY)
+# FAKER VALUE POOLS
 # ---------------------------------
+# One Faker call per pooled field value; rows then pick values by index
+POOL_FIELDS = {
+    "first_name": lambda f: f.first_name(),
+    "last_name": lambda f: f.last_name(),
+    "phone": lambda f: f.msisdn()[:10],
+    "city": lambda f: f.city(),
+    "state": lambda f: f.state(),
+    "word": lambda f: f.word().capitalize(),
+    "company": lambda f: f.company(),
+    "address": lambda f: f.address().replace("\n", ", "),
+}
+
+# Stop drawing once this many calls in a row produced no new value
+# (low-cardinality providers such as state run out quickly)
+POOL_MAX_STALE_DRAWS = 200
+
+
+def _pool_cache_path(cache_dir: str, field: str, size: int, seed: int) -> str:
+    # Faker's version is part of the key: providers change between releases
+    return os.path.join(
+        cache_dir,
+        f"{field}-{size}-{seed}-faker{faker_version}.json"
+    )
+
+
+def draw_pool(field: str, size: int, faker: Faker) -> np.ndarray:
+    values = {}
+    stale_draws = 0
 
-def generate_customers(num_customers: int) -> pd.DataFrame:
-    customers = []
-
-    for i in range(1, num_customers + 1):
-        customers.append({
-            "customer_id": f"CUST{i:04d}",
-            "first_name": fake.first_name(),
-            "last_name": fake.last_name(),
-            "email": f"user{i}@example.com",  # unique emails
-            "phone": fake.msisdn()[:10],
-            "registration_date": fake.date_between(
-                start_date=START_DATE,
-                end_date=END_DATE
-            ),
-            "city": fake.city(),
-            "state": fake.state(),
-            "country": "India",
-            "age_group": random.choice(["18-25", "26-35", "36-45", "46-60"])
-        })
-
-    return pd.DataFrame(customers)
-
-
-def generate_products(num_products: int) -> pd.DataFrame:
-    categories = {
-        "Electronics": (100, 1000),
-        "Clothing": (20, 200),
-        "Home & Kitchen": (50, 500),
-        "Books": (10, 100),
-        "Sports": (30, 300),
-        "Beauty": (15, 150)
+    while len(values) < size and stale_draws < POOL_MAX_STALE_DRAWS:
+        value = POOL_FIELDS[field](faker)
+        if value in values:
+            stale_draws += 1
+        else:
+            values[value] = None
+            stale_draws = 0
+
+    return np.array(list(values), dtype=object)
+
+
+def build_value_pools(pool_config: dict, seed: int = 0) -> dict:
+    # Fields with a size of 0 (or not listed) keep per-row Faker calls
+    sizes = {
+        field: size
+        for field, size in (pool_config.get("sizes") or {}).items()
+        if size
     }
+    cache_dir = pool_config.get("cache_dir")
+    pools = {}
 
-    products = []
+    for field, size in sizes.items():
+        cache_path = (
+            _pool_cache_path(cache_dir, field, size, seed) if cache_dir
+            else None
+        )
 
-    for i in range(1, num_products + 1):
-        category = random.choice(list(categories.keys()))
-        min_price, max_price = categories[category]
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path) as f:
+                pools[field] = np.array(json.load(f), dtype=object)
+            continue
 
-        price = round(random.uniform(min_price, max_price), 2)
-        cost = round(price * random.uniform(0.6, 0.85), 2)  # cost < price
+        pool_fake = Faker()
+        pool_fake.seed_instance(seed)
+        pools[field] = draw_pool(field, size, pool_fake)
 
-        products.append({
-            "product_id": f"PROD{i:04d}",
-            "product_name": fake.word().capitalize(),
-            "category": category,
-            "sub_category": fake.word().capitalize(),
-            "price": price,
-            "cost": cost,
-            "brand": fake.company(),
-            "stock_quantity": random.randint(10, 500),
-            "supplier_id": f"SUP{random.randint(1, 50):03d}"
-        })
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path, "w") as f:
+                json.dump(pools[field].tolist(), f)
 
-    return pd.DataFrame(products)
+    return pools
 
 
-def generate_transactions(
-    num_transactions: int,
-    customers_df: pd.DataFrame
-) -> pd.DataFrame:
+def draw_values(
+    field: str,
+    count: int,
+    faker: Faker,
+    generator: np.random.Generator,
+    pools: dict = None
+):
+    pool = (pools or {}).get(field)
+
+    if pool is None:
+        return [POOL_FIELDS[field](faker) for _ in range(count)]
+
+    return pool[generator.integers(0, len(pool), size=count)]
 
-    payment_methods = [
-        "Credit Card", "Debit Card", "UPI",
-        "Cash on Delivery", "Net Banking"
+
+def _random_dates(generator: np.random.Generator, count: int) -> np.ndarray:
+    span_days = (END_DATE - START_DATE).days
+    offsets = generator.integers(0, span_days + 1, size=count)
+    return np.datetime_as_string(np.datetime64(START_DATE, "D") + offsets)
+
+
+def _random_times(generator: np.random.Generator, count: int) -> list:
+    # Faker's time() is anchored to the wall clock, so draw the second
+    # of day from the seeded generator instead
+    seconds = generator.integers(0, 86400, size=count).tolist()
+    return [
+        f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in seconds
     ]
 
-    transactions = []
 
-    for i in range(1, num_transactions + 1):
-        transactions.append({
-            "transaction_id": f"TXN{i:05d}",
-            "customer_id": random.choice(customers_df["customer_id"]),
-            "transaction_date": fake.date_between(
-                start_date=START_DATE,
-                end_date=END_DATE
-            ),
-            "transaction_time": fake.time(),
-            "payment_method": random.choice(payment_methods),
-            "shipping_address": fake.address().replace("\n", ", "),
-            "total_amount": 0.0  # calculated later
-        })
+# ---------------------------------
+# REQUIRED FUNCTIONS (MANDATORY)
+# ---------------------------------
 
-    return pd.DataFrame(transactions)
+def generate_customers(
+    num_customers: int,
+    start_id: int = 1,
+    faker: Faker = None,
+    generator: np.random.Generator = None,
+    pools: dict = None
+) -> pd.DataFrame:
+    faker = faker or fake
+    generator = generator or rng
+    ids = range(start_id, start_id + num_customers)
+
+    def values(field):
+        return draw_values(field, num_customers, faker, generator, pools)
+
+    return pd.DataFrame({
+        "customer_id": _format_ids("CUST", start_id, num_customers, 4),
+        "first_name": values("first_name"),
+        "last_name": values("last_name"),
+        "email": [f"user{i}@example.com" for i in ids],  # unique emails
+        "phone": values("phone"),
+        "registration_date": _random_dates(generator, num_customers),
+        "city": values("city"),
+        "state": values("state"),
+        "country": "India",
+        "age_group": generator.choice(AGE_GROUPS, size=num_customers)
+    })
+
+
+def generate_products(
+    num_products: int,
+    start_id: int = 1,
+    faker: Faker = None,
+    generator: np.random.Generator = None,
+    pools: dict = None
+) -> pd.DataFrame:
+    faker = faker or fake
+    generator = generator or rng
+
+    def values(field):
+        return draw_values(field, num_products, faker, generator, pools)
+
+    category = generator.choice(list(PRODUCT_CATEGORIES), size=num_products)
+    min_price = np.array([PRODUCT_CATEGORIES[c][0] for c in category])
+    max_price = np.array([PRODUCT_CATEGORIES[c][1] for c in category])
+
+    price = np.round(generator.uniform(min_price, max_price), 2)
+    cost = np.round(
+        price * generator.uniform(0.6, 0.85, size=num_products), 2
+    )  # cost < price
+
+    return pd.DataFrame({
+        "product_id": _format_ids("PROD", start_id, num_products, 4),
+        "product_name": values("word"),
+        "category": category,
+        "sub_category": values("word"),
+        "price": price,
+        "cost": cost,
+        "brand": values("company"),
+        "stock_quantity": generator.integers(10, 501, size=num_products),
+        "supplier_id": [
+            f"SUP{n:03d}"
+            for n in generator.integers(1, 51, size=num_products).tolist()
+        ]
+    })
 
 
-def generate_transaction_items(
-    transactions_df: pd.DataFrame,
-    products_df: pd.DataFrame
+def generate_transactions(
+    num_transactions: int,
+    customers_df: pd.DataFrame,
+    start_id: int = 1,
+    faker: Faker = None,
+    generator: np.random.Generator = None,
+    pools: dict = None
 ) -> pd.DataFrame:
+    faker = faker or fake
+    generator = generator or rng
+
+    return pd.DataFrame({
+        "transaction_id": _format_ids("TXN", start_id, num_transactions, 5),
+        "customer_id": generator.choice(
+            customers_df["customer_id"].to_numpy(), size=num_transactions
+        ),
+        "transaction_date": _random_dates(generator, num_transactions),
+        "transaction_time": _random_times(generator, num_transactions),
+        "payment_method": generator.choice(
+            PAYMENT_METHODS, size=num_transactions
+        ),
+        "shipping_address": draw_values(
+            "address", num_transactions, faker, generator, pools
+        ),
+        "total_amount": 0.0  # calculated later
+    })
+
+
+def _format_ids(prefix: str, start: int, count: int, width: int) -> list:
+    return [f"{prefix}{i:0{width}d}" for i in range(start, start + count)]
+
+
+def _draw_distinct_products(
+    owners: np.ndarray,
+    num_products: int,
+    generator: np.random.Generator
+) -> np.ndarray:
+    # Items of one transaction are contiguous in `owners`, so duplicates
+    # can only sit at most MAX_ITEMS_PER_TRANSACTION - 1 positions apart.
+    # Re-draw the later item of every duplicate pair until none are left
+    # (same result as sampling without replacement per transaction).
+    product_idx = generator.integers(0, num_products, size=len(owners))
+
+    while True:
+        duplicate = np.zeros(len(owners), dtype=bool)
+        for lag in range(1, MAX_ITEMS_PER_TRANSACTION):
+            duplicate[lag:] |= (
+                (owners[lag:] == owners[:-lag])
+                & (product_idx[lag:] == product_idx[:-lag])
+            )
 
-    items = []
-    item_counter = 1
+        num_duplicates = int(duplicate.sum())
+        if num_duplicates == 0:
+            return product_idx
 
-    for _, txn in transactions_df.iterrows():
-        num_items = random.randint(1, 5)
-        selected_products = products_df.sample(num_items)
+        product_idx[duplicate] = generator.integers(
+            0, num_products, size=num_duplicates
+        )
 
-        transaction_total = 0.0
 
-        for _, prod in selected_products.iterrows():
-            quantity = random.randint(1, 4)
-            discount = random.choice([0, 5, 10, 15, 20])
+def generate_transaction_items(
+    transactions_df: pd.DataFrame,
+    products_df: pd.DataFrame,
+    start_id: int = 1,
+    generator: np.random.Generator = None
+) -> pd.DataFrame:
+    generator = generator or rng
 
-            line_total = round(
-                quantity * prod["price"] * (1 - discount / 100),
-                2
-            )
+    num_transactions = len(transactions_df)
+    num_products = len(products_df)
 
-            transaction_total += line_total
+    # Draw every random attribute for the whole batch at once
+    items_per_txn = np.minimum(
+        generator.integers(
+            1, MAX_ITEMS_PER_TRANSACTION + 1, size=num_transactions
+        ),
+        num_products
+    )
+    owners = np.repeat(np.arange(num_transactions), items_per_txn)
+    num_items = len(owners)
 
-            items.append({
-                "item_id": f"ITEM{item_counter:05d}",
-                "transaction_id": txn["transaction_id"],
-                "product_id": prod["product_id"],
-                "quantity": quantity,
-                "unit_price": prod["price"],
-                "discount_percentage": discount,
-                "line_total": line_total
-            })
+    product_idx = _draw_distinct_products(owners, num_products, generator)
+    quantity = generator.integers(
+        QUANTITY_RANGE[0], QUANTITY_RANGE[1] + 1, size=num_items
+    )
+    discount = generator.choice(DISCOUNT_CHOICES, size=num_items)
 
-            item_counter += 1
+    unit_price = products_df["price"].to_numpy(dtype=float)[product_idx]
+    line_total = np.round(quantity * unit_price * (1 - discount / 100), 2)
 
-        transactions_df.loc[
-            transactions_df["transaction_id"] == txn["transaction_id"],
-            "total_amount"
-        ] = round(transaction_total, 2)
+    # Per-transaction totals via a grouped reduction over the owner index
+    transactions_df["total_amount"] = np.round(
+        np.bincount(owners, weights=line_total, minlength=num_transactions),
+        2
+    )
 
-    return pd.DataFrame(items)
+    return pd.DataFrame({
+        "item_id": _format_ids("ITEM", start_id, num_items, 5),
+        "transaction_id": transactions_df["transaction_id"].to_numpy()[owners],
+        "product_id": products_df["product_id"].to_numpy()[product_idx],
+        "quantity": quantity,
+        "unit_price": unit_price,
+        "discount_percentage": discount,
+        "line_total": line_total
+    })
 
 
 def validate_referential_integrity(
@@ -202,59 +389,568 @@ def validate_referential_integrity(
 
 
 # ---------------------------------
-# MAIN EXECUTION
+# BATCHED (STREAMING) GENERATION
 # ---------------------------------
-if __name__ == "__main__":
+def iter_batches(start_id: int, count: int, batch_size=None):
+    # (batch_start_id, batch_count) covering [start_id, start_id + count)
+    batch_size = batch_size or count
+
+    for offset in range(0, count, max(batch_size, 1)):
+        yield start_id + offset, min(batch_size, count - offset)
+
+
+def generate_customer_batches(
+    num_customers: int,
+    start_id: int = 1,
+    batch_size: int = None,
+    faker: Faker = None,
+    generator: np.random.Generator = None,
+    pools: dict = None
+):
+    for batch_start, batch_count in iter_batches(
+        start_id, num_customers, batch_size
+    ):
+        yield generate_customers(
+            batch_count, batch_start, faker, generator, pools
+        )
+
+
+def generate_product_batches(
+    num_products: int,
+    start_id: int = 1,
+    batch_size: int = None,
+    faker: Faker = None,
+    generator: np.random.Generator = None,
+    pools: dict = None
+):
+    for batch_start, batch_count in iter_batches(
+        start_id, num_products, batch_size
+    ):
+        yield generate_products(
+            batch_count, batch_start, faker, generator, pools
+        )
+
+
+def generate_transaction_batches(
+    num_transactions: int,
+    customers_df: pd.DataFrame,
+    products_df: pd.DataFrame,
+    start_id: int = 1,
+    batch_size: int = None,
+    faker: Faker = None,
+    generator: np.random.Generator = None,
+    pools: dict = None
+):
+    # Yields (transactions, items) pairs; totals are final once yielded.
+    # Item IDs are offset by the transaction range to stay globally unique
+    # across shards and contiguous within one.
+    next_item_id = (start_id - 1) * MAX_ITEMS_PER_TRANSACTION + 1
+
+    for batch_start, batch_count in iter_batches(
+        start_id, num_transactions, batch_size
+    ):
+        transactions_df = generate_transactions(
+            batch_count, customers_df, batch_start, faker, generator, pools
+        )
+        items_df = generate_transaction_items(
+            transactions_df, products_df, next_item_id, generator
+        )
+        next_item_id += len(items_df)
+
+        yield transactions_df, items_df
+
+
+def append_csv(df: pd.DataFrame, path: str, first_batch: bool):
+    df.to_csv(
+        path,
+        mode="w" if first_batch else "a",
+        header=first_batch,
+        index=False
+    )
+
+
+def write_batches(batches, path: str) -> int:
+    rows = 0
+    for batch_no, df in enumerate(batches):
+        append_csv(df, path, batch_no == 0)
+        rows += len(df)
+    return rows
+
+
+# ---------------------------------
+# SHARDED GENERATION
+# ---------------------------------
+def shard_ranges(total: int, shards: int) -> list:
+    # Contiguous 1-based ID ranges: [(start_id, count), ...]
+    base, extra = divmod(total, shards)
+    ranges = []
+    start_id = 1
+
+    for shard in range(shards):
+        count = base + (1 if shard < extra else 0)
+        ranges.append((start_id, count))
+        start_id += count
+
+    return ranges
+
+
+def shard_generators(seed: int, shard: int, entity: str):
+    seed_seq = np.random.SeedSequence(
+        [seed, shard, ENTITY_SEED_CODES[entity]]
+    )
+
+    shard_fake = Faker()
+    shard_fake.seed_instance(int(seed_seq.generate_state(1, np.uint64)[0]))
+
+    return shard_fake, np.random.default_rng(seed_seq)
+
+
+def part_path(entity: str, shard) -> str:
+    if shard is None:
+        return f"{RAW_DATA_PATH}/{entity}.csv"
+    return f"{RAW_DATA_PATH}/{entity}-{shard:05d}.csv"
+
+
+def clear_raw_outputs():
+    # Stale parts from a run with a different shard count must not be
+    # picked up by the staging loader
+    for entity in ENTITIES:
+        paths = glob.glob(f"{RAW_DATA_PATH}/{entity}-*.csv")
+        paths.append(part_path(entity, None))
+
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _customer_ids(num_customers: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "customer_id": _format_ids("CUST", 1, num_customers, 4)
+    })
+
 
-    customers_df = generate_customers(
-        config["data_generation"]["customers"]
+def generate_customer_shard(task: dict) -> dict:
+    started = time.perf_counter()
+    shard_fake, generator = shard_generators(
+        task["seed"], task["shard"], "customers"
     )
 
-    products_df = generate_products(
-        config["data_generation"]["products"]
+    # The IDs actually written, for the cross-shard integrity check
+    customer_ids = []
+
+    def keep_ids(batches):
+        for customers_df in batches:
+            customer_ids.append(customers_df[["customer_id"]])
+            yield customers_df
+
+    rows = write_batches(
+        keep_ids(generate_customer_batches(
+            task["count"], task["start_id"], task["batch_size"],
+            shard_fake, generator, task["pools"]
+        )),
+        task["path"]
     )
 
-    transactions_df = generate_transactions(
-        config["data_generation"]["transactions"],
-        customers_df
+    result = _shard_stats(rows, started)
+    result["customer_ids"] = (
+        pd.concat(customer_ids, ignore_index=True) if customer_ids
+        else pd.DataFrame(columns=["customer_id"])
+    )
+    return result
+
+
+def generate_product_shard(task: dict) -> dict:
+    started = time.perf_counter()
+    shard_fake, generator = shard_generators(
+        task["seed"], task["shard"], "products"
+    )
+
+    # Line items of every transaction shard need the full price list
+    prices = []
+
+    def keep_prices(batches):
+        for products_df in batches:
+            prices.append(products_df[["product_id", "price"]])
+            yield products_df
+
+    rows = write_batches(
+        keep_prices(generate_product_batches(
+            task["count"], task["start_id"], task["batch_size"],
+            shard_fake, generator, task["pools"]
+        )),
+        task["path"]
+    )
+
+    result = _shard_stats(rows, started)
+    result["prices"] = (
+        pd.concat(prices, ignore_index=True) if prices
+        else pd.DataFrame(columns=["product_id", "price"])
+    )
+    return result
+
+
+def generate_transaction_shard(task: dict) -> dict:
+    started = time.perf_counter()
+    shard_fake, generator = shard_generators(
+        task["seed"], task["shard"], "transactions"
+    )
+
+    # Customers are sampled from the global ID range; integrity is
+    # checked against the IDs the customer shards actually wrote
+    customers_df = _customer_ids(task["num_customers"])
+    written_customers = task["customer_ids"]
+    products_df = task["prices"]
+
+    rows = item_rows = 0
+    integrity_reports = []
+
+    for batch_no, (transactions_df, items_df) in enumerate(
+        generate_transaction_batches(
+            task["count"], customers_df, products_df, task["start_id"],
+            task["batch_size"], shard_fake, generator, task["pools"]
+        )
+    ):
+        append_csv(transactions_df, task["path"], batch_no == 0)
+        append_csv(items_df, task["items_path"], batch_no == 0)
+
+        integrity_reports.append(validate_referential_integrity(
+            written_customers, products_df, transactions_df, items_df
+        ))
+        rows += len(transactions_df)
+        item_rows += len(items_df)
+
+    result = _shard_stats(rows, started)
+    result["item_rows"] = item_rows
+    result["integrity"] = merge_integrity_reports(integrity_reports)
+    return result
+
+
+def _shard_stats(rows: int, started: float) -> dict:
+    seconds = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def run_tasks(func, tasks: list, workers: int) -> list:
+    if workers <= 1:
+        return [func(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, tasks))
+
+
+def merge_integrity_reports(reports: list) -> dict:
+    merged = {
+        key: sum(report[key] for report in reports)
+        for key in [
+            "orphan_transactions",
+            "orphan_items_transactions",
+            "orphan_items_products"
+        ]
+    }
+    merged["status"] = "PASS" if not any(merged.values()) else "FAIL"
+    return merged
+
+
+def generate_dataset(
+    shards=None,
+    workers: int = 1,
+    seed=None,
+    batch_size: int = None
+) -> dict:
+    num_shards = shards or 1
+    gen_cfg = config["data_generation"]
+
+    # Pools are shared by every shard and independent of the run seed,
+    # so a cached pool is reused by runs with different seeds
+    pool_config = gen_cfg.get("value_pools") or {}
+    pools = build_value_pools(pool_config, pool_config.get("seed", 0))
+
+    def tasks_for(entity, total):
+        return [
+            {
+                "shard": shard,
+                "seed": seed,
+                "start_id": start_id,
+                "count": count,
+                "batch_size": batch_size,
+                "pools": pools,
+                "path": part_path(entity, shard if shards else None)
+            }
+            for shard, (start_id, count) in enumerate(
+                shard_ranges(total, num_shards)
+            )
+        ]
+
+    clear_raw_outputs()
+
+    customer_results = run_tasks(
+        generate_customer_shard,
+        tasks_for("customers", gen_cfg["customers"]),
+        workers
+    )
+    product_results = run_tasks(
+        generate_product_shard,
+        tasks_for("products", gen_cfg["products"]),
+        workers
+    )
+    prices = pd.concat(
+        [result.pop("prices") for result in product_results],
+        ignore_index=True
+    )
+    customer_ids = pd.concat(
+        [result.pop("customer_ids") for result in customer_results],
+        ignore_index=True
     )
 
-    items_df = generate_transaction_items(
-        transactions_df,
-        products_df
+    transaction_tasks = tasks_for("transactions", gen_cfg["transactions"])
+    for task in transaction_tasks:
+        task["items_path"] = part_path(
+            "transaction_items", task["shard"] if shards else None
+        )
+        task["num_customers"] = gen_cfg["customers"]
+        task["customer_ids"] = customer_ids
+        task["prices"] = prices
+
+    transaction_results = run_tasks(
+        generate_transaction_shard, transaction_tasks, workers
     )
 
-    integrity_report = validate_referential_integrity(
-        customers_df,
-        products_df,
-        transactions_df,
-        items_df
+    return {
+        "records": {
+            "customers": sum(r["rows"] for r in customer_results),
+            "products": sum(r["rows"] for r in product_results),
+            "transactions": sum(r["rows"] for r in transaction_results),
+            "transaction_items": sum(
+                r["item_rows"] for r in transaction_results
+            )
+        },
+        "referential_integrity": merge_integrity_reports(
+            [r.pop("integrity") for r in transaction_results]
+        ),
+        "shards": [
+            {
+                "shard": shard,
+                "customers": customer_results[shard],
+                "products": product_results[shard],
+                "transactions": {
+                    key: transaction_results[shard][key]
+                    for key in ["rows", "seconds", "peak_rss_mb"]
+                },
+                "transaction_items": {
+                    "rows": transaction_results[shard]["item_rows"]
+                }
+            }
+            for shard in range(num_shards)
+        ]
+    }
+
+
+# ---------------------------------
+# FUSED GENERATE-AND-LOAD
+# ---------------------------------
+def iter_dataset_batches(shards, seed, batch_size=None, pools=None):
+    # Same shard layout, seeds and batches as generate_dataset, yielded
+    # in-process as (entity, shard, DataFrame) instead of written per shard
+    num_shards = shards or 1
+    gen_cfg = config["data_generation"]
+    prices = []
+    customer_ids = []
+
+    for entity, batch_func in [
+        ("customers", generate_customer_batches),
+        ("products", generate_product_batches),
+    ]:
+        for shard, (start_id, count) in enumerate(
+            shard_ranges(gen_cfg[entity], num_shards)
+        ):
+            shard_fake, generator = shard_generators(seed, shard, entity)
+
+            for df in batch_func(
+                count, start_id, batch_size, shard_fake, generator, pools
+            ):
+                if entity == "products":
+                    prices.append(df[["product_id", "price"]])
+                else:
+                    customer_ids.append(df[["customer_id"]])
+                yield entity, shard, df
+
+    customers_df = _customer_ids(gen_cfg["customers"])
+    written_customers = pd.concat(customer_ids, ignore_index=True)
+    products_df = pd.concat(prices, ignore_index=True)
+
+    for shard, (start_id, count) in enumerate(
+        shard_ranges(gen_cfg["transactions"], num_shards)
+    ):
+        shard_fake, generator = shard_generators(seed, shard, "transactions")
+
+        for transactions_df, items_df in generate_transaction_batches(
+            count, customers_df, products_df, start_id, batch_size,
+            shard_fake, generator, pools
+        ):
+            yield "transactions", shard, transactions_df
+            yield "transaction_items", shard, items_df
+
+            # Batches are final once yielded, so check them as they pass
+            yield "integrity", shard, validate_referential_integrity(
+                written_customers, products_df, transactions_df, items_df
+            )
+
+
+def stream_to_staging(
+    shards=None,
+    seed=None,
+    batch_size: int = None,
+    tee_csv: bool = False
+) -> dict:
+    # Imported here so plain CSV generation does not need a DB driver
+    from scripts.ingestion.load_to_staging import (
+        STAGING_TABLES,
+        copy_dataframe_to_table,
+        fill_row_hashes,
+        get_connection,
+        load_staging_columns,
+        run_pipelined
     )
 
-    # Save CSV files
-    customers_df.to_csv(
-        f"{RAW_DATA_PATH}/customers.csv", index=False
+    staging_columns = load_staging_columns()
+    pool_config = config["data_generation"].get("value_pools") or {}
+    pools = build_value_pools(pool_config, pool_config.get("seed", 0))
+
+    records = {entity: 0 for entity in ENTITIES}
+    integrity_reports = []
+    written_paths = set()
+
+    if tee_csv:
+        clear_raw_outputs()
+
+    def produce():
+        for entity, shard, batch in iter_dataset_batches(
+            shards, seed, batch_size, pools
+        ):
+            if entity == "integrity":
+                integrity_reports.append(batch)
+                continue
+
+            if tee_csv:
+                path = part_path(entity, shard if shards else None)
+                append_csv(batch, path, path not in written_paths)
+                written_paths.add(path)
+
+            yield entity, batch
+
+    conn = get_connection()
+    conn.autocommit = False
+
+    def load(item):
+        entity, batch = item
+        table_name = f"staging.{entity}"
+        copy_dataframe_to_table(
+            conn, batch, table_name, staging_columns[table_name]
+        )
+        records[entity] += len(batch)
+
+    try:
+        # The generated dataset replaces staging, in the same transaction
+        with conn.cursor() as cur:
+            cur.execute("TRUNCATE TABLE " + ", ".join(
+                table_name for _, table_name in STAGING_TABLES
+            ))
+
+        # Generation continues while the previous batch is being copied
+        run_pipelined(produce(), load)
+
+        # Staging no longer matches the raw file manifest
+        with conn.cursor() as cur:
+            fill_row_hashes(cur)
+            cur.execute("DELETE FROM staging.load_manifest")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return {
+        "records": records,
+        "referential_integrity": merge_integrity_reports(integrity_reports)
+    }
+
+
+# ---------------------------------
+# MAIN EXECUTION
+# ---------------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic e-commerce CSV files"
     )
-    products_df.to_csv(
-        f"{RAW_DATA_PATH}/products.csv", index=False
+    parser.add_argument(
+        "--shards", type=int, default=None,
+        help="Split every entity into N ID ranges written as part files"
     )
-    transactions_df.to_csv(
-        f"{RAW_DATA_PATH}/transactions.csv", index=False
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Processes used to generate shards in parallel"
     )
-    items_df.to_csv(
-        f"{RAW_DATA_PATH}/transaction_items.csv", index=False
+    parser.add_argument(
+        "--seed", type=int, default=None,
+        help="Base seed; identical seed, shards and batch size give "
+             "identical files"
     )
+    parser.add_argument(
+        "--batch-size", type=int,
+        default=config["data_generation"].get("batch_size"),
+        help="Rows generated and appended per batch (0 = whole shard)"
+    )
+    parser.add_argument(
+        "--load-staging", action="store_true",
+        help="Stream batches straight into the staging tables via COPY "
+             "instead of writing CSV files (single process)"
+    )
+    parser.add_argument(
+        "--tee-csv", action="store_true",
+        help="With --load-staging, also write the CSV files for audit"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Record the seed actually used so any run can be reproduced
+    seed = args.seed
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % (2 ** 63))
+
+    started = time.perf_counter()
+    if args.load_staging:
+        result = stream_to_staging(
+            args.shards, seed, args.batch_size or None, args.tee_csv
+        )
+    else:
+        result = generate_dataset(
+            args.shards, args.workers, seed, args.batch_size or None
+        )
+    duration = time.perf_counter() - started
+    total_rows = sum(result["records"].values())
 
     # Save metadata JSON
     metadata = {
         "generation_timestamp": datetime.utcnow().isoformat(),
-        "records": {
-            "customers": len(customers_df),
-            "products": len(products_df),
-            "transactions": len(transactions_df),
-            "transaction_items": len(items_df)
-        },
-        "referential_integrity": integrity_report
+        "seed": seed,
+        "mode": "staging" if args.load_staging else "csv",
+        "num_shards": args.shards or 1,
+        "workers": 1 if args.load_staging else args.workers,
+        "batch_size": args.batch_size or None,
+        "duration_seconds": round(duration, 3),
+        "rows_per_sec": round(total_rows / duration) if duration else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "records": result["records"],
+        "referential_integrity": result["referential_integrity"],
+        "shards": result.get("shards", [])
     }
 
     with open(
@@ -264,3 +960,7 @@ if __name__ == "__main__":
 
     print("Data generation completed successfully")
     print(json.dumps(metadata, indent=2))
+
+
+if __name__ == "__main__":
+    main()
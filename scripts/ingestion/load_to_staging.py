@@ -1,10 +1,33 @@
 import psycopg2
-import pandas as pd
+import psycopg2.pool
+import argparse
+import csv
+import glob
+import hashlib
+import io
 import json
 import os
+import queue
+import re
+import sys
+import threading
+import time
+import yaml
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from scripts.orchestration.logger import get_logger  # noqa: E402
+from scripts.orchestration.metrics import (  # noqa: E402
+    StepMetrics,
+    log_metrics,
+    peak_rss_mb
+)
+from scripts.orchestration.statements import statement_cursor  # noqa: E402
+
 # ---------------------------------
 # LOAD ENVIRONMENT VARIABLES
 # ---------------------------------
@@ -18,87 +41,716 @@ DB_CONFIG = {
     "password": os.getenv("DB_PASSWORD")
 }
 
+CONFIG_PATH = "config/config.yaml"
 RAW_DATA_PATH = "data/raw"
 SUMMARY_PATH = "docs/ingestion_summary.json"
+STAGING_DDL_PATH = "sql/ddl/create_staging_schema.sql"
+
+logger = get_logger("INGESTION")
+
+# Staging tables that carry a content hash of their loaded columns,
+# compared against production to skip unchanged rows
+HASHED_TABLES = ["staging.customers", "staging.products"]
+
+# Columns computed in staging rather than loaded from the raw files
+DERIVED_COLUMNS = {"row_hash"}
+
+# Raw entity -> staging table, in load order
+STAGING_TABLES = [
+    ("customers", "staging.customers"),
+    ("products", "staging.products"),
+    ("transactions", "staging.transactions"),
+    ("transaction_items", "staging.transaction_items"),
+]
 
 
 # ---------------------------------
 # DATABASE CONNECTION
 # ---------------------------------
 def get_connection():
-    return psycopg2.connect(**DB_CONFIG)
+    return psycopg2.connect(**DB_CONFIG, cursor_factory=statement_cursor())
+
+
+def get_connection_pool(max_connections):
+    return psycopg2.pool.ThreadedConnectionPool(
+        1, max_connections, cursor_factory=statement_cursor(), **DB_CONFIG
+    )
+
+
+def load_config():
+    with open(CONFIG_PATH) as f:
+        return yaml.safe_load(f)
+
+
+# ---------------------------------
+# RAW FILE DISCOVERY
+# ---------------------------------
+def raw_files(entity):
+    # Single-file output (customers.csv) or sharded parts (customers-00000.csv)
+    files = sorted(glob.glob(f"{RAW_DATA_PATH}/{entity}-*.csv"))
+    single_file = f"{RAW_DATA_PATH}/{entity}.csv"
+
+    if os.path.exists(single_file):
+        files.insert(0, single_file)
+
+    return files
+
+
+# ---------------------------------
+# STAGING TABLE DEFINITIONS
+# ---------------------------------
+def load_staging_columns(ddl_path=STAGING_DDL_PATH):
+    # {"staging.customers": [column, ...]} parsed from the staging DDL.
+    # Columns with a DEFAULT (loaded_at) are filled by the database and
+    # derived columns (row_hash) are computed at publish.
+    with open(ddl_path) as f:
+        ddl = f.read()
+
+    tables = {}
+    for table_name, body in re.findall(
+        r"CREATE TABLE IF NOT EXISTS\s+(staging\.\w+)\s*\((.*?)\);",
+        ddl,
+        flags=re.S
+    ):
+        tables[table_name] = [
+            line.split()[0]
+            for line in (row.strip() for row in body.splitlines())
+            if line
+            and not line.startswith("--")
+            and " DEFAULT " not in f" {line.upper()} "
+            and line.split()[0] not in DERIVED_COLUMNS
+        ]
+
+    return tables
 
 
 # ---------------------------------
 # BULK LOAD FUNCTION
 # ---------------------------------
-def load_csv_to_table(conn, csv_file, table_name):
-    df = pd.read_csv(csv_file)
+def read_csv_chunks(f, batch_size):
+    # Group raw lines into batch_size-record chunks without parsing
+    # fields. A record continues onto the next line while it has seen an
+    # odd number of quote characters (newline inside a quoted field).
+    lines = []
+    records = 0
+    in_quotes = False
+
+    for line in f:
+        lines.append(line)
+        if line.count('"') % 2:
+            in_quotes = not in_quotes
+
+        if not in_quotes:
+            records += 1
+            if records == batch_size:
+                yield "".join(lines)
+                lines = []
+                records = 0
+
+    if lines:
+        yield "".join(lines)
+
+
+def row_hash_expression(columns):
+    # The row text quotes values and marks NULLs, so different column
+    # splits of the same characters never hash alike
+    return f"md5(ROW({', '.join(columns)})::text)"
+
 
-    cols = ",".join(df.columns)
-    placeholders = ",".join(["%s"] * len(df.columns))
-    insert_query = f"""
-        INSERT INTO {table_name} ({cols})
-        VALUES ({placeholders})
-    """
+def fill_row_hashes(cur):
+    # For rows that bypassed publish (the fused generate-and-load mode)
+    columns = load_staging_columns()
+    for table_name in HASHED_TABLES:
+        cur.execute(
+            f"UPDATE {table_name} "
+            f"SET row_hash = {row_hash_expression(columns[table_name])} "
+            "WHERE row_hash IS NULL"
+        )
+
+
+def load_csv_to_table(
+    conn,
+    csv_file,
+    table_name,
+    target_table=None,
+    batch_size=None,
+    start_offset=0,
+    metrics=None
+):
+    # Stream the file through COPY without building a DataFrame.
+    # Columns are mapped by the CSV header and, as with the previous
+    # pandas loader, empty fields load as NULL. Rows go to target_table
+    # (e.g. a shadow table) when given, validated against table_name.
+    # start_offset (bytes) skips rows already loaded from an append-only
+    # file. Bytes read and parse/send time are added to metrics.
+    #
+    # With batch_size the file is read in batch_size-record chunks on
+    # this thread while a second thread sends the previous chunk, so
+    # parsing overlaps network I/O and memory is bounded by the queue.
+    table_columns = load_staging_columns().get(table_name)
+    target_table = target_table or table_name
+
+    with open(csv_file, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8")]))
+
+        if table_columns is not None:
+            unknown = [c for c in header if c not in table_columns]
+            if unknown:
+                raise ValueError(
+                    f"{csv_file} has columns not in {table_name}: {unknown}"
+                )
+
+        if start_offset:
+            f.seek(start_offset)
+
+        metrics = metrics or StepMetrics(table_name)
+        metrics.bytes_read += os.fstat(f.fileno()).st_size - f.tell()
+
+        copy_sql = (
+            f"COPY {target_table} ({','.join(header)}) "
+            "FROM STDIN WITH (FORMAT csv)"
+        )
+
+        # A single COPY parses server-side, so it is all send time
+        if not batch_size:
+            with metrics.phase("send"), conn.cursor() as cur:
+                cur.copy_expert(copy_sql, f)
+                return cur.rowcount
+
+        rows_loaded = 0
+
+        def send(chunk):
+            nonlocal rows_loaded
+            with metrics.phase("send"), conn.cursor() as cur:
+                cur.copy_expert(copy_sql, io.StringIO(chunk))
+                rows_loaded += cur.rowcount
+
+        text = io.TextIOWrapper(f, encoding="utf-8", newline="")
+        run_pipelined(
+            metrics.timed_iter(read_csv_chunks(text, batch_size), "parse"),
+            send
+        )
+        return rows_loaded
+
+
+def copy_dataframe_to_table(conn, df, table_name, columns):
+    # Stream an in-memory batch through COPY; empty fields load as NULL
+    columns = [c for c in columns if c in df.columns]
+
+    buffer = io.StringIO()
+    df.to_csv(buffer, columns=columns, index=False, header=False)
+    buffer.seek(0)
 
     with conn.cursor() as cur:
-        cur.executemany(insert_query, df.values.tolist())
+        cur.copy_expert(
+            f"COPY {table_name} ({','.join(columns)}) "
+            "FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+
+
+# ---------------------------------
+# PIPELINED EXECUTION
+# ---------------------------------
+_END_OF_STREAM = object()
+
+
+def run_pipelined(items, consume, queue_size=4):
+    # Consume items on a background thread while the caller keeps
+    # producing them; the bounded queue caps how far production runs ahead
+    work = queue.Queue(maxsize=queue_size)
+    errors = []
+
+    def worker():
+        while True:
+            item = work.get()
+            if item is _END_OF_STREAM:
+                return
+            if errors:
+                continue  # drain so the producer never blocks
+            try:
+                consume(item)
+            except Exception as e:
+                errors.append(e)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+
+    try:
+        for item in items:
+            if errors:
+                break
+            work.put(item)
+    finally:
+        work.put(_END_OF_STREAM)
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+
+# ---------------------------------
+# INCREMENTAL MANIFEST
+# ---------------------------------
+def fetch_manifest(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT file_name, table_name, checksum, file_size,
+                   file_mtime, row_count
+            FROM staging.load_manifest
+        """)
+        columns = [c[0] for c in cur.description]
+        return {row[0]: dict(zip(columns, row)) for row in cur.fetchall()}
+
+
+def file_checksums(path, prefix_size=None):
+    # SHA-256 of the whole file and, in the same pass, of its first
+    # prefix_size bytes (to recognise a file that was only appended to)
+    full = hashlib.sha256()
+    prefix = None
+    read = 0
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            if prefix_size is not None and prefix is None:
+                if read + len(block) >= prefix_size:
+                    head = full.copy()
+                    head.update(block[:prefix_size - read])
+                    prefix = head.hexdigest()
+            full.update(block)
+            read += len(block)
+
+    if prefix_size == 0:
+        prefix = hashlib.sha256().hexdigest()
+
+    return full.hexdigest(), prefix
+
+
+def plan_table_load(table_name, files, manifest, append_only, full_refresh):
+    # Decide what to load for one table:
+    #   skip    - every file matches the manifest
+    #   append  - only new files and new tails of append-only files
+    #   replace - something changed or disappeared: reload all files
+    recorded = {
+        name: entry for name, entry in manifest.items()
+        if entry["table_name"] == table_name
+    }
+    file_loads = []
+    # No manifest entries: whatever staging holds was loaded without one
+    # (the baseline loader, the fused generate-and-load mode), so the
+    # table is reloaded rather than appended to
+    replace = full_refresh or not recorded
+
+    for path in files:
+        name = os.path.basename(path)
+        stat = os.stat(path)
+        mtime = datetime.utcfromtimestamp(stat.st_mtime)
+        entry = recorded.pop(name, None)
+
+        load = {
+            "path": path,
+            "file_name": name,
+            "file_size": stat.st_size,
+            "file_mtime": mtime,
+            "offset": 0,
+            "prior_rows": 0
+        }
+
+        # Same size and mtime: trust the manifest without re-hashing
+        if (
+            entry is not None
+            and entry["file_size"] == stat.st_size
+            and entry["file_mtime"] == mtime
+        ):
+            load["checksum"] = entry["checksum"]
+            load["action"] = "skip"
+            file_loads.append(load)
+            continue
+
+        can_append = (
+            entry is not None
+            and append_only
+            and stat.st_size > entry["file_size"]
+        )
+        checksum, prefix = file_checksums(
+            path, entry["file_size"] if can_append else None
+        )
+        load["checksum"] = checksum
+
+        if entry is None:
+            load["action"] = "load"
+        elif checksum == entry["checksum"]:
+            load["action"] = "skip"  # touched but identical
+        elif can_append and prefix == entry["checksum"]:
+            load["action"] = "append"
+            load["offset"] = entry["file_size"]
+            load["prior_rows"] = entry["row_count"]
+        else:
+            replace = True
+            load["action"] = "load"
+
+        file_loads.append(load)
+
+    # A file that disappeared leaves rows in staging with no source
+    if recorded:
+        replace = True
+
+    if replace:
+        for load in file_loads:
+            load.update(action="load", offset=0, prior_rows=0)
+        mode = "replace"
+    elif any(load["action"] != "skip" for load in file_loads):
+        mode = "append"
+    else:
+        mode = "skip"
+
+    return {"mode": mode, "files": file_loads}
+
+
+def record_manifest(cur, table_name, plan):
+    if plan["mode"] == "replace":
+        cur.execute(
+            "DELETE FROM staging.load_manifest WHERE table_name = %s",
+            (table_name,)
+        )
+
+    for load in plan["files"]:
+        if load["action"] == "skip":
+            continue
+
+        cur.execute("""
+            INSERT INTO staging.load_manifest (
+                file_name, table_name, checksum, file_size,
+                file_mtime, row_count, loaded_at
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (file_name) DO UPDATE SET
+                table_name = EXCLUDED.table_name,
+                checksum = EXCLUDED.checksum,
+                file_size = EXCLUDED.file_size,
+                file_mtime = EXCLUDED.file_mtime,
+                row_count = EXCLUDED.row_count,
+                loaded_at = EXCLUDED.loaded_at
+        """, (
+            load["file_name"],
+            table_name,
+            load["checksum"],
+            load["file_size"],
+            load["file_mtime"],
+            load["prior_rows"] + load["rows"]
+        ))
+
+
+# ---------------------------------
+# UNLOGGED STAGING
+# ---------------------------------
+def set_staging_persistence(conn, table_names, unlogged):
+    # Staging is rebuildable from data/raw, so it can skip WAL entirely.
+    # The manifest stays logged: after a crash it still describes what
+    # was loaded while the unlogged tables come back empty.
+    persistence = "u" if unlogged else "p"
+    changed = []
+
+    with conn.cursor() as cur:
+        for table_name in table_names:
+            cur.execute(
+                "SELECT relpersistence FROM pg_class "
+                "WHERE oid = %s::regclass",
+                (table_name,)
+            )
+            if cur.fetchone()[0] != persistence:
+                cur.execute(
+                    f"ALTER TABLE {table_name} "
+                    f"SET {'UNLOGGED' if unlogged else 'LOGGED'}"
+                )
+                changed.append(table_name)
+
+    return changed
+
+
+def lost_unlogged_tables(conn, manifest):
+    # Crash recovery truncates unlogged tables; any such table that is
+    # empty although the manifest recorded rows must be reloaded in full
+    expected = {}
+    for entry in manifest.values():
+        expected[entry["table_name"]] = (
+            expected.get(entry["table_name"], 0) + entry["row_count"]
+        )
+
+    lost = []
+    with conn.cursor() as cur:
+        for table_name, rows in expected.items():
+            cur.execute(
+                "SELECT relpersistence FROM pg_class "
+                "WHERE oid = %s::regclass",
+                (table_name,)
+            )
+            if rows == 0 or cur.fetchone()[0] != "u":
+                continue
+
+            cur.execute(f"SELECT EXISTS (SELECT 1 FROM {table_name})")
+            if not cur.fetchone()[0]:
+                lost.append(table_name)
+
+    return lost
+
+
+# ---------------------------------
+# LOAD-THEN-PUBLISH
+# ---------------------------------
+def shadow_table(table_name):
+    return f"{table_name}_incoming"
+
+
+def table_batch_size(pipeline_config, table_name):
+    # Per-table override, else the pipeline-wide batch_size
+    overrides = pipeline_config.get("table_batch_sizes") or {}
+    return overrides.get(table_name, pipeline_config.get("batch_size"))
+
+
+def load_table_to_shadow(
+    pool, table_name, plan, run_started, batch_size=None
+):
+    # Runs on its own pooled connection and commits only the shadow
+    # table; nothing is visible in staging until publish_shadow_tables
+    metrics = StepMetrics(table_name)
+    shadow = shadow_table(table_name)
+    conn = pool.getconn()
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {shadow}")
+            cur.execute(
+                f"CREATE UNLOGGED TABLE {shadow} "
+                f"(LIKE {table_name} INCLUDING DEFAULTS)"
+            )
+
+        for load in plan["files"]:
+            load["rows"] = 0
+            if load["action"] != "skip":
+                load["rows"] = load_csv_to_table(
+                    conn, load["path"], table_name, shadow,
+                    batch_size, load["offset"], metrics
+                )
+        conn.commit()
+
+    except Exception:
+        conn.rollback()
+        raise
+
+    finally:
+        pool.putconn(conn)
+
+    metrics.finish()
+    metrics.rows = sum(load["rows"] for load in plan["files"])
+
+    return {
+        "mode": plan["mode"],
+        "files": len(plan["files"]),
+        "files_skipped": sum(
+            load["action"] == "skip" for load in plan["files"]
+        ),
+        "batch_size": batch_size,
+        **metrics.as_dict(),
+        "started_at_sec": round(metrics.started - run_started, 3),
+        "finished_at_sec": round(metrics.finished - run_started, 3)
+    }
+
+
+def publish_shadow_tables(conn, plans):
+    # Single transaction: either every table (and its manifest entries)
+    # is published or none is
+    staging_columns = load_staging_columns()
+
+    with conn.cursor() as cur:
+        for table_name, plan in plans.items():
+            if plan["mode"] == "replace":
+                cur.execute(f"TRUNCATE TABLE {table_name}")
+
+            # Row hashes are computed on the way in, not in a second pass
+            columns = staging_columns[table_name] + ["loaded_at"]
+            values = list(columns)
+            if table_name in HASHED_TABLES:
+                columns.append("row_hash")
+                values.append(
+                    row_hash_expression(staging_columns[table_name])
+                )
+
+            cur.execute(
+                f"INSERT INTO {table_name} ({', '.join(columns)}) "
+                f"SELECT {', '.join(values)} "
+                f"FROM {shadow_table(table_name)}"
+            )
+            cur.execute(f"DROP TABLE {shadow_table(table_name)}")
+
+            record_manifest(cur, table_name, plan)
+
+
+def drop_shadow_tables(conn, table_names):
+    with conn.cursor() as cur:
+        for table_name in table_names:
+            cur.execute(f"DROP TABLE IF EXISTS {shadow_table(table_name)}")
+    conn.commit()
 
 
 # ---------------------------------
 # MAIN INGESTION LOGIC
 # ---------------------------------
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Load raw CSV files into the staging schema"
+    )
+    parser.add_argument(
+        "--full-refresh", action="store_true",
+        help="Ignore the load manifest and reload every staging table"
+    )
+    parser.add_argument(
+        "--unlogged", action="store_true", default=None,
+        help="Keep staging tables UNLOGGED (no WAL); overrides "
+             "pipeline.unlogged_staging"
+    )
+    parser.add_argument(
+        "--logged", dest="unlogged", action="store_false",
+        help="Switch staging tables back to regular logged tables"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    full_refresh = args.full_refresh
+
     start_time = datetime.utcnow()
+    run_started = time.perf_counter()
     summary = {
         "start_time": start_time.isoformat(),
         "tables_loaded": {},
+        "table_metrics": {},
         "status": "SUCCESS"
     }
 
-    conn = get_connection()
-    conn.autocommit = False  # IMPORTANT
+    config = load_config()
+    workers = config["pipeline"].get("ingest_workers", 1)
+    append_only = set(config["pipeline"].get("append_only_tables") or [])
+    table_names = [table_name for _, table_name in STAGING_TABLES]
+
+    unlogged = args.unlogged
+    if unlogged is None:
+        unlogged = config["pipeline"].get("unlogged_staging", False)
+    summary["staging_persistence"] = "unlogged" if unlogged else "logged"
+
+    # One extra connection for planning and the publish step
+    pool = get_connection_pool(workers + 1)
 
     try:
-        load_csv_to_table(
-            conn,
-            f"{RAW_DATA_PATH}/customers.csv",
-            "staging.customers"
-        )
-        summary["tables_loaded"]["staging.customers"] = "customers.csv"
+        conn = pool.getconn()
+        try:
+            manifest = fetch_manifest(conn)
+            lost = lost_unlogged_tables(conn, manifest)
+            summary["persistence_changed"] = set_staging_persistence(
+                conn, table_names, unlogged
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn)
 
-        load_csv_to_table(
-            conn,
-            f"{RAW_DATA_PATH}/products.csv",
-            "staging.products"
-        )
-        summary["tables_loaded"]["staging.products"] = "products.csv"
+        if lost:
+            summary["recovered_tables"] = lost
 
-        load_csv_to_table(
-            conn,
-            f"{RAW_DATA_PATH}/transactions.csv",
-            "staging.transactions"
-        )
-        summary["tables_loaded"]["staging.transactions"] = "transactions.csv"
+        plans = {}
+        for entity, table_name in STAGING_TABLES:
+            files = raw_files(entity)
+            if not files:
+                raise FileNotFoundError(
+                    f"No raw files found for {entity} in {RAW_DATA_PATH}"
+                )
+            plans[table_name] = plan_table_load(
+                table_name, files, manifest,
+                table_name in append_only,
+                full_refresh or table_name in lost
+            )
+
+        # Unchanged tables are skipped entirely
+        for table_name, plan in plans.items():
+            if plan["mode"] == "skip":
+                summary["table_metrics"][table_name] = {
+                    "mode": "skip", "files": len(plan["files"]), "rows": 0
+                }
+        plans = {
+            table_name: plan for table_name, plan in plans.items()
+            if plan["mode"] != "skip"
+        }
+
+        # Load every remaining table concurrently into a shadow table
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                table_name: executor.submit(
+                    load_table_to_shadow,
+                    pool, table_name, plan, run_started,
+                    table_batch_size(config["pipeline"], table_name)
+                )
+                for table_name, plan in plans.items()
+            }
+            for table_name, future in futures.items():
+                summary["table_metrics"][table_name] = future.result()
+                log_metrics(
+                    logger, table_name, summary["table_metrics"][table_name]
+                )
+
+        publish_started = time.perf_counter()
+        conn = pool.getconn()
+        try:
+            publish_shadow_tables(conn, plans)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn)
 
-        load_csv_to_table(
-            conn,
-            f"{RAW_DATA_PATH}/transaction_items.csv",
-            "staging.transaction_items"
+        summary["publish_duration_sec"] = round(
+            time.perf_counter() - publish_started, 3
         )
-        summary["tables_loaded"]["staging.transaction_items"] = "transaction_items.csv"
+        log_metrics(logger, "staging.publish", {
+            "duration_sec": summary["publish_duration_sec"]
+        })
 
-        conn.commit()
+        for table_name, plan in plans.items():
+            file_names = [
+                load["file_name"] for load in plan["files"]
+                if load["action"] != "skip"
+            ]
+            summary["tables_loaded"][table_name] = (
+                file_names[0] if len(file_names) == 1 else file_names
+            )
 
     except Exception as e:
-        conn.rollback()
         summary["status"] = "FAILED"
         summary["error"] = str(e)
 
+        conn = pool.getconn()
+        try:
+            drop_shadow_tables(conn, table_names)
+        finally:
+            pool.putconn(conn)
+
     finally:
-        conn.close()
+        pool.closeall()
         summary["end_time"] = datetime.utcnow().isoformat()
+        summary["duration_sec"] = round(time.perf_counter() - run_started, 3)
+        summary["rows_loaded"] = sum(
+            m["rows"] for m in summary["table_metrics"].values()
+        )
+        summary["peak_rss_mb"] = peak_rss_mb()
+        log_metrics(logger, "ingestion", {
+            "status": summary["status"],
+            "rows": summary["rows_loaded"],
+            "duration_sec": summary["duration_sec"],
+            "peak_rss_mb": summary["peak_rss_mb"]
+        })
 
         with open(SUMMARY_PATH, "w") as f:
             json.dump(summary, f, indent=4)
@@ -0,0 +1,496 @@
+import psycopg2
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from scripts.orchestration.logger import get_logger  # noqa: E402
+from scripts.orchestration.metrics import log_metrics  # noqa: E402
+from scripts.orchestration.migrations import (  # noqa: E402
+    apply_migrations,
+    next_migration_path
+)
+from scripts.orchestration.statements import (  # noqa: E402
+    EXPLAINABLE,
+    STATEMENT_LOG_ENV
+)
+
+load_dotenv()
+
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST"),
+    "port": os.getenv("DB_PORT"),
+    "dbname": os.getenv("DB_NAME"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD")
+}
+
+logger = get_logger("MONITORING")
+
+STATEMENT_LOG_PATH = "logs/statements.jsonl"
+REPORT_PATH = "docs/index_advisor_report.json"
+
+# Setup later statements depend on (temp tables and their statistics,
+# work tables created LIKE another); run for real inside the advisor's
+# transaction, which is rolled back at the end
+SESSION_SETUP = re.compile(
+    r"^CREATE\s+TEMP\w*\s+TABLE\b"
+    r"|^CREATE\s+(UNLOGGED\s+)?TABLE\s+[\w.]+\s*\(LIKE\b"
+    r"|^ANALYZE\s+\w+$",
+    re.I
+)
+
+JOIN_NODES = {"Hash Join", "Merge Join", "Nested Loop"}
+SYSTEM_SCHEMAS = ("pg_catalog", "information_schema", "pg_temp", "pg_toast")
+
+# A column compared as it is, possibly cast, on either side of the
+# operator: "(t.payment_method)::text = ..." qualifies,
+# "abs((ti.line_total - ...))" does not
+OPERATOR = r"(?:=|<>|<=|>=|<|>|~~)"
+COMPARED_AFTER = (
+    rf"\)?(?:::[\w ]+(?:\[\])?)?\)?\s*(?:{OPERATOR}|IS\b|BETWEEN\b)"
+)
+COMPARED_BEFORE = rf"{OPERATOR}\s*\(*$"
+
+
+def get_connection():
+    return psycopg2.connect(**DB_CONFIG)
+
+
+# ---------------------------------
+# STATEMENTS
+# ---------------------------------
+def load_statements(path):
+    # Distinct statements in first-seen order across the recorded scripts
+    statements = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                statements.setdefault(entry["statement"], entry)
+    return list(statements.values())
+
+
+def run_isolated(cur, sql):
+    # A savepoint keeps a statement that fails here (e.g. it reads a work
+    # table another run dropped) from aborting the rest
+    cur.execute("SAVEPOINT advisor")
+    try:
+        cur.execute(sql)
+        result = cur.fetchall() if cur.description else None
+    except psycopg2.Error:
+        cur.execute("ROLLBACK TO SAVEPOINT advisor")
+        raise
+    cur.execute("RELEASE SAVEPOINT advisor")
+    return result
+
+
+def explain(cur, sql):
+    # Plan of one statement without running it
+    rows = run_isolated(cur, f"EXPLAIN (VERBOSE, FORMAT JSON) {sql}")
+    return rows[0][0][0]["Plan"]
+
+
+# ---------------------------------
+# PLAN ANALYSIS
+# ---------------------------------
+def lookup_sides(plan):
+    # {child: rows an index on that side would read} for the children of
+    # a join that could be driven by lookups into them. Either side of
+    # an inner or semi join reads the join's rows; the nullable side of
+    # an outer or anti join is probed once per row of the other side.
+    outer, inner = plan["Plans"][0], plan["Plans"][-1]
+    join_type = plan.get("Join Type", "Inner")
+    if join_type in ("Inner", "Semi"):
+        return {id(outer): plan["Plan Rows"], id(inner): plan["Plan Rows"]}
+    if join_type in ("Left", "Anti"):
+        return {id(inner): outer["Plan Rows"]}
+    if join_type in ("Right", "Right Anti", "Right Semi"):
+        return {id(outer): inner["Plan Rows"]}
+    return {}
+
+
+def join_conditions(plan):
+    # The join keys, or the join filter of joins without keys
+    for key in ["Hash Cond", "Merge Cond", "Join Filter"]:
+        if key in plan:
+            return [plan[key]]
+    return []
+
+
+def seq_scans(plan, joins=()):
+    # (scan node, enclosing joins) for every sequential scan in the
+    # plan. Each join is (conditions, rows lookups on the scan's side
+    # would read, or None when that side cannot be looked up), nearest
+    # last.
+    if plan["Node Type"] == "Seq Scan":
+        yield plan, joins
+
+    sides = lookup_sides(plan) if plan["Node Type"] in JOIN_NODES else None
+    for child in plan.get("Plans", []):
+        child_joins = joins
+        if sides is not None:
+            child_joins = (
+                *joins, (join_conditions(plan), sides.get(id(child)))
+            )
+        yield from seq_scans(child, child_joins)
+
+
+def nearest_join(alias, joins):
+    # The innermost join whose conditions refer to the scan
+    for conditions, lookup_rows in reversed(joins):
+        if referenced_columns(alias, conditions):
+            return conditions, lookup_rows
+    return [], None
+
+
+def referenced_columns(alias, expressions, compared=True):
+    # Columns of one scan referenced in EXPLAIN VERBOSE expressions, in
+    # order of appearance; with compared, only those compared as they
+    # are. Partition scans are aliased "ti_1", "ti_2"... while conditions
+    # above the Append refer to "ti".
+    aliases = {alias, re.sub(r"_\d+$", "", alias)}
+    pattern = re.compile(
+        r"(?<![\w.])(?:" + "|".join(map(re.escape, aliases)) + r")\.(\w+)"
+    )
+    columns = []
+    for expression in expressions:
+        for match in pattern.finditer(expression):
+            if compared and not (
+                re.match(COMPARED_AFTER, expression[match.end():])
+                or re.search(COMPARED_BEFORE, expression[:match.start()])
+            ):
+                continue
+            if match.group(1) not in columns:
+                columns.append(match.group(1))
+    return columns
+
+
+def relation_info(cur, schema, relation, cache):
+    # A scanned partition is reported on its parent, where indexes are
+    # created; scan_rows are the rows of the scanned relation itself
+    key = f"{schema}.{relation}"
+    if key in cache:
+        return cache[key]
+
+    cur.execute("""
+        SELECT
+            COALESCE(p.inhparent, c.oid)::regclass::text,
+            GREATEST(c.reltuples, 0)
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        LEFT JOIN pg_inherits p ON p.inhrelid = c.oid
+        WHERE n.nspname = %s AND c.relname = %s
+    """, (schema, relation))
+    table, scan_rows = cur.fetchone()
+
+    cur.execute("""
+        SELECT SUM(GREATEST(c.reltuples, 0))
+        FROM pg_class c
+        WHERE c.oid = %(table)s::regclass
+           OR c.oid IN (
+               SELECT inhrelid FROM pg_inherits
+               WHERE inhparent = %(table)s::regclass
+           )
+    """, {"table": table})
+    rows = int(cur.fetchone()[0] or 0)
+
+    cur.execute("""
+        SELECT attname, format_type(atttypid, atttypmod)
+        FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+    """, (table,))
+    types = dict(cur.fetchall())
+
+    # (name, first key column, predicate) of the existing indexes
+    cur.execute("""
+        SELECT
+            i.indexrelid::regclass::text,
+            a.attname,
+            pg_get_expr(i.indpred, i.indrelid)
+        FROM pg_index i
+        LEFT JOIN pg_attribute a
+            ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+        WHERE i.indrelid = %s::regclass
+    """, (table,))
+    indexes = cur.fetchall()
+
+    cache[key] = {
+        "table": table, "rows": rows, "scan_rows": int(scan_rows),
+        "types": types, "indexes": indexes
+    }
+    return cache[key]
+
+
+def propose_index(scan, conditions, info):
+    # Join columns of the scan first, then the columns its own filter
+    # compares; boolean columns the filter tests become the predicate of
+    # a partial index
+    alias = scan.get("Alias", scan["Relation Name"])
+    filters = [scan["Filter"]] if "Filter" in scan else []
+    join_columns = referenced_columns(alias, conditions)
+    filter_columns = referenced_columns(alias, filters)
+
+    booleans = [
+        column for column in referenced_columns(alias, filters, False)
+        if info["types"].get(column) == "boolean"
+    ]
+    columns = [
+        column for column in join_columns + filter_columns
+        if column in info["types"] and column not in booleans
+    ]
+    columns = list(dict.fromkeys(columns))[:3]
+    if not columns:
+        return None
+
+    predicate = None
+    if booleans:
+        column = booleans[0]
+        negated = re.search(rf"NOT \(?\w+\.{column}\b", filters[0])
+        predicate = f"NOT {column}" if negated else column
+
+    return {"columns": columns, "predicate": predicate}
+
+
+def covering_index(info, proposal):
+    # An index leading with the same column, unrestricted or restricted
+    # to the same rows, already serves the lookup
+    for name, first_column, predicate in info["indexes"]:
+        if first_column != proposal["columns"][0]:
+            continue
+        if predicate is None or predicate.strip("()") == proposal["predicate"]:
+            return name
+    return None
+
+
+def is_unique(cur, table, proposal):
+    # Only partial indexes are proposed as unique (one current version
+    # per business key); a full-table uniqueness that merely holds today
+    # is not a constraint the loads promise
+    if not proposal["predicate"]:
+        return False
+
+    columns = ", ".join(proposal["columns"])
+    cur.execute(f"""
+        SELECT COUNT(*) = COUNT(DISTINCT ({columns}))
+        FROM {table}
+        WHERE {proposal["predicate"]}
+    """)
+    return cur.fetchone()[0]
+
+
+def index_name(table, proposal):
+    parts = [table.split(".")[-1], *proposal["columns"]]
+    if proposal["predicate"]:
+        parts.append(proposal["predicate"].replace("NOT ", "not_"))
+    return ("idx_" + "_".join(parts))[:63]
+
+
+def index_ddl(proposal):
+    unique = "UNIQUE " if proposal["unique"] else ""
+    ddl = (
+        f"CREATE {unique}INDEX IF NOT EXISTS {proposal['name']}\n"
+        f"    ON {proposal['table']} ({', '.join(proposal['columns'])})"
+    )
+    if proposal["predicate"]:
+        ddl += f" WHERE {proposal['predicate']}"
+    return ddl + ";"
+
+
+# ---------------------------------
+# ADVISOR
+# ---------------------------------
+def advise(cur, statements, min_rows, max_fraction):
+    # Returns (findings, proposals, errors). A finding is a sequential
+    # scan of a table of at least min_rows rows where at most
+    # max_fraction of its rows survive the scan's filter or the join
+    # above it: the shape an index lookup serves better.
+    findings = {}
+    proposals = {}
+    errors = []
+    relations = {}
+
+    for entry in statements:
+        sql = entry["sql"].strip()
+        if EXPLAINABLE.match(sql):
+            try:
+                plan = explain(cur, sql)
+            except psycopg2.Error as e:
+                errors.append({
+                    "script": entry["script"],
+                    "statement": entry["statement"][:200],
+                    "error": str(e).strip().splitlines()[0]
+                })
+                plan = None
+
+            for scan, joins in seq_scans(plan) if plan else []:
+                if scan.get("Schema", "pg_temp").startswith(SYSTEM_SCHEMAS):
+                    continue
+                info = relation_info(
+                    cur, scan["Schema"], scan["Relation Name"], relations
+                )
+                if info["rows"] < min_rows or not info["scan_rows"]:
+                    continue
+
+                # Rows worth reading: those the scan's filter keeps, or
+                # those index lookups from its join would read
+                alias = scan.get("Alias", scan["Relation Name"])
+                conditions, lookup_rows = nearest_join(alias, joins)
+                kept = scan["Plan Rows"]
+                if lookup_rows is not None:
+                    kept = min(kept, lookup_rows)
+                fraction = kept / info["scan_rows"]
+                if fraction > max_fraction:
+                    continue
+
+                # Scans without join or filter columns (e.g. aggregates
+                # over the whole table) are not lookups
+                proposal = propose_index(scan, conditions, info)
+                if not proposal:
+                    continue
+
+                # One finding per statement and table; the partitions
+                # of a table are scanned alike
+                key = (
+                    entry["statement"], info["table"],
+                    tuple(proposal["columns"]), proposal["predicate"]
+                )
+                if key in findings:
+                    findings[key]["kept_fraction"] = max(
+                        findings[key]["kept_fraction"], round(fraction, 4)
+                    )
+                    continue
+                finding = {
+                    "script": entry["script"],
+                    "statement": entry["statement"][:200],
+                    "table": info["table"],
+                    "table_rows": info["rows"],
+                    "kept_fraction": round(fraction, 4),
+                    "columns": proposal["columns"],
+                    "predicate": proposal["predicate"]
+                }
+                findings[key] = finding
+
+                covered_by = covering_index(info, proposal)
+                if covered_by:
+                    finding["covered_by"] = covered_by
+                    continue
+
+                proposal["table"] = info["table"]
+                proposal["name"] = index_name(info["table"], proposal)
+                finding["proposed_index"] = proposal["name"]
+                if proposal["name"] not in proposals:
+                    proposal["unique"] = is_unique(
+                        cur, info["table"], proposal
+                    )
+                    proposal["reason"] = (
+                        f"{entry['script']}: sequential scan of "
+                        f"{info['table']} ({info['rows']} rows) keeping "
+                        f"{fraction:.2%} of them"
+                    )
+                    proposals[proposal["name"]] = proposal
+
+        if SESSION_SETUP.match(sql):
+            try:
+                run_isolated(cur, sql)
+            except psycopg2.Error:
+                pass
+
+    return list(findings.values()), list(proposals.values()), errors
+
+
+def write_migration(proposals, name="index_advisor"):
+    path = next_migration_path(name)
+    lines = [
+        "-- ============================================",
+        f"-- Proposed by scripts/monitoring/index_advisor.py on "
+        f"{datetime.utcnow():%Y-%m-%d}",
+        "-- ============================================",
+    ]
+    for proposal in proposals:
+        lines += ["", f"-- {proposal['reason']}", index_ddl(proposal)]
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="EXPLAIN the statements recorded from pipeline runs "
+                    f"(run the scripts with {STATEMENT_LOG_ENV} set to the "
+                    "log path) and propose indexes for sequential scans "
+                    "that keep few of their rows"
+    )
+    parser.add_argument("--log", default=STATEMENT_LOG_PATH)
+    parser.add_argument(
+        "--min-rows", type=int, default=10000,
+        help="Ignore tables with fewer rows"
+    )
+    parser.add_argument(
+        "--max-fraction", type=float, default=0.1,
+        help="Flag scans keeping at most this fraction of the table"
+    )
+    parser.add_argument(
+        "--write-migration", action="store_true",
+        help="Write the proposed indexes as the next file in sql/migrations"
+    )
+    parser.add_argument(
+        "--apply", action="store_true",
+        help="Apply pending migrations (including one just written)"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    statements = load_statements(args.log)
+
+    conn = get_connection()
+    report = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "statements": len(statements)
+    }
+
+    try:
+        with conn.cursor() as cur:
+            findings, proposals, errors = advise(
+                cur, statements, args.min_rows, args.max_fraction
+            )
+        # Nothing the advisor ran is kept
+        conn.rollback()
+
+        report["findings"] = findings
+        report["proposed_indexes"] = [index_ddl(p) for p in proposals]
+        report["unexplained"] = errors
+
+        if args.write_migration and proposals:
+            report["migration"] = write_migration(proposals)
+        if args.apply:
+            report["applied_migrations"] = apply_migrations(conn)
+
+    finally:
+        conn.close()
+
+    log_metrics(logger, "index_advisor", {
+        "statements": report["statements"],
+        "findings": len(report.get("findings", [])),
+        "proposed_indexes": len(report.get("proposed_indexes", []))
+    })
+
+    os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=4)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from scripts.orchestration.logger import get_logger  # noqa: E402
+from scripts.orchestration.metrics import log_metrics  # noqa: E402
+from scripts.orchestration.statements import PLAN_CAPTURE_ENV  # noqa: E402
+
+logger = get_logger("MONITORING")
+
+PLANS_DIR = "logs/plans"
+REPORT_FILE = "report.json"
+
+# ---------------------------------
+# PLAN REGRESSION REPORT
+# ---------------------------------
+# Compares the plans captured for one run (see PLAN_CAPTURE_ENV in
+# scripts/orchestration/statements.py) with the runs before it. Per
+# statement, a run is the sum of its executions; the baseline is the
+# median over the previous --baseline-runs runs that executed it.
+# Flagged: a plan shape none of those runs had, and time or buffers
+# above the ratio to the baseline (ignoring statements too small for the
+# ratio to mean anything).
+
+
+def list_runs(directory):
+    # Run ids sort by time (default ids are timestamps)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        name for name in os.listdir(directory)
+        if os.path.isdir(os.path.join(directory, name))
+    )
+
+
+def load_run(directory, run):
+    # {statement_id: totals over the executions of the run}
+    statements = {}
+    run_dir = os.path.join(directory, run)
+    for filename in sorted(os.listdir(run_dir)):
+        if not filename.endswith(".jsonl"):
+            continue
+        with open(os.path.join(run_dir, filename)) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                buffers = entry["buffers"]
+                totals = statements.setdefault(entry["statement_id"], {
+                    "script": entry["script"],
+                    "statement": entry["statement"],
+                    "executions": 0,
+                    "execution_ms": 0.0,
+                    "buffers": 0,
+                    "shapes": set()
+                })
+                totals["executions"] += 1
+                totals["execution_ms"] += entry["execution_ms"] or 0
+                totals["buffers"] += (
+                    buffers["shared_hit"] + buffers["shared_read"]
+                    + buffers["temp_read"] + buffers["temp_written"]
+                )
+                totals["shapes"].add(entry["shape"])
+    return statements
+
+
+def exceeds(current, baseline, ratio, minimum):
+    return current >= minimum and current > baseline * ratio
+
+
+def compare(current, baselines, args):
+    # [(statement_id, flags)] for the statements of the current run;
+    # baselines is a list of load_run() results, oldest first
+    flagged = []
+    for sid, totals in current.items():
+        history = [run[sid] for run in baselines if sid in run]
+        if not history:
+            flagged.append((sid, {"new_statement": True}))
+            continue
+
+        flags = {}
+        known_shapes = set().union(*(run["shapes"] for run in history))
+        new_shapes = totals["shapes"] - known_shapes
+        if new_shapes:
+            flags["plan_changed"] = {
+                "shapes": sorted(new_shapes),
+                "baseline_shapes": sorted(known_shapes)
+            }
+
+        baseline_ms = statistics.median(run["execution_ms"] for run in history)
+        if exceeds(totals["execution_ms"], baseline_ms,
+                   args.time_ratio, args.min_ms):
+            flags["slower"] = {
+                "execution_ms": round(totals["execution_ms"], 3),
+                "baseline_ms": round(baseline_ms, 3)
+            }
+
+        baseline_buffers = statistics.median(run["buffers"] for run in history)
+        if exceeds(totals["buffers"], baseline_buffers,
+                   args.buffers_ratio, args.min_buffers):
+            flags["more_buffers"] = {
+                "buffers": totals["buffers"],
+                "baseline_buffers": baseline_buffers
+            }
+
+        if flags:
+            flagged.append((sid, flags))
+    return flagged
+
+
+def build_report(directory, run, args):
+    runs = list_runs(directory)
+    if run not in runs:
+        raise ValueError(f"No captured plans for run {run} in {directory}")
+
+    previous = runs[:runs.index(run)][-args.baseline_runs:]
+    current = load_run(directory, run)
+    baselines = [load_run(directory, r) for r in previous]
+
+    statements = []
+    for sid, flags in compare(current, baselines, args):
+        totals = current[sid]
+        statements.append({
+            "statement_id": sid,
+            "script": totals["script"],
+            "statement": totals["statement"],
+            "executions": totals["executions"],
+            **flags
+        })
+
+    regressions = [
+        s for s in statements
+        if {"plan_changed", "slower", "more_buffers"} & s.keys()
+    ]
+    return {
+        "generated_at": datetime.utcnow().isoformat(),
+        "run": run,
+        "baseline_runs": previous,
+        "statements": len(current),
+        "regressions": regressions,
+        "new_statements": [
+            s for s in statements if s.get("new_statement")
+        ]
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare the query plans captured for a run (run the "
+                    f"scripts with {PLAN_CAPTURE_ENV} set to the plans "
+                    "directory) with the runs before it"
+    )
+    parser.add_argument("--dir", default=PLANS_DIR)
+    parser.add_argument(
+        "--run",
+        help="Run id to check (default: the latest captured run)"
+    )
+    parser.add_argument(
+        "--baseline-runs", type=int, default=5,
+        help="Number of previous runs the baseline is taken from"
+    )
+    parser.add_argument(
+        "--time-ratio", type=float, default=2.0,
+        help="Flag statements slower than this multiple of the baseline"
+    )
+    parser.add_argument(
+        "--buffers-ratio", type=float, default=2.0,
+        help="Flag statements touching this multiple of the baseline buffers"
+    )
+    parser.add_argument(
+        "--min-ms", type=float, default=10.0,
+        help="Ignore time increases of statements faster than this"
+    )
+    parser.add_argument(
+        "--min-buffers", type=int, default=1000,
+        help="Ignore buffer increases of statements touching fewer buffers"
+    )
+    parser.add_argument(
+        "--fail-on-regression", action="store_true",
+        help="Exit with status 1 if any regression is flagged"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    runs = list_runs(args.dir)
+    if not runs:
+        raise SystemExit(f"No captured runs in {args.dir}")
+
+    run = args.run or runs[-1]
+    report = build_report(args.dir, run, args)
+
+    log_metrics(logger, "plan_report", {
+        "run": run,
+        "baseline_runs": len(report["baseline_runs"]),
+        "statements": report["statements"],
+        "regressions": len(report["regressions"]),
+        "new_statements": len(report["new_statements"])
+    })
+
+    with open(os.path.join(args.dir, run, REPORT_FILE), "w") as f:
+        json.dump(report, f, indent=4)
+
+    print(json.dumps(report, indent=2))
+
+    if args.fail_on_regression and report["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
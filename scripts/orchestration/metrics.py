@@ -0,0 +1,97 @@
+import json
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# ---------------------------------
+# MEMORY
+# ---------------------------------
+def peak_rss_mb():
+    # Peak resident set size of this process and its finished children
+    if resource is None:
+        return None
+
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    )
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+# ---------------------------------
+# STEP TIMING
+# ---------------------------------
+class StepMetrics:
+    # Counters and phase timings for one unit of work (a table, a
+    # query). Phases accumulate, so a phase may be timed in many pieces,
+    # and different threads may time different phases.
+    def __init__(self, step, started=None):
+        self.step = step
+        self.rows = 0
+        self.bytes_read = 0
+        self.phases = defaultdict(float)
+        self.started = started or time.perf_counter()
+        self.finished = None
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - started
+
+    def timed_iter(self, items, name):
+        # Charges the time spent producing each item to a phase
+        items = iter(items)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+            yield item
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def as_dict(self):
+        elapsed = (self.finished or time.perf_counter()) - self.started
+
+        result = {"rows": self.rows}
+        if self.bytes_read:
+            result["bytes_read"] = self.bytes_read
+        for name, seconds in self.phases.items():
+            result[f"{name}_sec"] = round(seconds, 3)
+        result["duration_sec"] = round(elapsed, 3)
+        result["rows_per_sec"] = round(self.rows / elapsed) if elapsed else None
+        # Peak of the whole process so far, not of this step: steps run
+        # concurrently on threads that share one heap
+        result["process_peak_rss_mb"] = peak_rss_mb()
+        return result
+
+
+def log_metrics(logger, step, values):
+    # One JSON object per line so pipeline.log can be grepped and parsed
+    logger.info("metrics " + json.dumps({"step": step, **values}, default=str))
+
+
+@contextmanager
+def track_step(logger, results, step):
+    # Times the block, then stores the metrics in results[step] and logs
+    # them. Nothing is recorded if the block raises.
+    metrics = StepMetrics(step)
+    yield metrics
+    metrics.finish()
+
+    results[step] = metrics.as_dict()
+    log_metrics(logger, step, results[step])
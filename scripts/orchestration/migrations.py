@@ -0,0 +1,157 @@
+import psycopg2
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from scripts.orchestration.logger import get_logger  # noqa: E402
+from scripts.orchestration.metrics import log_metrics  # noqa: E402
+
+load_dotenv()
+
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST"),
+    "port": os.getenv("DB_PORT"),
+    "dbname": os.getenv("DB_NAME"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD")
+}
+
+logger = get_logger("MIGRATIONS")
+
+# ---------------------------------
+# MANAGED DDL MIGRATIONS
+# ---------------------------------
+# Changes to existing schemas after sql/ddl/*.sql ship as numbered files
+# in sql/migrations ("0001_join_key_indexes.sql"), applied in order, each
+# in its own transaction. public.schema_migrations records what ran and
+# the file checksum; editing an applied migration is an error, so a
+# change ships as a new migration instead.
+MIGRATIONS_DIR = "sql/migrations"
+MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+
+def get_connection():
+    return psycopg2.connect(**DB_CONFIG)
+
+
+def migration_files(directory=MIGRATIONS_DIR):
+    # [(version, name, path)] in version order
+    if not os.path.isdir(directory):
+        return []
+
+    files = []
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            files.append((
+                match.group(1), match.group(2),
+                os.path.join(directory, filename)
+            ))
+    return files
+
+
+def file_checksum(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def next_migration_path(name, directory=MIGRATIONS_DIR):
+    files = migration_files(directory)
+    version = int(files[-1][0]) + 1 if files else 1
+    return os.path.join(directory, f"{version:04d}_{name}.sql")
+
+
+def ensure_migrations_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS public.schema_migrations (
+            version VARCHAR(4) PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def pending_migrations(cur, directory=MIGRATIONS_DIR):
+    ensure_migrations_table(cur)
+    cur.execute("SELECT version, checksum FROM public.schema_migrations")
+    applied = dict(cur.fetchall())
+
+    pending = []
+    for version, name, path in migration_files(directory):
+        if version not in applied:
+            pending.append((version, name, path))
+        elif applied[version] != file_checksum(path):
+            raise ValueError(
+                f"Migration {path} changed after it was applied; "
+                "add a new migration instead"
+            )
+    return pending
+
+
+def apply_migrations(conn, directory=MIGRATIONS_DIR):
+    # Applies pending migrations in order and returns their versions.
+    # A failing migration is rolled back and stops the run; the ones
+    # before it stay applied.
+    with conn.cursor() as cur:
+        pending = pending_migrations(cur, directory)
+    conn.commit()
+
+    applied = []
+    for version, name, path in pending:
+        with open(path) as f:
+            ddl = f.read()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(ddl)
+                cur.execute("""
+                    INSERT INTO public.schema_migrations
+                        (version, name, checksum)
+                    VALUES (%s, %s, %s)
+                """, (version, name, file_checksum(path)))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"Migration {path} failed")
+            raise
+
+        logger.info(f"Applied migration {path}")
+        applied.append(version)
+    return applied
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=f"Apply pending DDL migrations from {MIGRATIONS_DIR}"
+    )
+    parser.add_argument(
+        "--list", action="store_true",
+        help="Only list the pending migrations"
+    )
+    args = parser.parse_args(argv)
+
+    conn = get_connection()
+    try:
+        if args.list:
+            with conn.cursor() as cur:
+                pending = pending_migrations(cur)
+            conn.commit()
+            result = {"pending": [path for _, _, path in pending]}
+        else:
+            result = {"applied": apply_migrations(conn)}
+    finally:
+        conn.close()
+
+    log_metrics(logger, "migrations", result)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,10 @@ import subprocess
 import time
 import yaml
 import os
+from datetime import datetime
 from pathlib import Path
 from logger import get_logger
+from statements import RUN_ID_ENV
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -38,7 +40,11 @@ def main():
 
     logger.info(f"Pipeline started with retries={retries}, log_level={log_level}")
 
+    # One run id for every step, so captured plans group by pipeline run
+    os.environ.setdefault(RUN_ID_ENV, datetime.utcnow().strftime("%Y%m%dT%H%M%S"))
+
     steps = [
+        ("migrations", "python scripts/orchestration/migrations.py"),
         ("data_generation", "python scripts/data_generation/generate_data.py"),
         ("ingestion", "python scripts/ingestion/load_to_staging.py"),
         ("quality_checks", "python scripts/quality_checks/validate_data.py"),
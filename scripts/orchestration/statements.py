@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import psycopg2.extensions
+
+# ---------------------------------
+# STATEMENT LOG
+# ---------------------------------
+# With PIPELINE_STATEMENT_LOG set to a file path, the connections of the
+# pipeline scripts append the first execution of each distinct statement
+# to it, one JSON object per line, with the parameters inlined as they
+# were sent. scripts/monitoring/index_advisor.py EXPLAINs what the log
+# holds. Unset, connections use the default cursor.
+STATEMENT_LOG_ENV = "PIPELINE_STATEMENT_LOG"
+
+# ---------------------------------
+# PLAN CAPTURE
+# ---------------------------------
+# With PIPELINE_PLAN_CAPTURE set to a directory, every explainable
+# statement is first run under EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)
+# inside a savepoint that is rolled back, then run for real. Plans go to
+# <directory>/<run id>/<script>.jsonl; PIPELINE_RUN_ID groups the scripts
+# of one pipeline run (default: the time the process started).
+# scripts/monitoring/plan_report.py compares a run with the ones before
+# it. Captured statements execute twice, so a capture run is slower than
+# a normal one; its plans are compared with other capture runs only.
+PLAN_CAPTURE_ENV = "PIPELINE_PLAN_CAPTURE"
+RUN_ID_ENV = "PIPELINE_RUN_ID"
+
+# Statements EXPLAIN accepts
+EXPLAINABLE = re.compile(
+    r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|VALUES)\b"
+    r"|^\s*CREATE\s+(TEMP\w*\s+|UNLOGGED\s+)?TABLE\b.*\bAS\s+(SELECT|WITH)\b",
+    re.I | re.S
+)
+
+# "fact_sales_2024_01", "fact_sales_2024_01_date_key_idx": one partition
+# stands for all of them in a plan shape
+PARTITION_SUFFIX = re.compile(r"_\d{4}_\d{2}(?=_|$)")
+
+# Literals a statement is built with (watermarks, dates, batch sizes);
+# replaced so the same statement keeps its id from run to run
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+_lock = threading.Lock()
+_recorded = set()
+_started = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+
+
+def normalize_sql(sql):
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def script_name():
+    return Path(sys.argv[0]).stem
+
+
+def run_id():
+    return os.getenv(RUN_ID_ENV) or _started
+
+
+def statement_id(statement):
+    fingerprint = PARTITION_SUFFIX.sub("_YYYY_MM", statement)
+    fingerprint = LITERAL.sub("?", fingerprint)
+    return hashlib.sha256(fingerprint.encode()).hexdigest()[:16]
+
+
+def query_text(cur, query):
+    if isinstance(query, bytes):
+        return query.decode()
+    if not isinstance(query, str):
+        # psycopg2.sql.Composed
+        return query.as_string(cur)
+    return query
+
+
+def inline_params(cur, query, params):
+    encoding = psycopg2.extensions.encodings[cur.connection.encoding]
+    return cur.mogrify(query, params).decode(encoding)
+
+
+def append_line(path, entry):
+    with _lock:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a") as f:
+            f.write(json.dumps(entry, default=str) + "\n")
+
+
+def record_statement(cur, query, params):
+    path = os.getenv(STATEMENT_LOG_ENV)
+    if not path:
+        return
+
+    query = query_text(cur, query)
+    statement = normalize_sql(query)
+
+    # Statements repeated per batch or per table are recorded once
+    with _lock:
+        if statement in _recorded:
+            return
+        _recorded.add(statement)
+
+    append_line(path, {
+        "script": script_name(),
+        "statement": statement,
+        "sql": inline_params(cur, query, params)
+    })
+
+
+def plan_shape(plan):
+    # Node types, join and aggregate strategies and the relations and
+    # indexes read, without costs or row counts. The partitions under an
+    # Append collapse into one, so a new month or a pruned partition does
+    # not change the shape.
+    label = plan["Node Type"]
+    detail = plan.get("Join Type") or plan.get("Strategy")
+    if detail:
+        label += f" ({detail})"
+    for key in ["Relation Name", "Index Name"]:
+        if key in plan:
+            label += " " + PARTITION_SUFFIX.sub("_YYYY_MM", plan[key])
+
+    children = [plan_shape(child) for child in plan.get("Plans", [])]
+    if plan["Node Type"] in ("Append", "Merge Append"):
+        children = list(dict.fromkeys(children))
+    return label + (f" [{', '.join(children)}]" if children else "")
+
+
+def plan_buffers(plan):
+    # Shared and temp blocks of the whole plan (EXPLAIN reports them
+    # cumulatively at the top node)
+    return {
+        "shared_hit": plan.get("Shared Hit Blocks", 0),
+        "shared_read": plan.get("Shared Read Blocks", 0),
+        "temp_read": plan.get("Temp Read Blocks", 0),
+        "temp_written": plan.get("Temp Written Blocks", 0)
+    }
+
+
+def capture_plan(cur, query, params):
+    directory = os.getenv(PLAN_CAPTURE_ENV)
+    if not directory:
+        return
+
+    query = query_text(cur, query)
+    statement = normalize_sql(query)
+    conn = cur.connection
+    if not EXPLAINABLE.match(statement) or (
+        conn.get_transaction_status()
+        == psycopg2.extensions.TRANSACTION_STATUS_INERROR
+    ):
+        return
+
+    # The base execute, so these statements are not captured themselves
+    run = super(RecordingCursor, cur).execute
+    sql = inline_params(cur, query, params)
+
+    run("BEGIN" if conn.autocommit else "SAVEPOINT plan_capture")
+    try:
+        run(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+        explained = cur.fetchone()[0][0]
+    except psycopg2.Error:
+        # The real execution raises the same error to the caller
+        explained = None
+    finally:
+        if conn.autocommit:
+            run("ROLLBACK")
+        else:
+            run("ROLLBACK TO SAVEPOINT plan_capture")
+            run("RELEASE SAVEPOINT plan_capture")
+
+    if explained is None:
+        return
+
+    plan = explained["Plan"]
+    append_line(os.path.join(directory, run_id(), f"{script_name()}.jsonl"), {
+        "run_id": run_id(),
+        "script": script_name(),
+        "statement_id": statement_id(statement),
+        "statement": statement,
+        "captured_at": datetime.utcnow().isoformat(),
+        "planning_ms": explained.get("Planning Time"),
+        "execution_ms": explained.get("Execution Time"),
+        "rows": plan.get("Actual Rows"),
+        "buffers": plan_buffers(plan),
+        "shape": plan_shape(plan),
+        "plan": plan
+    })
+
+
+class RecordingCursor(psycopg2.extensions.cursor):
+    def execute(self, query, vars=None):
+        record_statement(self, query, vars)
+        capture_plan(self, query, vars)
+        return super().execute(query, vars)
+
+
+def statement_cursor():
+    # cursor_factory for psycopg2.connect(): None (the default cursor)
+    # unless statements or plans are being recorded
+    if os.getenv(STATEMENT_LOG_ENV) or os.getenv(PLAN_CAPTURE_ENV):
+        return RecordingCursor
+    return None
@@ -1,9 +1,15 @@
 import psycopg2
 import json
 import os
+import sys
 from datetime import datetime
+from pathlib import Path
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from scripts.orchestration.statements import statement_cursor  # noqa: E402
+
 # ---------------------------------
 # LOAD ENVIRONMENT VARIABLES
 # ---------------------------------
@@ -24,7 +30,7 @@ REPORT_PATH = "docs/quality/quality_report.json"
 # DATABASE CONNECTION
 # ---------------------------------
 def get_connection():
-    return psycopg2.connect(**DB_CONFIG)
+    return psycopg2.connect(**DB_CONFIG, cursor_factory=statement_cursor())
 
 
 def run_scalar_query(conn, query):
@@ -0,0 +1,123 @@
+# ---------------------------------
+# AGGREGATE TABLES
+# ---------------------------------
+# The agg_* tables summarize fact_sales by date, product and customer.
+# After a full fact rebuild they are recomputed from scratch; after an
+# incremental load only the keys recorded in the fact_touched temp table
+# (facts removed or added in this transaction) are recomputed.
+
+# Aggregate -> key column and the query computing it. {filter} narrows
+# the facts read; it is empty for a full recompute.
+AGGREGATES = [
+    {
+        "table": "warehouse.agg_daily_sales",
+        "key": "date_key",
+        "query": """
+            SELECT
+                f.date_key,
+                COUNT(DISTINCT f.transaction_id),
+                SUM(f.line_total),
+                SUM(f.profit),
+                COUNT(DISTINCT f.customer_key)
+            FROM warehouse.fact_sales f
+            {filter}
+            GROUP BY f.date_key
+        """
+    },
+    {
+        "table": "warehouse.agg_product_performance",
+        "key": "product_key",
+        "query": """
+            SELECT
+                f.product_key,
+                SUM(f.quantity),
+                SUM(f.line_total),
+                SUM(f.profit),
+                ROUND(AVG(
+                    f.discount_amount
+                    / NULLIF(f.unit_price * f.quantity, 0) * 100
+                ), 2)
+            FROM warehouse.fact_sales f
+            {filter}
+            GROUP BY f.product_key
+        """
+    },
+    {
+        "table": "warehouse.agg_customer_metrics",
+        "key": "customer_key",
+        "query": """
+            SELECT
+                f.customer_key,
+                COUNT(DISTINCT f.transaction_id),
+                SUM(f.line_total),
+                ROUND(
+                    SUM(f.line_total) / COUNT(DISTINCT f.transaction_id), 2
+                ),
+                MAX(d.full_date)
+            FROM warehouse.fact_sales f
+            JOIN warehouse.dim_date d ON d.date_key = f.date_key
+            {filter}
+            GROUP BY f.customer_key
+        """
+    },
+]
+
+
+def create_touched_keys(cur):
+    # Filled by the incremental fact load with the keys of every fact it
+    # removes or adds
+    cur.execute("""
+        CREATE TEMP TABLE fact_touched (
+            date_key INTEGER,
+            customer_key INTEGER,
+            product_key INTEGER
+        ) ON COMMIT DROP
+    """)
+
+
+def refresh_aggregates(cur, full=False):
+    # Returns {table: rows written}
+    counts = {}
+    for aggregate in AGGREGATES:
+        table = aggregate["table"]
+        key = aggregate["key"]
+
+        if full:
+            cur.execute(f"TRUNCATE TABLE {table}")
+            cur.execute(
+                f"INSERT INTO {table} "
+                + aggregate["query"].format(filter="")
+            )
+        else:
+            # Keys left without facts are removed and not written back
+            cur.execute(f"""
+                DELETE FROM {table}
+                WHERE {key} IN (SELECT {key} FROM fact_touched)
+            """)
+            cur.execute(
+                f"INSERT INTO {table} "
+                + aggregate["query"].format(filter=f"""
+                    WHERE f.{key} IN (SELECT {key} FROM fact_touched)
+                """)
+            )
+        counts[table] = cur.rowcount
+
+    return counts
+
+
+def check_aggregates(cur):
+    # Rows that differ between each aggregate table and a full recompute
+    # from fact_sales; all zero when the tables are consistent
+    mismatches = {}
+    for aggregate in AGGREGATES:
+        recompute = aggregate["query"].format(filter="")
+        cur.execute(f"""
+            SELECT COUNT(*) FROM (
+                (TABLE {aggregate['table']} EXCEPT {recompute})
+                UNION ALL
+                ({recompute} EXCEPT TABLE {aggregate['table']})
+            ) AS differences
+        """)
+        mismatches[aggregate["table"]] = cur.fetchone()[0]
+
+    return mismatches
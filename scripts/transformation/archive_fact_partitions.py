@@ -0,0 +1,103 @@
+import argparse
+import json
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from scripts.orchestration.logger import get_logger  # noqa: E402
+from scripts.orchestration.metrics import log_metrics  # noqa: E402
+from scripts.transformation.aggregates import refresh_aggregates  # noqa: E402
+from scripts.transformation.load_to_warehouse import (  # noqa: E402
+    ARCHIVE_WATERMARK,
+    bump_load_version,
+    fetch_watermark,
+    get_connection,
+    save_watermark
+)
+from scripts.transformation.partitions import (  # noqa: E402
+    archive_partitions,
+    month_start
+)
+
+logger = get_logger("WAREHOUSE")
+
+ARCHIVE_SCHEMA = "warehouse_archive"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Detach fact_sales partitions older than a month and "
+                    f"move them to the {ARCHIVE_SCHEMA} schema"
+    )
+    parser.add_argument(
+        "--before", required=True, metavar="YYYY-MM",
+        help="Archive the months before this one"
+    )
+    parser.add_argument(
+        "--drop", action="store_true",
+        help="Drop the detached partitions instead of keeping them"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    before = month_start(date.fromisoformat(f"{args.before}-01"))
+
+    run_started = time.perf_counter()
+    conn = get_connection()
+    conn.autocommit = False
+
+    summary = {
+        "start_time": datetime.utcnow().isoformat(),
+        "before": before.isoformat(),
+        "archive_schema": None if args.drop else ARCHIVE_SCHEMA,
+        "status": "SUCCESS"
+    }
+
+    try:
+        with conn.cursor() as cur:
+            summary["archived"] = archive_partitions(
+                cur, "warehouse.fact_sales", before,
+                None if args.drop else ARCHIVE_SCHEMA
+            )
+
+            # The boundary only moves forward; later loads skip older facts
+            archived_before = fetch_watermark(cur, ARCHIVE_WATERMARK)
+            if archived_before is None or archived_before.date() < before:
+                save_watermark(
+                    cur, ARCHIVE_WATERMARK,
+                    datetime.combine(before, datetime.min.time())
+                )
+
+            # Aggregates and cached results describe the facts still in
+            # the warehouse
+            if summary["archived"]:
+                summary["aggregates"] = refresh_aggregates(cur, full=True)
+                summary["load_version"] = bump_load_version(cur)
+
+        conn.commit()
+
+    except Exception as e:
+        conn.rollback()
+        summary["status"] = "FAILED"
+        summary["error"] = str(e)
+
+    finally:
+        conn.close()
+        summary["end_time"] = datetime.utcnow().isoformat()
+        summary["duration_sec"] = round(time.perf_counter() - run_started, 3)
+        log_metrics(logger, "archive", {
+            "status": summary["status"],
+            "partitions": len(summary.get("archived", [])),
+            "duration_sec": summary["duration_sec"]
+        })
+
+        print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# ---------------------------------
+# DEFERRED INDEX AND FK MAINTENANCE
+# ---------------------------------
+# Full reloads are faster when secondary indexes and foreign keys are
+# built once after the rows are in, instead of being maintained row by
+# row. These helpers capture a table's structure from the catalog, drop
+# it before a load and put it back (validated and analyzed) afterwards.
+
+
+def table_structure(cur, table_name):
+    # Keys, foreign keys and plain indexes of a table, as
+    # {"constraints": [(name, type, definition)], "indexes": [(name, ddl)]}
+    cur.execute("""
+        SELECT conname, contype, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f')
+          AND conparentid = 0
+        ORDER BY contype = 'f', conname
+    """, (table_name,))
+    constraints = cur.fetchall()
+
+    cur.execute("""
+        SELECT c.relname, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s::regclass
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_constraint WHERE conindid = i.indexrelid
+          )
+        ORDER BY c.relname
+    """, (table_name,))
+    # Indexes on a partitioned parent read "ON ONLY"; recreating them
+    # without it cascades them to every partition
+    indexes = [
+        (name, definition.replace(" ON ONLY ", " ON "))
+        for name, definition in cur.fetchall()
+    ]
+
+    return {"constraints": constraints, "indexes": indexes}
+
+
+def secondary_structure(structure):
+    # Foreign keys and plain indexes only; primary and unique keys stay
+    # because loads rely on them for conflict handling
+    return {
+        "constraints": [c for c in structure["constraints"] if c[1] == "f"],
+        "indexes": structure["indexes"]
+    }
+
+
+def drop_structure(cur, table_name, structure):
+    for name, _, _ in structure["constraints"]:
+        cur.execute(f"ALTER TABLE {table_name} DROP CONSTRAINT {name}")
+
+    schema = table_name.split(".")[0]
+    for name, _ in structure["indexes"]:
+        cur.execute(f"DROP INDEX {schema}.{name}")
+
+
+def set_maintenance_workers(cur, workers):
+    # Lets each CREATE INDEX use parallel workers inside the current
+    # transaction (the load stays atomic)
+    cur.execute(
+        "SELECT set_config('max_parallel_maintenance_workers', %s, true)",
+        (str(workers),)
+    )
+
+
+def restore_structure(cur, table_name, structure, workers=0):
+    # Indexes first, so adding each foreign key validates existing rows
+    # with one join rather than per-row trigger checks
+    set_maintenance_workers(cur, workers)
+
+    for _, definition in structure["indexes"]:
+        cur.execute(definition)
+
+    for name, _, definition in structure["constraints"]:
+        cur.execute(
+            f"ALTER TABLE {table_name} ADD CONSTRAINT {name} {definition}"
+        )
+
+
+def analyze_tables(cur, table_names):
+    for table_name in table_names:
+        cur.execute(f"ANALYZE {table_name}")
@@ -1,9 +1,36 @@
 import psycopg2
+import psycopg2.pool
+import argparse
 import os
 import json
+import sys
+import time
+import yaml
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
+from pathlib import Path
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from scripts.orchestration.logger import get_logger  # noqa: E402
+from scripts.orchestration.metrics import (  # noqa: E402
+    log_metrics,
+    peak_rss_mb,
+    track_step
+)
+from scripts.orchestration.statements import statement_cursor  # noqa: E402
+from scripts.transformation.bulk_load import (  # noqa: E402
+    analyze_tables,
+    set_maintenance_workers,
+    table_structure
+)
+from scripts.transformation.partitions import (  # noqa: E402
+    ensure_monthly_partitions,
+    list_partitions,
+    next_month
+)
+
 load_dotenv()
 
 DB_CONFIG = {
@@ -14,130 +41,777 @@ DB_CONFIG = {
     "password": os.getenv("DB_PASSWORD")
 }
 
+logger = get_logger("TRANSFORMATION")
+
+CONFIG_PATH = "config/config.yaml"
 SUMMARY_PATH = "docs/transformation_summary.json"
 
+# ---------------------------------
+# TABLE DEFINITIONS
+# ---------------------------------
+# Production table -> staging source, business key, the tables it
+# references and (production column, staging expression) pairs.
+# "compare" lists the columns that decide whether a row changed; tables
+# with a staging row_hash compare just that. Partitioned tables name
+# their monthly "partition_key" and upsert on "conflict" (key + date).
+PRODUCTION_TABLES = [
+    {
+        "table": "production.customers",
+        "source": "staging.customers",
+        "key": "customer_id",
+        "depends_on": [],
+        "columns": [
+            ("customer_id", "customer_id"),
+            ("first_name", "INITCAP(first_name)"),
+            ("last_name", "INITCAP(last_name)"),
+            ("email", "LOWER(email)"),
+            ("phone", "phone"),
+            ("registration_date", "registration_date"),
+            ("city", "city"),
+            ("state", "state"),
+            ("country", "country"),
+            ("age_group", "age_group"),
+            ("row_hash", "row_hash"),
+        ],
+        "compare": ["row_hash"]
+    },
+    {
+        "table": "production.products",
+        "source": "staging.products",
+        "key": "product_id",
+        "depends_on": [],
+        "columns": [
+            ("product_id", "product_id"),
+            ("product_name", "INITCAP(product_name)"),
+            ("category", "category"),
+            ("sub_category", "sub_category"),
+            ("price", "price"),
+            ("cost", "cost"),
+            ("brand", "brand"),
+            ("stock_quantity", "stock_quantity"),
+            ("supplier_id", "supplier_id"),
+            ("row_hash", "row_hash"),
+        ],
+        "compare": ["row_hash"]
+    },
+    {
+        "table": "production.transactions",
+        "source": "staging.transactions",
+        "key": "transaction_id",
+        "conflict": ["transaction_id", "transaction_date"],
+        "partition_key": "transaction_date",
+        "depends_on": ["production.customers"],
+        "columns": [
+            ("transaction_id", "transaction_id"),
+            ("customer_id", "customer_id"),
+            ("transaction_date", "transaction_date"),
+            ("transaction_time", "transaction_time"),
+            ("payment_method", "payment_method"),
+            ("shipping_address", "shipping_address"),
+            ("total_amount", "total_amount"),
+        ]
+    },
+    {
+        "table": "production.transaction_items",
+        # Items take their partition date from the latest staging
+        # version of their transaction
+        "source": """
+            staging.transaction_items si
+            LEFT JOIN (
+                SELECT DISTINCT ON (transaction_id)
+                    transaction_id, transaction_date
+                FROM staging.transactions
+                ORDER BY transaction_id, loaded_at DESC
+            ) st ON st.transaction_id = si.transaction_id
+        """,
+        "loaded_at": "si.loaded_at",
+        "key": "item_id",
+        "conflict": ["item_id", "transaction_date"],
+        "partition_key": "transaction_date",
+        "depends_on": [
+            "production.transactions", "production.products"
+        ],
+        "columns": [
+            ("item_id", "si.item_id"),
+            ("transaction_id", "si.transaction_id"),
+            ("transaction_date", "st.transaction_date"),
+            ("product_id", "si.product_id"),
+            ("quantity", "si.quantity"),
+            ("unit_price", "si.unit_price"),
+            ("discount_percentage", "si.discount_percentage"),
+            ("line_total", "si.line_total"),
+        ]
+    },
+]
+
 
 def get_connection():
-    return psycopg2.connect(**DB_CONFIG)
+    return psycopg2.connect(**DB_CONFIG, cursor_factory=statement_cursor())
+
+
+def get_connection_pool(max_connections):
+    return psycopg2.pool.ThreadedConnectionPool(
+        1, max_connections, cursor_factory=statement_cursor(), **DB_CONFIG
+    )
+
+
+def load_config():
+    with open(CONFIG_PATH) as f:
+        return yaml.safe_load(f)
+
+
+# ---------------------------------
+# WATERMARKS
+# ---------------------------------
+def fetch_watermark(cur, table_name):
+    cur.execute(
+        "SELECT last_loaded_at FROM production.load_watermarks "
+        "WHERE table_name = %s",
+        (table_name,)
+    )
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def save_watermark(cur, table_name, loaded_at):
+    cur.execute("""
+        INSERT INTO production.load_watermarks (
+            table_name, last_loaded_at, updated_at
+        )
+        VALUES (%s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (table_name) DO UPDATE SET
+            last_loaded_at = EXCLUDED.last_loaded_at,
+            updated_at = EXCLUDED.updated_at
+    """, (table_name, loaded_at))
+
+
+# ---------------------------------
+# LOAD STATEMENTS
+# ---------------------------------
+def shadow_table(table_name):
+    return f"{table_name}__shadow"
+
+
+def build_shadow(cur, spec, structure, bulk=True, maintenance_workers=0):
+    # Foreign keys point at the referenced tables' shadows, which is why
+    # a table waits for the tables it depends on. In bulk mode the rows
+    # go into a bare copy and keys, indexes and foreign keys are built
+    # once afterwards; otherwise they are maintained row by row.
+    table = spec["table"]
+    shadow = shadow_table(table)
+    columns = [column for column, _ in spec["columns"]]
+    expressions = [
+        f"{expression} AS {column}" for column, expression in spec["columns"]
+    ]
+    loaded_at = spec.get("loaded_at", "loaded_at")
+
+    def add_structure():
+        for name, kind, definition in structure["constraints"]:
+            if kind == "f":
+                for parent in spec["depends_on"]:
+                    definition = definition.replace(
+                        f"REFERENCES {parent}(",
+                        f"REFERENCES {shadow_table(parent)}("
+                    )
+            cur.execute(
+                f"ALTER TABLE {shadow} "
+                f"ADD CONSTRAINT {name}__shadow {definition}"
+            )
+
+        for name, definition in structure["indexes"]:
+            cur.execute(definition.replace(
+                f"INDEX {name} ON {table} ",
+                f"INDEX {name}__shadow ON {shadow} "
+            ))
+
+    cur.execute(f"DROP TABLE IF EXISTS {shadow} CASCADE")
+    cur.execute(
+        f"CREATE TABLE {shadow} "
+        f"(LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        + (
+            f" PARTITION BY RANGE ({spec['partition_key']})"
+            if spec.get("partition_key") else ""
+        )
+    )
+    if spec.get("partition_key"):
+        ensure_monthly_partitions(cur, shadow, source_months(cur, spec))
+
+    if not bulk:
+        add_structure()
+
+    # Append-only staging tables keep every loaded version of a key; as
+    # in the other modes, the latest one wins
+    cur.execute(f"""
+        INSERT INTO {shadow} ({', '.join(columns)})
+        SELECT {', '.join(columns)}
+        FROM (
+            SELECT DISTINCT ON ({spec['key']}) {', '.join(expressions)}
+            FROM {spec['source']}
+            ORDER BY {spec['key']}, {loaded_at} DESC
+        ) AS latest
+    """)
+    rows = cur.rowcount
+
+    if bulk:
+        set_maintenance_workers(cur, maintenance_workers)
+        add_structure()
+
+    return {"inserted": rows, "updated": 0, "unchanged": 0}
+
+
+def swap_shadow_tables(cur, structures):
+    # Replaces every live table with its shadow in the caller's
+    # transaction; readers see either all old or all new tables
+    schema = next(iter(structures)).split(".")[0]
+
+    cur.execute(f"DROP TABLE {', '.join(structures)}")
+    for table, structure in structures.items():
+        cur.execute(
+            f"ALTER TABLE {shadow_table(table)} "
+            f"RENAME TO {table.split('.')[1]}"
+        )
+        for name, _, _ in structure["constraints"]:
+            cur.execute(
+                f"ALTER TABLE {table} "
+                f"RENAME CONSTRAINT {name}__shadow TO {name}"
+            )
+        for name, _ in structure["indexes"]:
+            cur.execute(
+                f"ALTER INDEX {schema}.{name}__shadow RENAME TO {name}"
+            )
+        for partition, _ in list_partitions(cur, table):
+            strip_shadow_names(cur, partition)
+
+
+def strip_shadow_names(cur, partition):
+    # Partitions, and the indexes and constraints cloned onto them, were
+    # created under shadow names; give them their live names back
+    schema = partition.split(".")[0]
+
+    cur.execute("""
+        SELECT conname FROM pg_constraint
+        WHERE conrelid = %s::regclass AND conname LIKE '%%\\_\\_shadow%%'
+          AND contype <> 'p' AND contype <> 'u'
+    """, (partition,))
+    for (name,) in cur.fetchall():
+        cur.execute(
+            f"ALTER TABLE {partition} RENAME CONSTRAINT {name} "
+            f"TO {name.replace('__shadow', '')}"
+        )
+
+    cur.execute("""
+        SELECT c.relname FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s::regclass
+          AND c.relname LIKE '%%\\_\\_shadow%%'
+    """, (partition,))
+    for (name,) in cur.fetchall():
+        cur.execute(
+            f"ALTER INDEX {schema}.{name} "
+            f"RENAME TO {name.replace('__shadow', '')}"
+        )
+
+    if "__shadow" in partition:
+        cur.execute(
+            f"ALTER TABLE {partition} "
+            f"RENAME TO {partition.split('.')[1].replace('__shadow', '')}"
+        )
+
+
+def drop_shadow_tables(cur, table_names):
+    for table_name in table_names:
+        cur.execute(f"DROP TABLE IF EXISTS {shadow_table(table_name)} CASCADE")
+
+
+# ---------------------------------
+# DEPENDENCY-ORDERED EXECUTION
+# ---------------------------------
+def run_dag(specs, run_node, workers):
+    # Starts each table as soon as every table it depends on finished,
+    # so the wall clock follows the longest dependency chain
+    pending = list(specs)
+    done = set()
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for spec in [s for s in pending if set(s["depends_on"]) <= done]:
+                running[executor.submit(run_node, spec)] = spec
+                pending.remove(spec)
+
+            if not running:
+                raise ValueError(
+                    f"Unresolvable dependencies: {[s['table'] for s in pending]}"
+                )
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                spec = running.pop(future)
+                future.result()
+                done.add(spec["table"])
+
+
+def referencing_specs(spec):
+    # Partitioned tables whose foreign key points at spec's rows through
+    # (key, partition_key), like items at their transaction
+    return [
+        child for child in PRODUCTION_TABLES
+        if spec["table"] in child["depends_on"]
+        and child.get("partition_key") == spec["partition_key"]
+        and spec["key"] in dict(child["columns"])
+    ]
+
+
+def move_changed_dates(cur, spec, expressions, window):
+    # A partition key UPDATE moves the row to another partition, which
+    # PostgreSQL before 15 runs as DELETE + INSERT: a foreign key
+    # referencing the row sees a delete and ON UPDATE CASCADE never
+    # fires. Referencing rows are therefore set aside, the parent rows
+    # moved, and the referencing rows put back with the new date.
+    table = spec["table"]
+    key = spec["key"]
+    partition_key = spec["partition_key"]
+    loaded_at = spec.get("loaded_at", "loaded_at")
+
+    cur.execute(f"""
+        CREATE TEMP TABLE moved_keys AS
+        SELECT c.{key}, c.{partition_key}
+        FROM (
+            SELECT DISTINCT ON ({key}) {', '.join(expressions)}
+            FROM {spec['source']}
+            WHERE {loaded_at} > %(since)s
+              AND {loaded_at} <= %(high_water)s
+            ORDER BY {key}, {loaded_at} DESC
+        ) AS c
+        JOIN {table} p
+          ON p.{key} = c.{key}
+         AND p.{partition_key} <> c.{partition_key}
+    """, window)
+    if cur.rowcount == 0:
+        cur.execute("DROP TABLE moved_keys")
+        return 0
+
+    children = referencing_specs(spec)
+    for index, child in enumerate(children):
+        cur.execute(
+            f"CREATE TEMP TABLE moved_children_{index} (LIKE {child['table']})"
+        )
+        cur.execute(f"""
+            WITH removed AS (
+                DELETE FROM {child['table']} c
+                USING moved_keys m
+                WHERE c.{key} = m.{key}
+                RETURNING c.*
+            )
+            INSERT INTO moved_children_{index} SELECT * FROM removed
+        """)
 
+    cur.execute(f"""
+        UPDATE {table} p
+        SET {partition_key} = m.{partition_key},
+            updated_at = CURRENT_TIMESTAMP
+        FROM moved_keys m
+        WHERE p.{key} = m.{key}
+    """)
+    moved = cur.rowcount
 
-def main():
-    conn = get_connection()
+    cur.execute(f"""
+        SELECT DISTINCT date_trunc('month', {partition_key})::date
+        FROM moved_keys
+    """)
+    months = [row[0] for row in cur.fetchall()]
+    for index, child in enumerate(children):
+        ensure_monthly_partitions(cur, child["table"], months)
+        cur.execute(f"""
+            UPDATE moved_children_{index} c
+            SET {partition_key} = m.{partition_key},
+                updated_at = CURRENT_TIMESTAMP
+            FROM moved_keys m
+            WHERE c.{key} = m.{key}
+        """)
+        cur.execute(f"""
+            INSERT INTO {child['table']}
+            SELECT * FROM moved_children_{index}
+        """)
+        cur.execute(f"DROP TABLE moved_children_{index}")
+
+    cur.execute("DROP TABLE moved_keys")
+    return moved
+
+
+def incremental_load(cur, spec, since, high_water):
+    # Upsert staging rows loaded after the watermark. The latest staging
+    # version of a key wins, and rows whose compared values did not
+    # change are left alone, so updated_at only moves when data does.
+    table = spec["table"]
+    key = spec["key"]
+    conflict = spec.get("conflict", [key])
+    loaded_at = spec.get("loaded_at", "loaded_at")
+    columns = [column for column, _ in spec["columns"]]
+    expressions = [
+        f"{expression} AS {column}" for column, expression in spec["columns"]
+    ]
+    updates = [column for column in columns if column not in conflict]
+    compare = spec.get("compare", updates)
+
+    window = {"since": since, "high_water": high_water}
+    if spec.get("partition_key"):
+        ensure_monthly_partitions(
+            cur, table, source_months(cur, spec, since, high_water)
+        )
+
+        # The conflict key includes the date, so a row whose date changed
+        # is first moved to its new partition and then upserted like any
+        # other
+        moved = move_changed_dates(cur, spec, expressions, window)
+
+    # The final SELECT sees the table as it was before the upsert, so a
+    # written key that was already there is an update (xmax cannot be
+    # read back from partitioned tables)
+    cur.execute(f"""
+        WITH changed AS (
+            SELECT DISTINCT ON ({key}) {', '.join(expressions)}
+            FROM {spec['source']}
+            WHERE {loaded_at} > %(since)s AND {loaded_at} <= %(high_water)s
+            ORDER BY {key}, {loaded_at} DESC
+        ),
+        written AS (
+            INSERT INTO {table} ({', '.join(columns)}, updated_at)
+            SELECT {', '.join(columns)}, CURRENT_TIMESTAMP
+            FROM changed
+            ON CONFLICT ({', '.join(conflict)}) DO UPDATE SET
+                {', '.join(f'{c} = EXCLUDED.{c}' for c in updates)},
+                updated_at = EXCLUDED.updated_at
+            WHERE ({', '.join(f'{table}.{c}' for c in compare)})
+                IS DISTINCT FROM
+                ({', '.join(f'EXCLUDED.{c}' for c in compare)})
+            RETURNING {', '.join(conflict)}
+        ),
+        classified AS (
+            SELECT NOT EXISTS (
+                SELECT 1 FROM {table} existing
+                WHERE {' AND '.join(
+                    f'existing.{c} = written.{c}' for c in conflict
+                )}
+            ) AS inserted
+            FROM written
+        )
+        SELECT
+            (SELECT COUNT(*) FROM changed),
+            COUNT(*) FILTER (WHERE inserted),
+            COUNT(*) FILTER (WHERE NOT inserted)
+        FROM classified
+    """, window)
+
+    candidates, inserted, updated = cur.fetchone()
+    counts = {
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": candidates - inserted - updated
+    }
+    if spec.get("partition_key"):
+        counts["moved"] = moved
+    return counts
+
+
+# ---------------------------------
+# PARTITION-LEVEL RELOADS
+# ---------------------------------
+def source_months(cur, spec, since=None, high_water=None):
+    # Months of the staging rows (optionally only those loaded in the
+    # watermark window) for a partitioned table
+    loaded_at = spec.get("loaded_at", "loaded_at")
+    date_expression = dict(spec["columns"])[spec["partition_key"]]
+    window = ""
+    if since is not None:
+        window = (
+            f"WHERE {loaded_at} > %(since)s "
+            f"AND {loaded_at} <= %(high_water)s"
+        )
+
+    cur.execute(f"""
+        SELECT DISTINCT date_trunc('month', {date_expression})::date
+        FROM {spec['source']}
+        {window}
+    """, {"since": since, "high_water": high_water})
+    return [row[0] for row in cur.fetchall() if row[0] is not None]
+
+
+def touched_months(cur, spec, since, high_water):
+    # Months holding staging rows loaded in the window, plus the months
+    # where production keeps those keys today (a corrected date moves a
+    # row to another partition)
+    loaded_at = spec.get("loaded_at", "loaded_at")
+    columns = dict(spec["columns"])
+    partition_key = spec["partition_key"]
+
+    cur.execute(f"""
+        WITH changed AS (
+            SELECT
+                {columns[spec['key']]} AS key,
+                {columns[partition_key]} AS partition_date
+            FROM {spec['source']}
+            WHERE {loaded_at} > %(since)s AND {loaded_at} <= %(high_water)s
+        )
+        SELECT date_trunc('month', partition_date)::date FROM changed
+        UNION
+        SELECT date_trunc('month', p.{partition_key})::date
+        FROM {spec['table']} p
+        JOIN changed c ON c.key = p.{spec['key']}
+    """, {"since": since, "high_water": high_water})
+    return {row[0] for row in cur.fetchall() if row[0] is not None}
+
+
+def rebuild_partitions(cur, specs, months):
+    # Rewrites only the given months of related partitioned tables from
+    # staging: children are cleared before parents so foreign keys hold,
+    # then parents are filled first. Each DELETE is pruned to one
+    # partition; other months are not read or written.
+    counts = {spec["table"]: {"inserted": 0, "deleted": 0} for spec in specs}
+    if not months:
+        return counts
+
+    for spec in reversed(specs):
+        for month in sorted(months):
+            cur.execute(f"""
+                DELETE FROM {spec['table']}
+                WHERE {spec['partition_key']} >= %s
+                  AND {spec['partition_key']} < %s
+            """, (month, next_month(month)))
+            counts[spec["table"]]["deleted"] += cur.rowcount
+
+    for spec in specs:
+        ensure_monthly_partitions(cur, spec["table"], months)
+
+        loaded_at = spec.get("loaded_at", "loaded_at")
+        columns = [column for column, _ in spec["columns"]]
+        expressions = [
+            f"{expression} AS {column}"
+            for column, expression in spec["columns"]
+        ]
+
+        # Latest staging version of each key first, then its month
+        cur.execute(f"""
+            INSERT INTO {spec['table']} ({', '.join(columns)})
+            SELECT {', '.join(columns)}
+            FROM (
+                SELECT DISTINCT ON ({spec['key']}) {', '.join(expressions)}
+                FROM {spec['source']}
+                ORDER BY {spec['key']}, {loaded_at} DESC
+            ) AS latest
+            WHERE date_trunc('month', {spec['partition_key']})::date
+                = ANY(%(months)s)
+        """, {"months": sorted(months)})
+        counts[spec["table"]]["inserted"] = cur.rowcount
+
+    return counts
+
+
+# ---------------------------------
+# MAIN
+# ---------------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Load staging data into the production schema"
+    )
+    parser.add_argument(
+        "--mode", choices=["full", "incremental", "partitions"],
+        default=None,
+        help="full reloads every table; incremental upserts staging rows "
+             "loaded since the last run; partitions upserts customers and "
+             "products and rewrites only the transaction months touched "
+             "since the last run (default: pipeline.production_load_mode)"
+    )
+    parser.add_argument(
+        "--bulk", action="store_true", default=None,
+        help="Full mode: build indexes and foreign keys after the rows are "
+             "loaded, then ANALYZE (default: pipeline.bulk_load)"
+    )
+    parser.add_argument(
+        "--no-bulk", dest="bulk", action="store_false",
+        help="Full mode: maintain indexes and foreign keys during the load"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = load_config()
+    mode = args.mode or config["pipeline"].get(
+        "production_load_mode", "full"
+    )
+    workers = config["pipeline"].get("production_workers", 2)
+    bulk = args.bulk
+    if bulk is None:
+        bulk = config["pipeline"].get("bulk_load", False)
+    maintenance_workers = config["pipeline"].get("maintenance_workers", 2)
+
+    run_started = time.perf_counter()
+    table_names = [spec["table"] for spec in PRODUCTION_TABLES]
+
+    # One extra connection for planning and the publish step
+    pool = get_connection_pool(workers + 1)
+    conn = pool.getconn()
     conn.autocommit = False
 
     summary = {
         "start_time": datetime.utcnow().isoformat(),
+        "mode": mode,
+        "bulk": bulk if mode == "full" else False,
         "tables_loaded": {},
+        "table_metrics": {},
+        "row_counts": {},
+        "watermarks": {},
         "status": "SUCCESS"
     }
 
     try:
         with conn.cursor() as cur:
-            # ---------------------------------
-            # LOAD CUSTOMERS
-            # ---------------------------------
-            cur.execute("TRUNCATE TABLE production.customers CASCADE")
-
-            cur.execute("""
-                INSERT INTO production.customers (
-                    customer_id, first_name, last_name, email,
-                    phone, registration_date, city, state, country,
-                    age_group
-                )
-                SELECT
-                    customer_id,
-                    INITCAP(first_name),
-                    INITCAP(last_name),
-                    LOWER(email),
-                    phone,
-                    registration_date,
-                    city,
-                    state,
-                    country,
-                    age_group
-                FROM staging.customers
-            """)
-            summary["tables_loaded"]["production.customers"] = "SUCCESS"
-
-            # ---------------------------------
-            # LOAD PRODUCTS
-            # ---------------------------------
-            cur.execute("TRUNCATE TABLE production.products CASCADE")
-
-            cur.execute("""
-                INSERT INTO production.products (
-                    product_id, product_name, category, sub_category,
-                    price, cost, brand, stock_quantity, supplier_id
+            # Rows published to staging after this point wait for the
+            # next incremental run
+            bounds = {}
+            for spec in PRODUCTION_TABLES:
+                cur.execute(
+                    f"SELECT MAX({spec.get('loaded_at', 'loaded_at')}) "
+                    f"FROM {spec['source']}"
                 )
-                SELECT
-                    product_id,
-                    INITCAP(product_name),
-                    category,
-                    sub_category,
-                    price,
-                    cost,
-                    brand,
-                    stock_quantity,
-                    supplier_id
-                FROM staging.products
-            """)
-            summary["tables_loaded"]["production.products"] = "SUCCESS"
-
-            # ---------------------------------
-            # LOAD TRANSACTIONS
-            # ---------------------------------
-            cur.execute("TRUNCATE TABLE production.transactions CASCADE")
-
-            cur.execute("""
-                INSERT INTO production.transactions (
-                    transaction_id, customer_id, transaction_date,
-                    transaction_time, payment_method, shipping_address,
-                    total_amount
+                high_water = cur.fetchone()[0]
+                bounds[spec["table"]] = (
+                    fetch_watermark(cur, spec["table"]), high_water
                 )
-                SELECT
-                    transaction_id,
-                    customer_id,
-                    transaction_date,
-                    transaction_time,
-                    payment_method,
-                    shipping_address,
-                    total_amount
-                FROM staging.transactions
-            """)
-            summary["tables_loaded"]["production.transactions"] = "SUCCESS"
-
-            # ---------------------------------
-            # LOAD TRANSACTION ITEMS
-            # ---------------------------------
-            cur.execute("TRUNCATE TABLE production.transaction_items CASCADE")
-
-            cur.execute("""
-                INSERT INTO production.transaction_items (
-                    item_id, transaction_id, product_id,
-                    quantity, unit_price, discount_percentage, line_total
+
+            structures = {
+                table: table_structure(cur, table) for table in table_names
+            }
+        conn.commit()
+
+        if mode == "full":
+            # Build all tables as shadows concurrently, then swap them in
+            def build(spec):
+                build_conn = pool.getconn()
+                try:
+                    with track_step(
+                        logger, summary["table_metrics"], spec["table"]
+                    ) as step, build_conn.cursor() as cur:
+                        counts = build_shadow(
+                            cur, spec, structures[spec["table"]],
+                            bulk, maintenance_workers
+                        )
+                        step.rows = counts["inserted"]
+                    build_conn.commit()
+                except Exception:
+                    build_conn.rollback()
+                    raise
+                finally:
+                    pool.putconn(build_conn)
+                summary["row_counts"][spec["table"]] = counts
+
+            run_dag(PRODUCTION_TABLES, build, workers)
+
+            publish_started = time.perf_counter()
+            with conn.cursor() as cur:
+                swap_shadow_tables(cur, structures)
+            summary["publish_duration_sec"] = round(
+                time.perf_counter() - publish_started, 3
+            )
+
+        else:
+            def has_new_rows(spec):
+                since, high_water = bounds[spec["table"]]
+                return high_water is not None and (
+                    since is None or high_water > since
                 )
-                SELECT
-                    item_id,
-                    transaction_id,
-                    product_id,
-                    quantity,
-                    unit_price,
-                    discount_percentage,
-                    line_total
-                FROM staging.transaction_items
-            """)
-            summary["tables_loaded"]["production.transaction_items"] = "SUCCESS"
+
+            # In partitions mode the date-partitioned tables are rebuilt
+            # month by month below instead of upserted
+            upserted = [
+                spec for spec in PRODUCTION_TABLES
+                if mode == "incremental" or not spec.get("partition_key")
+            ]
+
+            # Upserts go straight into the live tables in FK order
+            with conn.cursor() as cur:
+                for spec in upserted:
+                    since, high_water = bounds[spec["table"]]
+                    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+                    with track_step(
+                        logger, summary["table_metrics"], spec["table"]
+                    ) as step:
+                        if has_new_rows(spec):
+                            counts = incremental_load(
+                                cur, spec, since or datetime.min, high_water
+                            )
+                        step.rows = counts["inserted"] + counts["updated"]
+                    summary["row_counts"][spec["table"]] = counts
+
+            partitioned = [
+                spec for spec in PRODUCTION_TABLES if spec not in upserted
+            ]
+            if partitioned:
+                with conn.cursor() as cur:
+                    months = set()
+                    for spec in partitioned:
+                        if has_new_rows(spec):
+                            since, high_water = bounds[spec["table"]]
+                            months |= touched_months(
+                                cur, spec, since or datetime.min, high_water
+                            )
+
+                    with track_step(
+                        logger, summary["table_metrics"], "partitions"
+                    ) as step:
+                        counts = rebuild_partitions(cur, partitioned, months)
+                        step.rows = sum(
+                            c["inserted"] for c in counts.values()
+                        )
+                    summary["row_counts"].update(counts)
+                    summary["partitions_rebuilt"] = [
+                        f"{month:%Y-%m}" for month in sorted(months)
+                    ]
+
+        with conn.cursor() as cur:
+            for table, (since, high_water) in bounds.items():
+                if high_water is not None:
+                    save_watermark(cur, table, high_water)
+
+                summary["tables_loaded"][table] = "SUCCESS"
+                summary["watermarks"][table] = {
+                    "from": since.isoformat() if since else None,
+                    "to": high_water.isoformat() if high_water else None
+                }
 
         conn.commit()
 
+        # The swapped-in tables are new relations without statistics, and
+        # autovacuum never analyzes partitioned parents. Analyzed outside
+        # the publish transaction so the swap holds its locks briefly.
+        if mode == "full":
+            with track_step(logger, summary["table_metrics"], "analyze"):
+                with conn.cursor() as cur:
+                    analyze_tables(cur, table_names)
+                conn.commit()
+
     except Exception as e:
         conn.rollback()
         summary["status"] = "FAILED"
         summary["error"] = str(e)
 
+        with conn.cursor() as cur:
+            drop_shadow_tables(cur, table_names)
+        conn.commit()
+
     finally:
-        conn.close()
+        pool.putconn(conn)
+        pool.closeall()
         summary["end_time"] = datetime.utcnow().isoformat()
+        summary["duration_sec"] = round(time.perf_counter() - run_started, 3)
+        summary["peak_rss_mb"] = peak_rss_mb()
+        log_metrics(logger, "production", {
+            "status": summary["status"],
+            "mode": mode,
+            "duration_sec": summary["duration_sec"],
+            "peak_rss_mb": summary["peak_rss_mb"]
+        })
 
         with open(SUMMARY_PATH, "w") as f:
             json.dump(summary, f, indent=4)
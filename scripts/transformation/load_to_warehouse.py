@@ -1,9 +1,40 @@
 import psycopg2
+import argparse
 import os
 import json
-from datetime import datetime
+import sys
+import time
+import yaml
+from datetime import date, datetime
+from pathlib import Path
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from scripts.orchestration.logger import get_logger  # noqa: E402
+from scripts.orchestration.metrics import (  # noqa: E402
+    log_metrics,
+    peak_rss_mb,
+    track_step
+)
+from scripts.orchestration.statements import statement_cursor  # noqa: E402
+from scripts.transformation.aggregates import (  # noqa: E402
+    check_aggregates,
+    create_touched_keys,
+    refresh_aggregates
+)
+from scripts.transformation.bulk_load import (  # noqa: E402
+    analyze_tables,
+    drop_structure,
+    restore_structure,
+    secondary_structure,
+    table_structure
+)
+from scripts.transformation.partitions import (  # noqa: E402
+    ensure_monthly_partitions,
+    months_between
+)
+
 load_dotenv()
 
 DB_CONFIG = {
@@ -14,165 +45,620 @@ DB_CONFIG = {
     "password": os.getenv("DB_PASSWORD")
 }
 
+logger = get_logger("WAREHOUSE")
+
+CONFIG_PATH = "config/config.yaml"
 SUMMARY_PATH = "docs/warehouse_load_summary.json"
 
+# Tables whose secondary indexes and foreign keys are rebuilt after the
+# load in bulk mode
+BULK_TABLES = ["warehouse.fact_sales"]
+
+WAREHOUSE_TABLES = [
+    "warehouse.dim_date",
+    "warehouse.dim_payment_method",
+    "warehouse.dim_customers",
+    "warehouse.dim_products",
+    "warehouse.fact_sales",
+    "warehouse.agg_daily_sales",
+    "warehouse.agg_product_performance",
+    "warehouse.agg_customer_metrics",
+]
+
+
+# Set by archive_fact_partitions.py: facts dated before it were archived
+# and are neither reloaded nor given partitions again
+ARCHIVE_WATERMARK = "warehouse.fact_sales.archived_before"
+
+# Incremental fact loads fall back to a full rebuild when at least this
+# share of production transactions changed (e.g. after staging reloaded
+# a whole table)
+FULL_REBUILD_RATIO = 0.5
+
+# YYYYMMDD as an integer, from arithmetic on date parts rather than
+# formatting and parsing text (evaluated once per fact row)
+DATE_KEY_SQL = """(
+    date_part('year', {0}) * 10000
+    + date_part('month', {0}) * 100
+    + date_part('day', {0})
+)::INTEGER"""
+
+def date_key(day):
+    # DATE_KEY_SQL in Python, for partition bounds
+    return day.year * 10000 + day.month * 100 + day.day
+
+
+# The versions of a Type 2 dimension with the dates each one covers.
+# A fact takes the version valid on its transaction date; the first
+# version created also covers everything before it (history predates
+# the first load).
+SCD2_VERSIONS = """(
+    SELECT
+        {surrogate}, {key},
+        CASE
+            WHEN ROW_NUMBER() OVER (
+                PARTITION BY {key} ORDER BY {surrogate}
+            ) = 1 THEN '-infinity'::DATE
+            ELSE effective_date
+        END AS valid_from,
+        COALESCE(end_date, 'infinity'::DATE) AS valid_to
+    FROM {table}
+)"""
+
+# Facts at line item grain. {filter} narrows the load to some
+# transactions (WHERE) or orders a full rebuild (ORDER BY).
+FACT_SALES_INSERT = f"""
+    INSERT INTO warehouse.fact_sales (
+        date_key, customer_key, product_key,
+        payment_method_key, transaction_id,
+        quantity, unit_price, discount_amount,
+        line_total, profit
+    )
+    SELECT
+        {DATE_KEY_SQL.format("t.transaction_date")},
+        dc.customer_key,
+        dp.product_key,
+        dpm.payment_method_key,
+        ti.transaction_id,
+        ti.quantity,
+        ti.unit_price,
+        (ti.unit_price * ti.quantity) - ti.line_total,
+        ti.line_total,
+        ti.line_total - (ti.quantity * p.cost)
+    FROM production.transaction_items ti
+    -- Joining on the partition key too lets matching monthly
+    -- partitions be joined pairwise (enable_partitionwise_join)
+    JOIN production.transactions t
+        ON ti.transaction_id = t.transaction_id
+        AND ti.transaction_date = t.transaction_date
+    JOIN production.products p
+        ON ti.product_id = p.product_id
+    JOIN {SCD2_VERSIONS.format(
+        surrogate="customer_key", key="customer_id",
+        table="warehouse.dim_customers"
+    )} dc
+        ON dc.customer_id = t.customer_id
+        AND t.transaction_date >= dc.valid_from
+        AND t.transaction_date < dc.valid_to
+    JOIN {SCD2_VERSIONS.format(
+        surrogate="product_key", key="product_id",
+        table="warehouse.dim_products"
+    )} dp
+        ON dp.product_id = ti.product_id
+        AND t.transaction_date >= dp.valid_from
+        AND t.transaction_date < dp.valid_to
+    JOIN warehouse.dim_payment_method dpm
+        ON dpm.payment_method_name = t.payment_method
+    {{filter}}
+"""
+
+# Type 2 dimensions -> business key, production source and (dimension
+# column, production expression) pairs. A change in any of these columns
+# closes the current version and opens a new one.
+SCD2_DIMENSIONS = [
+    {
+        "table": "warehouse.dim_customers",
+        "key": "customer_id",
+        "source": "production.customers",
+        "columns": [
+            ("full_name", "first_name || ' ' || last_name"),
+            ("email", "email"),
+            ("city", "city"),
+            ("state", "state"),
+            ("country", "country"),
+            ("age_group", "age_group"),
+            ("customer_segment", """
+                CASE
+                    WHEN age_group IN ('18-25','26-35') THEN 'Young'
+                    WHEN age_group IN ('36-45') THEN 'Mid-age'
+                    ELSE 'Senior'
+                END
+            """),
+            ("registration_date", "registration_date"),
+        ]
+    },
+    {
+        "table": "warehouse.dim_products",
+        "key": "product_id",
+        "source": "production.products",
+        "columns": [
+            ("product_name", "product_name"),
+            ("category", "category"),
+            ("sub_category", "sub_category"),
+            ("brand", "brand"),
+            ("price_range", """
+                CASE
+                    WHEN price < 100 THEN 'Budget'
+                    WHEN price BETWEEN 100 AND 500 THEN 'Mid-range'
+                    ELSE 'Premium'
+                END
+            """),
+        ]
+    },
+]
+
 
 def get_connection():
-    return psycopg2.connect(**DB_CONFIG)
+    return psycopg2.connect(**DB_CONFIG, cursor_factory=statement_cursor())
+
+
+def load_config():
+    with open(CONFIG_PATH) as f:
+        return yaml.safe_load(f)
+
+
+# ---------------------------------
+# WATERMARKS
+# ---------------------------------
+def fetch_watermark(cur, table_name):
+    cur.execute(
+        "SELECT last_loaded_at FROM warehouse.load_watermarks "
+        "WHERE table_name = %s",
+        (table_name,)
+    )
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def save_watermark(cur, table_name, loaded_at):
+    cur.execute("""
+        INSERT INTO warehouse.load_watermarks (
+            table_name, last_loaded_at, updated_at
+        )
+        VALUES (%s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (table_name) DO UPDATE SET
+            last_loaded_at = EXCLUDED.last_loaded_at,
+            updated_at = EXCLUDED.updated_at
+    """, (table_name, loaded_at))
+
+
+def bump_load_version(cur):
+    # Part of the load transaction, so readers see the new version
+    # exactly when they can see the data it describes
+    cur.execute("""
+        INSERT INTO warehouse.load_version (id, version, loaded_at)
+        VALUES (1, 1, CURRENT_TIMESTAMP)
+        ON CONFLICT (id) DO UPDATE SET
+            version = warehouse.load_version.version + 1,
+            loaded_at = EXCLUDED.loaded_at
+        RETURNING version
+    """)
+    return cur.fetchone()[0]
+
+
+# ---------------------------------
+# DATE DIMENSION
+# ---------------------------------
+def calendar_range(cur, config):
+    # The configured calendar (by default the generated data's date
+    # range), widened to any transaction date that falls outside it
+    generation = config.get("data_generation", {})
+    calendar = (config.get("warehouse") or {}).get("calendar") or {}
+    start = date.fromisoformat(
+        str(calendar.get("start_date", generation["start_date"]))
+    )
+    end = date.fromisoformat(
+        str(calendar.get("end_date", generation["end_date"]))
+    )
+
+    cur.execute("""
+        SELECT MIN(transaction_date), MAX(transaction_date)
+        FROM production.transactions
+    """)
+    first, last = cur.fetchone()
+    return min(start, first or start), max(end, last or end)
+
+
+def ensure_calendar(cur, start, end):
+    # Adds the days of [start, end] that dim_date lacks, so days without
+    # sales have a row too. Returns the number of days added.
+    cur.execute("""
+        SELECT COUNT(*) FROM warehouse.dim_date
+        WHERE full_date BETWEEN %s AND %s
+    """, (start, end))
+    if cur.fetchone()[0] == (end - start).days + 1:
+        return 0
+
+    cur.execute(f"""
+        INSERT INTO warehouse.dim_date (
+            date_key, full_date, year, quarter, month, day,
+            month_name, day_name, week_of_year, is_weekend
+        )
+        SELECT
+            {DATE_KEY_SQL.format("day")},
+            day,
+            EXTRACT(YEAR FROM day),
+            EXTRACT(QUARTER FROM day),
+            EXTRACT(MONTH FROM day),
+            EXTRACT(DAY FROM day),
+            TO_CHAR(day, 'Month'),
+            TO_CHAR(day, 'Day'),
+            EXTRACT(WEEK FROM day),
+            EXTRACT(DOW FROM day) IN (0, 6)
+        FROM (
+            SELECT generate_series(
+                %s::date, %s::date, INTERVAL '1 day'
+            )::date AS day
+        ) AS calendar
+        ON CONFLICT (date_key) DO NOTHING
+    """, (start, end))
+    return cur.rowcount
+
+
+# ---------------------------------
+# SLOWLY CHANGING DIMENSIONS
+# ---------------------------------
+def apply_scd2(cur, dimension):
+    # Versions only the keys whose attributes changed: their current row
+    # is closed and a new one inserted. Unchanged rows keep their
+    # surrogate keys, so facts pointing at them stay valid. Keys gone
+    # from production are closed without a successor.
+    table = dimension["table"]
+    key = dimension["key"]
+    columns = [column for column, _ in dimension["columns"]]
+    expressions = [
+        f"{expression} AS {column}"
+        for column, expression in dimension["columns"]
+    ]
+    source = (
+        f"(SELECT {key}, {', '.join(expressions)} "
+        f"FROM {dimension['source']})"
+    )
+
+    cur.execute(f"""
+        UPDATE {table} d
+        SET end_date = CURRENT_DATE, is_current = FALSE
+        FROM {source} AS s
+        WHERE d.is_current AND d.{key} = s.{key}
+          AND ({', '.join(f'd.{c}' for c in columns)})
+              IS DISTINCT FROM
+              ({', '.join(f's.{c}' for c in columns)})
+    """)
+    versioned = cur.rowcount
+
+    cur.execute(f"""
+        UPDATE {table} d
+        SET end_date = CURRENT_DATE, is_current = FALSE
+        WHERE d.is_current AND NOT EXISTS (
+            SELECT 1 FROM {dimension['source']} s WHERE s.{key} = d.{key}
+        )
+    """)
+    retired = cur.rowcount
+
+    # Closed and brand new keys are the ones without a current version
+    cur.execute(f"""
+        INSERT INTO {table} (
+            {key}, {', '.join(columns)}, effective_date, is_current
+        )
+        SELECT {key}, {', '.join(columns)}, CURRENT_DATE, TRUE
+        FROM {source} AS s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {table} d
+            WHERE d.{key} = s.{key} AND d.is_current
+        )
+    """)
+    inserted = cur.rowcount
+
+    cur.execute(f"SELECT COUNT(*) FROM {dimension['source']}")
+    source_rows = cur.fetchone()[0]
+
+    return {
+        "inserted": inserted - versioned,
+        "versioned": versioned,
+        "retired": retired,
+        "unchanged": source_rows - inserted
+    }
+
+
+# ---------------------------------
+# FACT SALES
+# ---------------------------------
+def fact_high_water(cur):
+    # Staging rows production has applied to both transactions and items.
+    # Production write times cannot be used: a full production reload
+    # rewrites every row, which would make every fact look changed.
+    cur.execute("""
+        SELECT CASE WHEN COUNT(*) = 2 THEN MIN(last_loaded_at) END
+        FROM production.load_watermarks
+        WHERE table_name IN (
+            'production.transactions', 'production.transaction_items'
+        )
+    """)
+    return cur.fetchone()[0]
+
+
+def collect_changed_transactions(cur, since, high_water):
+    # Transactions loaded into staging in the window, directly or through
+    # one of their items. A replaced staging table reloads every row, so
+    # changed and deleted source files end in a full rebuild. Returns
+    # (changed, total) transaction counts.
+    cur.execute("""
+        CREATE TEMP TABLE fact_changes ON COMMIT DROP AS
+        SELECT transaction_id FROM staging.transactions
+        WHERE loaded_at > %(since)s AND loaded_at <= %(high_water)s
+        UNION
+        SELECT transaction_id FROM staging.transaction_items
+        WHERE loaded_at > %(since)s AND loaded_at <= %(high_water)s
+    """, {"since": since, "high_water": high_water})
+    changed = cur.rowcount
+    cur.execute("ANALYZE fact_changes")
+
+    cur.execute("SELECT COUNT(*) FROM production.transactions")
+    return changed, cur.fetchone()[0]
+
+
+def load_fact_changes(cur, kept_from):
+    # Replaces the facts of the collected transactions: the old rows of
+    # a changed transaction go, its current line items come in. The keys
+    # of both are kept in fact_touched for the aggregate refresh.
+    create_touched_keys(cur)
+
+    cur.execute("""
+        WITH removed AS (
+            DELETE FROM warehouse.fact_sales f
+            USING fact_changes c
+            WHERE f.transaction_id = c.transaction_id
+            RETURNING f.date_key, f.customer_key, f.product_key
+        )
+        INSERT INTO fact_touched SELECT * FROM removed
+    """)
+    replaced = cur.rowcount
 
+    insert = FACT_SALES_INSERT.format(filter="""
+        WHERE t.transaction_id IN (SELECT transaction_id FROM fact_changes)
+          AND t.transaction_date >= %(kept_from)s
+    """)
+    cur.execute(f"""
+        WITH added AS (
+            {insert}
+            RETURNING date_key, customer_key, product_key
+        )
+        INSERT INTO fact_touched SELECT * FROM added
+    """, {"kept_from": kept_from})
+    return {"rows_appended": cur.rowcount, "rows_replaced": replaced}
 
-def main():
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Load production data into the warehouse star schema"
+    )
+    parser.add_argument(
+        "--bulk", action="store_true", default=None,
+        help="Drop fact indexes and foreign keys during the reload, rebuild "
+             "and validate them afterwards, then ANALYZE "
+             "(default: pipeline.bulk_load)"
+    )
+    parser.add_argument(
+        "--no-bulk", dest="bulk", action="store_false",
+        help="Maintain fact indexes and foreign keys during the reload"
+    )
+    parser.add_argument(
+        "--full-rebuild", action="store_true",
+        help="Truncate and reload fact_sales from all of production instead "
+             "of loading transactions written since the last run"
+    )
+    parser.add_argument(
+        "--check-aggregates", action="store_true",
+        help="After the refresh, compare the agg_* tables with a full "
+             "recompute from fact_sales and fail on any difference"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = load_config()
+    bulk = args.bulk
+    if bulk is None:
+        bulk = config["pipeline"].get("bulk_load", False)
+    maintenance_workers = config["pipeline"].get("maintenance_workers", 2)
+
+    run_started = time.perf_counter()
     conn = get_connection()
     conn.autocommit = False
 
     summary = {
         "start_time": datetime.utcnow().isoformat(),
+        "bulk": bulk,
         "tables_loaded": {},
+        "table_metrics": {},
+        "row_counts": {},
         "status": "SUCCESS"
     }
 
     try:
         with conn.cursor() as cur:
 
+            # Facts written to production after this point wait for the
+            # next run
+            since = fetch_watermark(cur, "warehouse.fact_sales")
+            high_water = fact_high_water(cur)
+            full_rebuild = args.full_rebuild or since is None
+            if not full_rebuild:
+                changed, total = collect_changed_transactions(
+                    cur, since, high_water
+                )
+                full_rebuild = changed >= total * FULL_REBUILD_RATIO
+            bulk = bulk and full_rebuild
+            summary["bulk"] = bulk
+
+            # Captured from the catalog so the rebuild matches the DDL
+            deferred = {}
+            if bulk:
+                for table in BULK_TABLES:
+                    deferred[table] = secondary_structure(
+                        table_structure(cur, table)
+                    )
+                    drop_structure(cur, table, deferred[table])
+
             # ---------------------------------
             # DIM DATE
             # ---------------------------------
-            cur.execute("TRUNCATE TABLE warehouse.dim_date CASCADE")
-            cur.execute("""
-                INSERT INTO warehouse.dim_date (
-                    date_key, full_date, year, quarter, month, day,
-                    month_name, day_name, week_of_year, is_weekend
-                )
-                SELECT DISTINCT
-                    TO_CHAR(transaction_date, 'YYYYMMDD')::INTEGER AS date_key,
-                    transaction_date,
-                    EXTRACT(YEAR FROM transaction_date),
-                    EXTRACT(QUARTER FROM transaction_date),
-                    EXTRACT(MONTH FROM transaction_date),
-                    EXTRACT(DAY FROM transaction_date),
-                    TO_CHAR(transaction_date, 'Month'),
-                    TO_CHAR(transaction_date, 'Day'),
-                    EXTRACT(WEEK FROM transaction_date),
-                    CASE WHEN EXTRACT(DOW FROM transaction_date) IN (0,6)
-                         THEN TRUE ELSE FALSE END
-                FROM production.transactions
-            """)
+            with track_step(
+                logger, summary["table_metrics"], "warehouse.dim_date"
+            ) as step:
+                # Dimensions are only added to, so facts keep their keys
+                first_day, last_day = calendar_range(cur, config)
+                step.rows = ensure_calendar(cur, first_day, last_day)
+            summary["calendar"] = {
+                "start": first_day.isoformat(), "end": last_day.isoformat()
+            }
             summary["warehouse.dim_date"] = "SUCCESS"
 
             # ---------------------------------
             # DIM PAYMENT METHOD
             # ---------------------------------
-            cur.execute("TRUNCATE TABLE warehouse.dim_payment_method CASCADE")
-            cur.execute("""
-                INSERT INTO warehouse.dim_payment_method (
-                    payment_method_name, payment_type
-                )
-                SELECT DISTINCT
-                    payment_method,
-                    CASE
-                        WHEN payment_method IN ('UPI', 'Net Banking')
-                            THEN 'Online'
-                        ELSE 'Card/COD'
-                    END
-                FROM production.transactions
-            """)
+            with track_step(
+                logger, summary["table_metrics"], "warehouse.dim_payment_method"
+            ) as step:
+                cur.execute("""
+                    INSERT INTO warehouse.dim_payment_method (
+                        payment_method_name, payment_type
+                    )
+                    SELECT DISTINCT
+                        payment_method,
+                        CASE
+                            WHEN payment_method IN ('UPI', 'Net Banking')
+                                THEN 'Online'
+                            ELSE 'Card/COD'
+                        END
+                    FROM production.transactions t
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM warehouse.dim_payment_method d
+                        WHERE d.payment_method_name = t.payment_method
+                    )
+                """)
+                step.rows = cur.rowcount
             summary["warehouse.dim_payment_method"] = "SUCCESS"
 
             # ---------------------------------
-            # DIM CUSTOMERS (SCD READY)
+            # DIM CUSTOMERS / DIM PRODUCTS (SCD TYPE 2)
             # ---------------------------------
-            cur.execute("TRUNCATE TABLE warehouse.dim_customers CASCADE")
-            cur.execute("""
-                INSERT INTO warehouse.dim_customers (
-                    customer_id, full_name, email, city, state,
-                    country, age_group, customer_segment,
-                    registration_date, effective_date, is_current
-                )
-                SELECT
-                    customer_id,
-                    first_name || ' ' || last_name,
-                    email,
-                    city,
-                    state,
-                    country,
-                    age_group,
-                    CASE
-                        WHEN age_group IN ('18-25','26-35') THEN 'Young'
-                        WHEN age_group IN ('36-45') THEN 'Mid-age'
-                        ELSE 'Senior'
-                    END,
-                    registration_date,
-                    CURRENT_DATE,
-                    TRUE
-                FROM production.customers
-            """)
-            summary["warehouse.dim_customers"] = "SUCCESS"
+            for dimension in SCD2_DIMENSIONS:
+                with track_step(
+                    logger, summary["table_metrics"], dimension["table"]
+                ) as step:
+                    counts = apply_scd2(cur, dimension)
+                    step.rows = counts["inserted"] + counts["versioned"]
+                summary["row_counts"][dimension["table"]] = counts
+                summary[dimension["table"]] = "SUCCESS"
 
             # ---------------------------------
-            # DIM PRODUCTS (SCD READY)
+            # FACT SALES (LINE ITEM GRAIN)
             # ---------------------------------
-            cur.execute("TRUNCATE TABLE warehouse.dim_products CASCADE")
-            cur.execute("""
-                INSERT INTO warehouse.dim_products (
-                    product_id, product_name, category,
-                    sub_category, brand, price_range,
-                    effective_date, is_current
+            with track_step(
+                logger, summary["table_metrics"], "warehouse.fact_sales"
+            ) as step:
+                cur.execute("SET LOCAL enable_partitionwise_join = on")
+
+                # Every fact's date is in dim_date, so a partition per
+                # calendar month (past the archived ones) covers them all
+                archived_before = fetch_watermark(cur, ARCHIVE_WATERMARK)
+                kept_from = max(
+                    first_day,
+                    archived_before.date() if archived_before else first_day
                 )
-                SELECT
-                    product_id,
-                    product_name,
-                    category,
-                    sub_category,
-                    brand,
-                    CASE
-                        WHEN price < 100 THEN 'Budget'
-                        WHEN price BETWEEN 100 AND 500 THEN 'Mid-range'
-                        ELSE 'Premium'
-                    END,
-                    CURRENT_DATE,
-                    TRUE
-                FROM production.products
-            """)
-            summary["warehouse.dim_products"] = "SUCCESS"
+                summary["fact_partitions_created"] = ensure_monthly_partitions(
+                    cur, "warehouse.fact_sales",
+                    months_between(kept_from, last_day), bound=date_key
+                )
+
+                if full_rebuild:
+                    cur.execute("TRUNCATE TABLE warehouse.fact_sales CASCADE")
+                    # Date order keeps the BRIN index on date_key
+                    # selective within each partition
+                    cur.execute(FACT_SALES_INSERT.format(filter="""
+                        WHERE t.transaction_date >= %(kept_from)s
+                        ORDER BY t.transaction_date
+                    """), {"kept_from": kept_from})
+                    counts = {"rows_appended": cur.rowcount, "rows_replaced": 0}
+                else:
+                    counts = load_fact_changes(cur, kept_from)
+                step.rows = counts["rows_appended"]
+
+                if high_water is not None:
+                    save_watermark(cur, "warehouse.fact_sales", high_water)
+
+            summary["fact_load"] = {
+                "mode": "full" if full_rebuild else "incremental",
+                **counts,
+                "watermark": {
+                    "from": since.isoformat() if since else None,
+                    "to": high_water.isoformat() if high_water else None
+                }
+            }
+            summary["warehouse.fact_sales"] = "SUCCESS"
 
             # ---------------------------------
-            # FACT SALES (LINE ITEM GRAIN)
+            # AGGREGATES
             # ---------------------------------
-            cur.execute("TRUNCATE TABLE warehouse.fact_sales CASCADE")
-            cur.execute("""
-                INSERT INTO warehouse.fact_sales (
-                    date_key, customer_key, product_key,
-                    payment_method_key, transaction_id,
-                    quantity, unit_price, discount_amount,
-                    line_total, profit
+            with track_step(
+                logger, summary["table_metrics"], "aggregates"
+            ) as step:
+                # Aggregates that were never built need a full recompute
+                # even when facts load incrementally
+                counts = refresh_aggregates(
+                    cur,
+                    full=full_rebuild or fetch_watermark(
+                        cur, "warehouse.aggregates"
+                    ) is None
                 )
-                SELECT
-                    TO_CHAR(t.transaction_date, 'YYYYMMDD')::INTEGER,
-                    dc.customer_key,
-                    dp.product_key,
-                    dpm.payment_method_key,
-                    ti.transaction_id,
-                    ti.quantity,
-                    ti.unit_price,
-                    (ti.unit_price * ti.quantity) - ti.line_total,
-                    ti.line_total,
-                    ti.line_total - (ti.quantity * p.cost)
-                FROM production.transaction_items ti
-                JOIN production.transactions t
-                    ON ti.transaction_id = t.transaction_id
-                JOIN production.products p
-                    ON ti.product_id = p.product_id
-                JOIN warehouse.dim_customers dc
-                    ON dc.customer_id = t.customer_id AND dc.is_current = TRUE
-                JOIN warehouse.dim_products dp
-                    ON dp.product_id = ti.product_id AND dp.is_current = TRUE
-                JOIN warehouse.dim_payment_method dpm
-                    ON dpm.payment_method_name = t.payment_method
-            """)
-            summary["warehouse.fact_sales"] = "SUCCESS"
+                step.rows = sum(counts.values())
+
+                if high_water is not None:
+                    save_watermark(cur, "warehouse.aggregates", high_water)
+            summary["row_counts"].update(counts)
+
+            if args.check_aggregates:
+                mismatches = check_aggregates(cur)
+                summary["aggregate_mismatches"] = mismatches
+                if any(mismatches.values()):
+                    raise RuntimeError(
+                        f"Aggregates differ from fact_sales: {mismatches}"
+                    )
+
+            # ---------------------------------
+            # REBUILD DEFERRED INDEXES AND FKS
+            # ---------------------------------
+            if bulk:
+                with track_step(
+                    logger, summary["table_metrics"], "rebuild_indexes"
+                ):
+                    for table, structure in deferred.items():
+                        restore_structure(
+                            cur, table, structure, maintenance_workers
+                        )
+
+            summary["load_version"] = bump_load_version(cur)
 
         conn.commit()
 
+        if bulk:
+            with track_step(logger, summary["table_metrics"], "analyze"):
+                with conn.cursor() as cur:
+                    analyze_tables(cur, WAREHOUSE_TABLES)
+                conn.commit()
+
     except Exception as e:
         conn.rollback()
         summary["status"] = "FAILED"
@@ -181,6 +667,13 @@ def main():
     finally:
         conn.close()
         summary["end_time"] = datetime.utcnow().isoformat()
+        summary["duration_sec"] = round(time.perf_counter() - run_started, 3)
+        summary["peak_rss_mb"] = peak_rss_mb()
+        log_metrics(logger, "warehouse", {
+            "status": summary["status"],
+            "duration_sec": summary["duration_sec"],
+            "peak_rss_mb": summary["peak_rss_mb"]
+        })
 
         with open(SUMMARY_PATH, "w") as f:
             json.dump(summary, f, indent=4)
@@ -0,0 +1,109 @@
+import re
+from datetime import date
+
+# ---------------------------------
+# MONTHLY RANGE PARTITIONS
+# ---------------------------------
+# Partitions are named <table>_YYYY_MM and created on demand before rows
+# for that month are written, so no catch-all default partition is
+# needed. Tables keyed on something other than a DATE pass a function
+# turning a month's first day into the partition bound (e.g. a
+# YYYYMMDD integer date key).
+
+PARTITION_MONTH = re.compile(r"_(\d{4})_(\d{2})$")
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def next_month(day):
+    if day.month == 12:
+        return date(day.year + 1, 1, 1)
+    return date(day.year, day.month + 1, 1)
+
+
+def months_between(start, end):
+    # First days of every month from start's to end's, inclusive
+    months = []
+    month = month_start(start)
+    while month <= end:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+def partition_name(table_name, month):
+    return f"{table_name}_{month:%Y_%m}"
+
+
+def partition_month(name):
+    # Inverse of partition_name; None for names without a month suffix
+    match = PARTITION_MONTH.search(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def ensure_monthly_partitions(cur, table_name, months, bound=None):
+    # Returns the partitions that had to be created
+    bound = bound or (lambda day: day)
+    created = []
+    for month in sorted({month_start(m) for m in months}):
+        name = partition_name(table_name, month)
+        cur.execute("SELECT to_regclass(%s)", (name,))
+        if cur.fetchone()[0] is not None:
+            continue
+
+        cur.execute(
+            f"CREATE TABLE {name} PARTITION OF {table_name} "
+            "FOR VALUES FROM (%s) TO (%s)",
+            (bound(month), bound(next_month(month)))
+        )
+        created.append(name)
+
+    return created
+
+
+def list_partitions(cur, table_name):
+    # [(partition, lower bound, upper bound)] ordered by range
+    cur.execute("""
+        SELECT
+            n.nspname || '.' || c.relname,
+            pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE i.inhparent = %s::regclass
+        ORDER BY 2
+    """, (table_name,))
+    return cur.fetchall()
+
+
+def is_partitioned(cur, table_name):
+    cur.execute(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = %s::regclass",
+        (table_name,)
+    )
+    return cur.fetchone()[0]
+
+
+def archive_partitions(cur, table_name, before, archive_schema=None):
+    # Detaches the monthly partitions wholly before the given month. They
+    # are moved to archive_schema (still queryable there) or dropped when
+    # no schema is given. Returns the detached partition names.
+    archived = []
+    for name, _ in list_partitions(cur, table_name):
+        month = partition_month(name)
+        if month is None or month >= month_start(before):
+            continue
+
+        cur.execute(f"ALTER TABLE {table_name} DETACH PARTITION {name}")
+        if archive_schema:
+            cur.execute(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}")
+            cur.execute(f"ALTER TABLE {name} SET SCHEMA {archive_schema}")
+        else:
+            cur.execute(f"DROP TABLE {name}")
+        archived.append(name)
+
+    return archived
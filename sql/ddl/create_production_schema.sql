@@ -18,6 +18,7 @@ CREATE TABLE IF NOT EXISTS production.customers (
     state VARCHAR(100),
     country VARCHAR(50),
     age_group VARCHAR(20),
+    row_hash CHAR(32),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -35,6 +36,7 @@ CREATE TABLE IF NOT EXISTS production.products (
     brand VARCHAR(100),
     stock_quantity INTEGER CHECK (stock_quantity >= 0),
     supplier_id VARCHAR(20),
+    row_hash CHAR(32),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     CHECK (cost < price)
@@ -42,9 +44,11 @@ CREATE TABLE IF NOT EXISTS production.products (
 
 -- ============================================
 -- PRODUCTION.TRANSACTIONS
+-- Range partitioned by month on transaction_date; monthly partitions
+-- (production.transactions_YYYY_MM) are created by the production load
 -- ============================================
 CREATE TABLE IF NOT EXISTS production.transactions (
-    transaction_id VARCHAR(20) PRIMARY KEY,
+    transaction_id VARCHAR(20) NOT NULL,
     customer_id VARCHAR(20) NOT NULL,
     transaction_date DATE NOT NULL,
     transaction_time TIME,
@@ -53,17 +57,21 @@ CREATE TABLE IF NOT EXISTS production.transactions (
     total_amount DECIMAL(12,2) NOT NULL CHECK (total_amount >= 0),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (transaction_id, transaction_date),
     CONSTRAINT fk_transactions_customer
         FOREIGN KEY (customer_id)
         REFERENCES production.customers (customer_id)
-);
+) PARTITION BY RANGE (transaction_date);
 
 -- ============================================
 -- PRODUCTION.TRANSACTION_ITEMS
+-- Carries its transaction's date so items share the transactions'
+-- monthly partitioning; a corrected transaction date moves its items
 -- ============================================
 CREATE TABLE IF NOT EXISTS production.transaction_items (
-    item_id VARCHAR(20) PRIMARY KEY,
+    item_id VARCHAR(20) NOT NULL,
     transaction_id VARCHAR(20) NOT NULL,
+    transaction_date DATE NOT NULL,
     product_id VARCHAR(20) NOT NULL,
     quantity INTEGER NOT NULL CHECK (quantity > 0),
     unit_price DECIMAL(10,2) NOT NULL CHECK (unit_price >= 0),
@@ -71,12 +79,24 @@ CREATE TABLE IF NOT EXISTS production.transaction_items (
     line_total DECIMAL(12,2) NOT NULL CHECK (line_total >= 0),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (item_id, transaction_date),
     CONSTRAINT fk_items_transaction
-        FOREIGN KEY (transaction_id)
-        REFERENCES production.transactions (transaction_id),
+        FOREIGN KEY (transaction_id, transaction_date)
+        REFERENCES production.transactions (transaction_id, transaction_date),
     CONSTRAINT fk_items_product
         FOREIGN KEY (product_id)
         REFERENCES production.products (product_id)
+) PARTITION BY RANGE (transaction_date);
+
+-- ============================================
+-- PRODUCTION.LOAD_WATERMARKS
+-- Latest staging loaded_at applied to each production table, used by
+-- the incremental load mode
+-- ============================================
+CREATE TABLE IF NOT EXISTS production.load_watermarks (
+    table_name VARCHAR(100) PRIMARY KEY,
+    last_loaded_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- ============================================
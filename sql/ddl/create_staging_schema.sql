@@ -21,6 +21,7 @@ CREATE TABLE IF NOT EXISTS staging.customers (
     state VARCHAR(100),
     country VARCHAR(50),
     age_group VARCHAR(20),
+    row_hash CHAR(32),
     loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -37,6 +38,7 @@ CREATE TABLE IF NOT EXISTS staging.products (
     brand VARCHAR(100),
     stock_quantity INTEGER,
     supplier_id VARCHAR(20),
+    row_hash CHAR(32),
     loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -67,3 +69,35 @@ CREATE TABLE IF NOT EXISTS staging.transaction_items (
     line_total DECIMAL(12,2),
     loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+
+-- ============================================
+-- LOADED_AT INDEXES
+-- Block-range indexes let incremental production loads skip staging
+-- data published before the last watermark at almost no load cost
+-- ============================================
+CREATE INDEX IF NOT EXISTS idx_staging_customers_loaded_at
+    ON staging.customers USING BRIN (loaded_at);
+
+CREATE INDEX IF NOT EXISTS idx_staging_products_loaded_at
+    ON staging.products USING BRIN (loaded_at);
+
+CREATE INDEX IF NOT EXISTS idx_staging_transactions_loaded_at
+    ON staging.transactions USING BRIN (loaded_at);
+
+CREATE INDEX IF NOT EXISTS idx_staging_items_loaded_at
+    ON staging.transaction_items USING BRIN (loaded_at);
+
+-- ============================================
+-- STAGING.LOAD_MANIFEST
+-- One row per raw file (or part) loaded into staging, used to skip
+-- unchanged files and to load only the new tail of append-only files
+-- ============================================
+CREATE TABLE IF NOT EXISTS staging.load_manifest (
+    file_name VARCHAR(255) PRIMARY KEY,
+    table_name VARCHAR(100) NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    file_size BIGINT NOT NULL,
+    file_mtime TIMESTAMP,
+    row_count BIGINT NOT NULL,
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -39,6 +39,13 @@ CREATE TABLE IF NOT EXISTS warehouse.dim_products (
     is_current BOOLEAN DEFAULT TRUE
 );
 
+-- One current version per business key; also serves the SCD2 lookups
+CREATE UNIQUE INDEX IF NOT EXISTS idx_dim_customers_current
+    ON warehouse.dim_customers (customer_id) WHERE is_current;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_dim_products_current
+    ON warehouse.dim_products (product_id) WHERE is_current;
+
 -- ============================================
 -- DIMENSION: DATE
 -- ============================================
@@ -67,9 +74,12 @@ CREATE TABLE IF NOT EXISTS warehouse.dim_payment_method (
 
 -- ============================================
 -- FACT TABLE: SALES (LINE ITEM GRAIN)
+-- Range partitioned by month on date_key; monthly partitions
+-- (warehouse.fact_sales_YYYY_MM) are created by the warehouse load for
+-- every month of dim_date
 -- ============================================
 CREATE TABLE IF NOT EXISTS warehouse.fact_sales (
-    sales_key BIGSERIAL PRIMARY KEY,
+    sales_key BIGSERIAL,
     date_key INTEGER NOT NULL,
     customer_key INTEGER NOT NULL,
     product_key INTEGER NOT NULL,
@@ -81,6 +91,7 @@ CREATE TABLE IF NOT EXISTS warehouse.fact_sales (
     line_total DECIMAL(12,2),
     profit DECIMAL(12,2),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (sales_key, date_key),
     CONSTRAINT fk_fact_date
         FOREIGN KEY (date_key)
         REFERENCES warehouse.dim_date (date_key),
@@ -93,6 +104,28 @@ CREATE TABLE IF NOT EXISTS warehouse.fact_sales (
     CONSTRAINT fk_fact_payment
         FOREIGN KEY (payment_method_key)
         REFERENCES warehouse.dim_payment_method (payment_method_key)
+) PARTITION BY RANGE (date_key);
+
+-- ============================================
+-- LOAD WATERMARKS
+-- Latest staging loaded_at (as applied by the production load) taken
+-- into each incrementally loaded warehouse table
+-- ============================================
+CREATE TABLE IF NOT EXISTS warehouse.load_watermarks (
+    table_name VARCHAR(100) PRIMARY KEY,
+    last_loaded_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ============================================
+-- LOAD VERSION
+-- Single row bumped by every committed warehouse load; cached query
+-- results are keyed on it
+-- ============================================
+CREATE TABLE IF NOT EXISTS warehouse.load_version (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version BIGINT NOT NULL,
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- ============================================
@@ -131,8 +164,11 @@ CREATE TABLE IF NOT EXISTS warehouse.agg_customer_metrics (
 -- ============================================
 -- INDEXES FOR PERFORMANCE
 -- ============================================
+-- Facts arrive in date order, so a BRIN index on date_key stays
+-- selective within each partition at a fraction of a B-tree's size.
+-- The other keys are not correlated with row order and keep B-trees.
 CREATE INDEX IF NOT EXISTS idx_fact_sales_date
-    ON warehouse.fact_sales (date_key);
+    ON warehouse.fact_sales USING BRIN (date_key);
 
 CREATE INDEX IF NOT EXISTS idx_fact_sales_customer
     ON warehouse.fact_sales (customer_key);
@@ -142,3 +178,7 @@ CREATE INDEX IF NOT EXISTS idx_fact_sales_product
 
 CREATE INDEX IF NOT EXISTS idx_fact_sales_payment
     ON warehouse.fact_sales (payment_method_key);
+
+-- Incremental loads replace facts by transaction
+CREATE INDEX IF NOT EXISTS idx_fact_sales_transaction
+    ON warehouse.fact_sales (transaction_id);
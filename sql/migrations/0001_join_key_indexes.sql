@@ -0,0 +1,8 @@
+-- ============================================
+-- JOIN KEY INDEXES
+-- The warehouse load looks payment methods up by name, both to add new
+-- ones and to build fact_sales. Names are unique by construction (the
+-- load only inserts names it does not have yet); the index enforces it.
+-- ============================================
+CREATE UNIQUE INDEX IF NOT EXISTS idx_dim_payment_method_name
+    ON warehouse.dim_payment_method (payment_method_name);
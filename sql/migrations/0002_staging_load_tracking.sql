@@ -0,0 +1,47 @@
+-- ============================================
+-- STAGING LOAD TRACKING
+-- Brings staging schemas created before the load manifest, the row
+-- hashes and the loaded_at indexes up to sql/ddl. A no-op on databases
+-- created from the current DDL.
+-- ============================================
+ALTER TABLE staging.customers ADD COLUMN IF NOT EXISTS row_hash CHAR(32);
+ALTER TABLE staging.products ADD COLUMN IF NOT EXISTS row_hash CHAR(32);
+
+-- Rows loaded before the column existed; same expression as
+-- row_hash_expression() in scripts/ingestion/load_to_staging.py
+UPDATE staging.customers
+SET row_hash = md5(ROW(
+    customer_id, first_name, last_name, email, phone, registration_date,
+    city, state, country, age_group
+)::text)
+WHERE row_hash IS NULL;
+
+UPDATE staging.products
+SET row_hash = md5(ROW(
+    product_id, product_name, category, sub_category, price, cost, brand,
+    stock_quantity, supplier_id
+)::text)
+WHERE row_hash IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_staging_customers_loaded_at
+    ON staging.customers USING BRIN (loaded_at);
+
+CREATE INDEX IF NOT EXISTS idx_staging_products_loaded_at
+    ON staging.products USING BRIN (loaded_at);
+
+CREATE INDEX IF NOT EXISTS idx_staging_transactions_loaded_at
+    ON staging.transactions USING BRIN (loaded_at);
+
+CREATE INDEX IF NOT EXISTS idx_staging_items_loaded_at
+    ON staging.transaction_items USING BRIN (loaded_at);
+
+-- Empty: the next staging load reloads every raw file once and records it
+CREATE TABLE IF NOT EXISTS staging.load_manifest (
+    file_name VARCHAR(255) PRIMARY KEY,
+    table_name VARCHAR(100) NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    file_size BIGINT NOT NULL,
+    file_mtime TIMESTAMP,
+    row_count BIGINT NOT NULL,
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,158 @@
+-- ============================================
+-- PRODUCTION PARTITIONING
+-- Brings production schemas created before monthly partitioning up to
+-- sql/ddl: row hashes, load watermarks, and transactions and items
+-- range partitioned on transaction_date with (id, date) primary keys.
+-- Unpartitioned tables are renamed aside, copied into the partitioned
+-- ones (items take their transaction's date) and dropped. A no-op on
+-- databases created from the current DDL.
+-- ============================================
+ALTER TABLE production.customers ADD COLUMN IF NOT EXISTS row_hash CHAR(32);
+ALTER TABLE production.products ADD COLUMN IF NOT EXISTS row_hash CHAR(32);
+
+CREATE TABLE IF NOT EXISTS production.load_watermarks (
+    table_name VARCHAR(100) PRIMARY KEY,
+    last_loaded_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+DO $$
+DECLARE
+    old_index RECORD;
+    old_check RECORD;
+    month DATE;
+BEGIN
+    IF (SELECT relkind FROM pg_class
+        WHERE oid = 'production.transactions'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    -- Index names are schema-wide and generated constraint names avoid
+    -- the old ones, so both move aside as well
+    ALTER TABLE production.transaction_items
+        RENAME TO transaction_items_unpartitioned;
+    ALTER TABLE production.transactions
+        RENAME TO transactions_unpartitioned;
+    FOR old_index IN
+        SELECT i.indexrelid::regclass AS index_name, c.relname
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid IN (
+            'production.transactions_unpartitioned'::regclass,
+            'production.transaction_items_unpartitioned'::regclass
+        )
+    LOOP
+        EXECUTE format(
+            'ALTER INDEX %s RENAME TO %I',
+            old_index.index_name, old_index.relname || '_unpartitioned'
+        );
+    END LOOP;
+    FOR old_check IN
+        SELECT conrelid::regclass AS table_name, conname
+        FROM pg_constraint
+        WHERE contype = 'c'
+          AND conrelid IN (
+            'production.transactions_unpartitioned'::regclass,
+            'production.transaction_items_unpartitioned'::regclass
+        )
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE %s RENAME CONSTRAINT %I TO %I',
+            old_check.table_name, old_check.conname,
+            old_check.conname || '_unpartitioned'
+        );
+    END LOOP;
+
+    CREATE TABLE production.transactions (
+        transaction_id VARCHAR(20) NOT NULL,
+        customer_id VARCHAR(20) NOT NULL,
+        transaction_date DATE NOT NULL,
+        transaction_time TIME,
+        payment_method VARCHAR(50) NOT NULL,
+        shipping_address TEXT,
+        total_amount DECIMAL(12,2) NOT NULL CHECK (total_amount >= 0),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (transaction_id, transaction_date),
+        CONSTRAINT fk_transactions_customer
+            FOREIGN KEY (customer_id)
+            REFERENCES production.customers (customer_id)
+    ) PARTITION BY RANGE (transaction_date);
+
+    CREATE TABLE production.transaction_items (
+        item_id VARCHAR(20) NOT NULL,
+        transaction_id VARCHAR(20) NOT NULL,
+        transaction_date DATE NOT NULL,
+        product_id VARCHAR(20) NOT NULL,
+        quantity INTEGER NOT NULL CHECK (quantity > 0),
+        unit_price DECIMAL(10,2) NOT NULL CHECK (unit_price >= 0),
+        discount_percentage DECIMAL(5,2) CHECK (discount_percentage BETWEEN 0 AND 100),
+        line_total DECIMAL(12,2) NOT NULL CHECK (line_total >= 0),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (item_id, transaction_date),
+        CONSTRAINT fk_items_transaction
+            FOREIGN KEY (transaction_id, transaction_date)
+            REFERENCES production.transactions (transaction_id, transaction_date),
+        CONSTRAINT fk_items_product
+            FOREIGN KEY (product_id)
+            REFERENCES production.products (product_id)
+    ) PARTITION BY RANGE (transaction_date);
+
+    -- Same <table>_YYYY_MM partitions as scripts/transformation/partitions.py
+    FOR month IN
+        SELECT DISTINCT date_trunc('month', transaction_date)::DATE
+        FROM production.transactions_unpartitioned
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE production.%I PARTITION OF production.transactions '
+            'FOR VALUES FROM (%L) TO (%L)',
+            'transactions_' || to_char(month, 'YYYY_MM'),
+            month, (month + INTERVAL '1 month')::DATE
+        );
+        EXECUTE format(
+            'CREATE TABLE production.%I PARTITION OF production.transaction_items '
+            'FOR VALUES FROM (%L) TO (%L)',
+            'transaction_items_' || to_char(month, 'YYYY_MM'),
+            month, (month + INTERVAL '1 month')::DATE
+        );
+    END LOOP;
+
+    INSERT INTO production.transactions (
+        transaction_id, customer_id, transaction_date, transaction_time,
+        payment_method, shipping_address, total_amount, created_at,
+        updated_at
+    )
+    SELECT
+        transaction_id, customer_id, transaction_date, transaction_time,
+        payment_method, shipping_address, total_amount, created_at,
+        updated_at
+    FROM production.transactions_unpartitioned;
+
+    INSERT INTO production.transaction_items (
+        item_id, transaction_id, transaction_date, product_id, quantity,
+        unit_price, discount_percentage, line_total, created_at, updated_at
+    )
+    SELECT
+        i.item_id, i.transaction_id, t.transaction_date, i.product_id,
+        i.quantity, i.unit_price, i.discount_percentage, i.line_total,
+        i.created_at, i.updated_at
+    FROM production.transaction_items_unpartitioned i
+    JOIN production.transactions_unpartitioned t
+        ON t.transaction_id = i.transaction_id;
+
+    DROP TABLE production.transaction_items_unpartitioned;
+    DROP TABLE production.transactions_unpartitioned;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_transactions_customer
+    ON production.transactions (customer_id);
+
+CREATE INDEX IF NOT EXISTS idx_transactions_date
+    ON production.transactions (transaction_date);
+
+CREATE INDEX IF NOT EXISTS idx_items_transaction
+    ON production.transaction_items (transaction_id);
+
+CREATE INDEX IF NOT EXISTS idx_items_product
+    ON production.transaction_items (product_id);
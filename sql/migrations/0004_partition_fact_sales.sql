@@ -0,0 +1,137 @@
+-- ============================================
+-- WAREHOUSE PARTITIONING
+-- Brings warehouse schemas created before monthly fact partitioning up
+-- to sql/ddl: one current version per dimension key, load watermarks
+-- and version, and fact_sales range partitioned on date_key with a
+-- (sales_key, date_key) primary key and a BRIN date index. An
+-- unpartitioned fact_sales is renamed aside, copied into the
+-- partitioned one with its sales keys and dropped. A no-op on databases
+-- created from the current DDL.
+-- ============================================
+CREATE UNIQUE INDEX IF NOT EXISTS idx_dim_customers_current
+    ON warehouse.dim_customers (customer_id) WHERE is_current;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_dim_products_current
+    ON warehouse.dim_products (product_id) WHERE is_current;
+
+CREATE TABLE IF NOT EXISTS warehouse.load_watermarks (
+    table_name VARCHAR(100) PRIMARY KEY,
+    last_loaded_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS warehouse.load_version (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version BIGINT NOT NULL,
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+DO $$
+DECLARE
+    old_index RECORD;
+    month DATE;
+BEGIN
+    IF (SELECT relkind FROM pg_class
+        WHERE oid = 'warehouse.fact_sales'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    -- Index and sequence names are schema-wide, so the old ones move
+    -- aside as well
+    ALTER TABLE warehouse.fact_sales RENAME TO fact_sales_unpartitioned;
+    ALTER SEQUENCE warehouse.fact_sales_sales_key_seq
+        RENAME TO fact_sales_unpartitioned_sales_key_seq;
+    FOR old_index IN
+        SELECT i.indexrelid::regclass AS index_name, c.relname
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = 'warehouse.fact_sales_unpartitioned'::regclass
+    LOOP
+        EXECUTE format(
+            'ALTER INDEX %s RENAME TO %I',
+            old_index.index_name, old_index.relname || '_unpartitioned'
+        );
+    END LOOP;
+
+    CREATE TABLE warehouse.fact_sales (
+        sales_key BIGSERIAL,
+        date_key INTEGER NOT NULL,
+        customer_key INTEGER NOT NULL,
+        product_key INTEGER NOT NULL,
+        payment_method_key INTEGER NOT NULL,
+        transaction_id VARCHAR(20),
+        quantity INTEGER,
+        unit_price DECIMAL(10,2),
+        discount_amount DECIMAL(10,2),
+        line_total DECIMAL(12,2),
+        profit DECIMAL(12,2),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (sales_key, date_key),
+        CONSTRAINT fk_fact_date
+            FOREIGN KEY (date_key)
+            REFERENCES warehouse.dim_date (date_key),
+        CONSTRAINT fk_fact_customer
+            FOREIGN KEY (customer_key)
+            REFERENCES warehouse.dim_customers (customer_key),
+        CONSTRAINT fk_fact_product
+            FOREIGN KEY (product_key)
+            REFERENCES warehouse.dim_products (product_key),
+        CONSTRAINT fk_fact_payment
+            FOREIGN KEY (payment_method_key)
+            REFERENCES warehouse.dim_payment_method (payment_method_key)
+    ) PARTITION BY RANGE (date_key);
+
+    -- Partitions for the months holding facts; the next warehouse load
+    -- adds the rest of dim_date's months. YYYYMMDD bounds as in
+    -- date_key() of scripts/transformation/load_to_warehouse.py.
+    FOR month IN
+        SELECT DISTINCT date_trunc(
+            'month', to_date(date_key::TEXT, 'YYYYMMDD')
+        )::DATE
+        FROM warehouse.fact_sales_unpartitioned
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE warehouse.%I PARTITION OF warehouse.fact_sales '
+            'FOR VALUES FROM (%s) TO (%s)',
+            'fact_sales_' || to_char(month, 'YYYY_MM'),
+            to_char(month, 'YYYYMMDD'),
+            to_char(month + INTERVAL '1 month', 'YYYYMMDD')
+        );
+    END LOOP;
+
+    -- Date order keeps the BRIN index on date_key selective
+    INSERT INTO warehouse.fact_sales (
+        sales_key, date_key, customer_key, product_key, payment_method_key,
+        transaction_id, quantity, unit_price, discount_amount, line_total,
+        profit, created_at
+    )
+    SELECT
+        sales_key, date_key, customer_key, product_key, payment_method_key,
+        transaction_id, quantity, unit_price, discount_amount, line_total,
+        profit, created_at
+    FROM warehouse.fact_sales_unpartitioned
+    ORDER BY date_key;
+
+    PERFORM setval(
+        'warehouse.fact_sales_sales_key_seq',
+        COALESCE((SELECT MAX(sales_key) FROM warehouse.fact_sales), 0) + 1,
+        false
+    );
+
+    DROP TABLE warehouse.fact_sales_unpartitioned;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_fact_sales_date
+    ON warehouse.fact_sales USING BRIN (date_key);
+
+CREATE INDEX IF NOT EXISTS idx_fact_sales_customer
+    ON warehouse.fact_sales (customer_key);
+
+CREATE INDEX IF NOT EXISTS idx_fact_sales_product
+    ON warehouse.fact_sales (product_key);
+
+CREATE INDEX IF NOT EXISTS idx_fact_sales_payment
+    ON warehouse.fact_sales (payment_method_key);
+
+CREATE INDEX IF NOT EXISTS idx_fact_sales_transaction
+    ON warehouse.fact_sales (transaction_id);
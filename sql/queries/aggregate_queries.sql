@@ -0,0 +1,102 @@
+-- ============================================
+-- AGGREGATE REWRITES OF ANALYTICAL QUERIES
+-- Each query returns the same rows as the query with the same number
+-- and title in analytical_queries.sql, read from an agg_* table instead
+-- of fact_sales. scripts/analytics/query_runner.py picks the smallest
+-- up-to-date source; queries without a rewrite here (5 and 10 need
+-- line level data) always read fact_sales.
+-- ============================================
+
+-- 1. Top 10 Products by Revenue
+SELECT
+    p.product_name,
+    p.category,
+    SUM(a.total_revenue) AS total_revenue,
+    SUM(a.total_quantity_sold) AS units_sold
+FROM warehouse.agg_product_performance a
+JOIN warehouse.dim_products p
+    ON a.product_key = p.product_key
+GROUP BY p.product_name, p.category
+ORDER BY total_revenue DESC
+LIMIT 10;
+
+-- 2. Monthly Sales Trend
+-- A transaction falls on a single date, so daily counts add up
+SELECT
+    d.year,
+    d.month,
+    SUM(a.total_revenue) AS monthly_revenue,
+    SUM(a.total_transactions) AS total_transactions
+FROM warehouse.agg_daily_sales a
+JOIN warehouse.dim_date d
+    ON a.date_key = d.date_key
+GROUP BY d.year, d.month
+ORDER BY d.year, d.month;
+
+-- 3. Customer Segmentation by Spend
+SELECT
+    CASE
+        WHEN a.total_spent < 1000 THEN 'Low'
+        WHEN a.total_spent BETWEEN 1000 AND 5000 THEN 'Medium'
+        ELSE 'High'
+    END AS customer_segment,
+    COUNT(*) AS customer_count,
+    SUM(a.total_spent) AS total_revenue
+FROM warehouse.agg_customer_metrics a
+GROUP BY customer_segment;
+
+-- 4. Category Performance
+SELECT
+    p.category,
+    SUM(a.total_revenue) AS revenue,
+    SUM(a.total_profit) AS total_profit
+FROM warehouse.agg_product_performance a
+JOIN warehouse.dim_products p
+    ON a.product_key = p.product_key
+GROUP BY p.category
+ORDER BY revenue DESC;
+
+-- 6. Geographic Revenue Analysis
+SELECT
+    c.state,
+    SUM(a.total_spent) AS total_revenue,
+    COUNT(*) AS customers
+FROM warehouse.agg_customer_metrics a
+JOIN warehouse.dim_customers c
+    ON a.customer_key = c.customer_key
+GROUP BY c.state
+ORDER BY total_revenue DESC;
+
+-- 7. Customer Lifetime Value
+-- A transaction belongs to a single customer version, so counts add up
+SELECT
+    c.customer_id,
+    c.full_name,
+    SUM(a.total_spent) AS lifetime_value,
+    SUM(a.total_transactions) AS total_transactions
+FROM warehouse.agg_customer_metrics a
+JOIN warehouse.dim_customers c
+    ON a.customer_key = c.customer_key
+GROUP BY c.customer_id, c.full_name
+ORDER BY lifetime_value DESC;
+
+-- 8. Product Profitability
+SELECT
+    p.product_name,
+    SUM(a.total_profit) AS total_profit,
+    SUM(a.total_revenue) AS revenue
+FROM warehouse.agg_product_performance a
+JOIN warehouse.dim_products p
+    ON a.product_key = p.product_key
+GROUP BY p.product_name
+ORDER BY total_profit DESC;
+
+-- 9. Day-of-Week Sales Pattern
+SELECT
+    d.day_name,
+    SUM(a.total_revenue) AS revenue
+FROM warehouse.agg_daily_sales a
+JOIN warehouse.dim_date d
+    ON a.date_key = d.date_key
+GROUP BY d.day_name
+ORDER BY revenue DESC;
@@ -26,13 +26,17 @@ ORDER BY d.year, d.month;
 -- 3. Customer Segmentation by Spend
 SELECT
     CASE
-        WHEN SUM(f.line_total) < 1000 THEN 'Low'
-        WHEN SUM(f.line_total) BETWEEN 1000 AND 5000 THEN 'Medium'
+        WHEN c.total_spent < 1000 THEN 'Low'
+        WHEN c.total_spent BETWEEN 1000 AND 5000 THEN 'Medium'
         ELSE 'High'
     END AS customer_segment,
-    COUNT(DISTINCT f.customer_key) AS customer_count,
-    SUM(f.line_total) AS total_revenue
-FROM warehouse.fact_sales f
+    COUNT(*) AS customer_count,
+    SUM(c.total_spent) AS total_revenue
+FROM (
+    SELECT f.customer_key, SUM(f.line_total) AS total_spent
+    FROM warehouse.fact_sales f
+    GROUP BY f.customer_key
+) c
 GROUP BY customer_segment;
 
 -- 4. Category Performance
@@ -110,5 +114,13 @@ SELECT
     END AS discount_range,
     SUM(f.quantity) AS units_sold,
     SUM(f.line_total) AS revenue
-FROM warehouse.fact_sales f
+FROM (
+    -- fact_sales stores the discount amount, not the percentage
+    SELECT
+        quantity,
+        line_total,
+        discount_amount / NULLIF(unit_price * quantity, 0) * 100
+            AS discount_percentage
+    FROM warehouse.fact_sales
+) f
 GROUP BY discount_range;
@@ -45,3 +45,138 @@ def test_line_total_calculation():
         items["line_total"],
         atol=0.01
     )
+
+
+def test_transaction_items_generator_totals_and_ids():
+    from scripts.data_generation.generate_data import (
+        generate_transaction_items
+    )
+
+    products = pd.DataFrame({
+        "product_id": [f"PROD{i:04d}" for i in range(1, 51)],
+        "price": np.linspace(10, 500, 50).round(2)
+    })
+    transactions = pd.DataFrame({
+        "transaction_id": [f"TXN{i:05d}" for i in range(1, 2001)],
+        "total_amount": 0.0
+    })
+
+    items = generate_transaction_items(transactions, products)
+
+    assert items["item_id"].is_unique
+    assert items["item_id"].iloc[0] == "ITEM00001"
+    assert items["quantity"].between(1, 4).all()
+    assert items.groupby("transaction_id").size().between(1, 5).all()
+    assert not items.duplicated(["transaction_id", "product_id"]).any()
+
+    totals = items.groupby("transaction_id")["line_total"].sum()
+    assert np.allclose(
+        transactions.set_index("transaction_id")["total_amount"],
+        totals.reindex(transactions["transaction_id"]),
+        atol=0.01
+    )
+
+
+def test_sharded_generation_is_reproducible(tmp_path, monkeypatch):
+    from scripts.data_generation import generate_data
+
+    monkeypatch.setitem(generate_data.config, "data_generation", {
+        **generate_data.config["data_generation"],
+        "customers": 50,
+        "products": 20,
+        "transactions": 300
+    })
+
+    outputs = []
+    for run in ("a", "b"):
+        run_dir = tmp_path / run
+        run_dir.mkdir()
+        monkeypatch.setattr(generate_data, "RAW_DATA_PATH", str(run_dir))
+
+        result = generate_data.generate_dataset(shards=3, workers=1, seed=11)
+        assert result["referential_integrity"]["status"] == "PASS"
+        assert len(result["shards"]) == 3
+
+        outputs.append({
+            path.name: path.read_bytes() for path in run_dir.glob("*.csv")
+        })
+
+    assert len(outputs[0]) == 12
+    assert outputs[0] == outputs[1]
+
+    items = pd.concat(
+        pd.read_csv(tmp_path / "a" / f"transaction_items-{shard:05d}.csv")
+        for shard in range(3)
+    )
+    assert items["item_id"].is_unique
+
+
+def test_shard_integrity_checks_written_customers(tmp_path):
+    from scripts.data_generation.generate_data import (
+        generate_transaction_shard
+    )
+
+    # A customers shard that wrote only half of the global ID range
+    task = {
+        "shard": 0, "seed": 3, "start_id": 1, "count": 200,
+        "batch_size": None, "pools": None,
+        "path": str(tmp_path / "transactions.csv"),
+        "items_path": str(tmp_path / "transaction_items.csv"),
+        "num_customers": 10,
+        "customer_ids": pd.DataFrame({
+            "customer_id": [f"CUST{i:04d}" for i in range(1, 6)]
+        }),
+        "prices": pd.DataFrame({
+            "product_id": ["PROD0001", "PROD0002"], "price": [10.0, 20.0]
+        })
+    }
+
+    integrity = generate_transaction_shard(task)["integrity"]
+    assert integrity["orphan_transactions"] > 0
+    assert integrity["status"] == "FAIL"
+
+
+def test_transaction_batches_have_contiguous_ids():
+    from scripts.data_generation.generate_data import (
+        generate_transaction_batches
+    )
+
+    customers = pd.DataFrame({"customer_id": ["CUST0001", "CUST0002"]})
+    products = pd.DataFrame({
+        "product_id": [f"PROD{i:04d}" for i in range(1, 11)],
+        "price": np.arange(1, 11) * 10.0
+    })
+
+    batches = list(generate_transaction_batches(
+        250, customers, products, start_id=1, batch_size=100
+    ))
+    assert [len(txn) for txn, _ in batches] == [100, 100, 50]
+
+    items = pd.concat(items for _, items in batches)
+    assert list(items["item_id"]) == [
+        f"ITEM{i:05d}" for i in range(1, len(items) + 1)
+    ]
+
+
+def test_value_pools_are_cached_and_switchable(tmp_path):
+    from scripts.data_generation.generate_data import (
+        build_value_pools, generate_customers
+    )
+
+    pool_config = {
+        "cache_dir": str(tmp_path),
+        "sizes": {"first_name": 20, "city": 10, "state": 0}
+    }
+
+    pools = build_value_pools(pool_config, seed=3)
+    assert set(pools) == {"first_name", "city"}
+    assert len(set(pools["first_name"])) == len(pools["first_name"]) == 20
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+    cached = build_value_pools(pool_config, seed=3)
+    assert list(cached["city"]) == list(pools["city"])
+
+    customers = generate_customers(200, pools=pools)
+    assert customers["first_name"].isin(pools["first_name"]).all()
+    assert customers["city"].isin(pools["city"]).all()
+    assert customers["state"].notna().all()
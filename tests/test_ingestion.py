@@ -32,3 +32,118 @@ def test_staging_tables_exist():
         assert count > 0
 
     conn.close()
+
+
+def test_staging_columns_follow_ddl():
+    from scripts.ingestion.load_to_staging import load_staging_columns
+
+    columns = load_staging_columns()
+
+    assert list(columns)[:4] == [
+        "staging.customers",
+        "staging.products",
+        "staging.transactions",
+        "staging.transaction_items",
+    ]
+    assert columns["staging.products"][-1] == "supplier_id"
+    assert "loaded_at" not in columns["staging.transaction_items"]
+
+
+def test_csv_chunks_keep_quoted_newlines_together():
+    import io
+    from scripts.ingestion.load_to_staging import read_csv_chunks
+
+    data = 'a,"line one\nline two",1\nb,"say ""hi""",2\nc,plain,3\n'
+    chunks = list(read_csv_chunks(io.StringIO(data), batch_size=2))
+
+    assert chunks == [
+        'a,"line one\nline two",1\nb,"say ""hi""",2\n',
+        "c,plain,3\n",
+    ]
+
+
+def test_manifest_plan_skips_unchanged_and_appends_tail(tmp_path):
+    import os
+    from datetime import datetime
+    from scripts.ingestion.load_to_staging import (
+        file_checksums,
+        plan_table_load
+    )
+
+    path = tmp_path / "transactions.csv"
+    path.write_text("transaction_id\nTXN00001\n")
+    size = os.path.getsize(path)
+    manifest = {
+        "transactions.csv": {
+            "file_name": "transactions.csv",
+            "table_name": "staging.transactions",
+            "checksum": file_checksums(path)[0],
+            "file_size": size,
+            "file_mtime": datetime.utcfromtimestamp(os.stat(path).st_mtime),
+            "row_count": 1,
+        }
+    }
+
+    plan = plan_table_load(
+        "staging.transactions", [str(path)], manifest, True, False
+    )
+    assert plan["mode"] == "skip"
+
+    with open(path, "a") as f:
+        f.write("TXN00002\n")
+
+    plan = plan_table_load(
+        "staging.transactions", [str(path)], manifest, True, False
+    )
+    assert plan["mode"] == "append"
+    assert plan["files"][0]["offset"] == size
+    assert plan["files"][0]["prior_rows"] == 1
+
+    # Not append-only: any change reloads the whole table
+    plan = plan_table_load(
+        "staging.transactions", [str(path)], manifest, False, False
+    )
+    assert plan["mode"] == "replace"
+    assert plan["files"][0]["offset"] == 0
+
+
+def test_load_without_manifest_replaces_staging(tmp_path, monkeypatch):
+    from scripts.ingestion import load_to_staging
+
+    monkeypatch.setattr(
+        load_to_staging, "SUMMARY_PATH", str(tmp_path / "summary.json")
+    )
+
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM staging.customers")
+    rows = cur.fetchone()[0]
+    # Staging filled by a loader that kept no manifest
+    cur.execute("DELETE FROM staging.load_manifest")
+    conn.commit()
+
+    load_to_staging.main([])
+
+    cur.execute("SELECT COUNT(*) FROM staging.customers")
+    assert cur.fetchone()[0] == rows
+    cur.execute("""
+        SELECT SUM(row_count) FROM staging.load_manifest
+        WHERE table_name = 'staging.customers'
+    """)
+    assert cur.fetchone()[0] == rows
+    conn.close()
+
+
+def test_step_metrics_accumulate_phases():
+    from scripts.orchestration.metrics import StepMetrics
+
+    metrics = StepMetrics("staging.customers")
+    chunks = list(metrics.timed_iter(["a", "b"], "parse"))
+    with metrics.phase("send"):
+        metrics.rows = 2
+    metrics.finish()
+
+    result = metrics.as_dict()
+    assert chunks == ["a", "b"]
+    assert result["rows"] == 2
+    assert {"parse_sec", "send_sec", "rows_per_sec"} <= set(result)
@@ -0,0 +1,242 @@
+import psycopg2
+import os
+from dotenv import load_dotenv
+import pytest
+
+load_dotenv()
+
+def get_connection():
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT"),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+    )
+
+
+def test_index_advisor_proposes_partial_unique_index_for_current_rows():
+    from scripts.monitoring.index_advisor import advise
+
+    conn = get_connection()
+    cur = conn.cursor()
+
+    # Rolled back at the end
+    cur.execute("""
+        CREATE TABLE public.advisor_probe AS
+        SELECT g AS probe_key, 'C' || (g % 5000) AS customer_id,
+               g > 15000 AS is_current
+        FROM generate_series(1, 20000) g
+    """)
+    cur.execute("ANALYZE public.advisor_probe")
+    sql = """
+        SELECT probe_key FROM public.advisor_probe
+        WHERE customer_id = 'C42' AND is_current
+    """
+    statements = [{"script": "test", "statement": sql, "sql": sql}]
+
+    findings, proposals, errors = advise(cur, statements, 10000, 0.1)
+    assert errors == []
+    assert len(proposals) == 1
+    assert proposals[0]["columns"] == ["customer_id"]
+    assert proposals[0]["predicate"] == "is_current"
+    assert proposals[0]["unique"]
+
+    # Once the index exists the scan is reported as covered
+    cur.execute("""
+        CREATE INDEX advisor_probe_customer
+            ON public.advisor_probe (customer_id) WHERE is_current
+    """)
+    cur.execute("SET LOCAL enable_indexscan = off")
+    cur.execute("SET LOCAL enable_bitmapscan = off")
+    findings, proposals, errors = advise(cur, statements, 10000, 0.1)
+    assert proposals == []
+    assert findings[0]["covered_by"] == "advisor_probe_customer"
+
+    conn.rollback()
+    conn.close()
+
+
+def test_migrations_apply_once_and_reject_edits(tmp_path):
+    from scripts.orchestration.migrations import apply_migrations
+
+    migration = tmp_path / "9999_migration_probe.sql"
+    migration.write_text("CREATE TABLE public.migration_probe (id INT);")
+
+    conn = get_connection()
+    try:
+        assert apply_migrations(conn, str(tmp_path)) == ["9999"]
+        assert apply_migrations(conn, str(tmp_path)) == []
+
+        migration.write_text("CREATE TABLE public.migration_probe (id BIGINT);")
+        with pytest.raises(ValueError):
+            apply_migrations(conn, str(tmp_path))
+
+    finally:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute("DROP TABLE IF EXISTS public.migration_probe")
+            cur.execute(
+                "DELETE FROM public.schema_migrations WHERE version = '9999'"
+            )
+        conn.commit()
+        conn.close()
+
+
+def test_upgrade_migrations_leave_current_schema_unchanged():
+    from scripts.orchestration.migrations import migration_files
+
+    upgrades = [
+        path for version, _, path in migration_files()
+        if version in ("0002", "0003", "0004")
+    ]
+    assert len(upgrades) == 3
+
+    conn = get_connection()
+    cur = conn.cursor()
+
+    def snapshot():
+        cur.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM production.transactions),
+                (SELECT COUNT(*) FROM production.transaction_items),
+                (SELECT COUNT(*) FROM warehouse.fact_sales),
+                (SELECT COUNT(*) FROM pg_inherits),
+                'warehouse.fact_sales'::regclass::oid,
+                'production.transactions'::regclass::oid
+        """)
+        return cur.fetchone()
+
+    # Rolled back at the end
+    before = snapshot()
+    for path in upgrades:
+        with open(path) as f:
+            cur.execute(f.read())
+    assert snapshot() == before
+
+    conn.rollback()
+    conn.close()
+
+
+def test_statement_log_records_each_statement_once(tmp_path, monkeypatch):
+    import json
+    from scripts.orchestration import statements
+
+    log = tmp_path / "statements.jsonl"
+    monkeypatch.setenv(statements.STATEMENT_LOG_ENV, str(log))
+    monkeypatch.setattr(statements, "_recorded", set())
+
+    conn = psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT"),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        cursor_factory=statements.statement_cursor(),
+    )
+    with conn.cursor() as cur:
+        for value in [1, 2]:
+            cur.execute("SELECT %(value)s  +  1", {"value": value})
+    conn.close()
+
+    entries = [json.loads(line) for line in log.read_text().splitlines()]
+    assert len(entries) == 1
+    assert entries[0]["statement"] == "SELECT %(value)s + 1"
+    assert entries[0]["sql"] == "SELECT 1  +  1"
+
+
+def test_plan_shape_collapses_partitions():
+    from scripts.orchestration.statements import plan_shape
+
+    def partition_scan(month):
+        return {
+            "Node Type": "Bitmap Heap Scan",
+            "Relation Name": f"fact_sales_{month}",
+            "Plans": [{
+                "Node Type": "Bitmap Index Scan",
+                "Index Name": f"fact_sales_{month}_date_key_idx"
+            }]
+        }
+
+    plan = {
+        "Node Type": "Aggregate", "Strategy": "Hashed",
+        "Plans": [{
+            "Node Type": "Append",
+            "Plans": [partition_scan("2024_01"), partition_scan("2024_02")]
+        }]
+    }
+    assert plan_shape(plan) == (
+        "Aggregate (Hashed) [Append [Bitmap Heap Scan fact_sales_YYYY_MM "
+        "[Bitmap Index Scan fact_sales_YYYY_MM_date_key_idx]]]"
+    )
+
+
+def test_plan_capture_runs_statement_once(tmp_path, monkeypatch):
+    import json
+    from scripts.orchestration import statements
+
+    monkeypatch.setenv(statements.PLAN_CAPTURE_ENV, str(tmp_path))
+    monkeypatch.setenv(statements.RUN_ID_ENV, "probe_run")
+
+    conn = psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT"),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        cursor_factory=statements.statement_cursor(),
+    )
+    with conn.cursor() as cur:
+        cur.execute("CREATE TEMP TABLE plan_probe (id INT)")
+        cur.execute(
+            "INSERT INTO plan_probe SELECT generate_series(1, %s)", (3,)
+        )
+        assert cur.rowcount == 3
+        cur.execute("SELECT COUNT(*) FROM plan_probe")
+        assert cur.fetchone()[0] == 3
+    conn.rollback()
+    conn.close()
+
+    captured = tmp_path / "probe_run" / f"{statements.script_name()}.jsonl"
+    entries = [json.loads(line) for line in captured.read_text().splitlines()]
+    # CREATE TABLE without AS is not explainable
+    assert [e["shape"] for e in entries] == [
+        "ModifyTable plan_probe [ProjectSet [Result]]",
+        "Aggregate (Plain) [Seq Scan plan_probe]"
+    ]
+    assert entries[1]["rows"] == 1
+    assert entries[1]["execution_ms"] is not None
+
+
+def test_plan_report_flags_regressions_against_baseline(tmp_path):
+    import json
+    from scripts.monitoring.plan_report import build_report, parse_args
+
+    def write_run(run, execution_ms, shape):
+        (tmp_path / run).mkdir()
+        entry = {
+            "run_id": run, "script": "load_to_warehouse",
+            "statement_id": "probe", "statement": "SELECT 1",
+            "execution_ms": execution_ms,
+            "buffers": {"shared_hit": 100, "shared_read": 0,
+                        "temp_read": 0, "temp_written": 0},
+            "shape": shape
+        }
+        with open(tmp_path / run / "load_to_warehouse.jsonl", "w") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    for run, ms in [("run1", 100), ("run2", 120), ("run3", 110)]:
+        write_run(run, ms, "Index Scan fact_sales")
+    write_run("run4", 500, "Seq Scan fact_sales")
+
+    args = parse_args(["--baseline-runs", "2"])
+    report = build_report(str(tmp_path), "run4", args)
+    assert report["baseline_runs"] == ["run2", "run3"]
+    [regression] = report["regressions"]
+    assert regression["plan_changed"]["shapes"] == ["Seq Scan fact_sales"]
+    assert regression["slower"]["baseline_ms"] == 115
+    # Buffers stayed the same
+    assert "more_buffers" not in regression
+
+    # An ordinary run against the same baseline is not flagged
+    assert build_report(str(tmp_path), "run3", args)["regressions"] == []
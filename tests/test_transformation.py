@@ -44,3 +44,178 @@ def test_email_lowercase():
     assert cur.fetchone()[0] == 0
 
     conn.close()
+
+
+def test_load_watermarks_cover_production_tables():
+    conn = get_connection()
+    cur = conn.cursor()
+
+    cur.execute("SELECT table_name FROM production.load_watermarks")
+    recorded = {row[0] for row in cur.fetchall()}
+
+    assert {
+        "production.customers",
+        "production.products",
+        "production.transactions",
+        "production.transaction_items",
+    } <= recorded
+
+    conn.close()
+
+
+def test_row_hashes_carried_into_production():
+    conn = get_connection()
+    cur = conn.cursor()
+
+    for table in ["customers", "products"]:
+        cur.execute(f"""
+            SELECT COUNT(*) FROM production.{table}
+            WHERE row_hash IS NULL
+        """)
+        assert cur.fetchone()[0] == 0
+
+    conn.close()
+
+
+def test_dag_starts_tables_after_their_dependencies():
+    import threading
+    from scripts.transformation.load_to_production import (
+        PRODUCTION_TABLES,
+        run_dag
+    )
+
+    finished = []
+    lock = threading.Lock()
+
+    def run_node(spec):
+        with lock:
+            assert set(spec["depends_on"]) <= set(finished)
+            finished.append(spec["table"])
+
+    run_dag(PRODUCTION_TABLES, run_node, workers=2)
+
+    assert sorted(finished) == sorted(s["table"] for s in PRODUCTION_TABLES)
+
+
+def test_transactions_rows_sit_in_their_month_partition():
+    conn = get_connection()
+    cur = conn.cursor()
+
+    for table in [
+        "production.transactions", "production.transaction_items"
+    ]:
+        cur.execute(f"""
+            SELECT COUNT(*) FROM {table}
+            WHERE tableoid::regclass::text
+                <> '{table}_' || TO_CHAR(transaction_date, 'YYYY_MM')
+        """)
+        assert cur.fetchone()[0] == 0
+
+    cur.execute("""
+        SELECT COUNT(*) FROM production.transaction_items ti
+        JOIN production.transactions t
+            ON t.transaction_id = ti.transaction_id
+        WHERE t.transaction_date <> ti.transaction_date
+    """)
+    assert cur.fetchone()[0] == 0
+
+    conn.close()
+
+
+def test_incremental_load_moves_items_with_corrected_date():
+    from scripts.transformation.load_to_production import (
+        PRODUCTION_TABLES,
+        incremental_load
+    )
+
+    conn = get_connection()
+    cur = conn.cursor()
+
+    # Without ON UPDATE CASCADE, as on PostgreSQL 14 where a cross-partition
+    # move never cascades; everything below is rolled back
+    cur.execute("""
+        ALTER TABLE production.transaction_items
+            DROP CONSTRAINT fk_items_transaction
+    """)
+    cur.execute("""
+        ALTER TABLE production.transaction_items
+            ADD CONSTRAINT fk_items_transaction
+            FOREIGN KEY (transaction_id, transaction_date)
+            REFERENCES production.transactions (transaction_id, transaction_date)
+    """)
+
+    cur.execute("""
+        SELECT transaction_id, COUNT(*) FROM production.transaction_items
+        GROUP BY transaction_id ORDER BY transaction_id LIMIT 1
+    """)
+    transaction_id, items = cur.fetchone()
+    cur.execute("""
+        UPDATE staging.transactions
+        SET transaction_date = transaction_date + 45,
+            loaded_at = '2999-01-01'
+        WHERE transaction_id = %s
+        RETURNING transaction_date
+    """, (transaction_id,))
+    corrected = cur.fetchone()[0]
+
+    spec = next(
+        s for s in PRODUCTION_TABLES if s["table"] == "production.transactions"
+    )
+    counts = incremental_load(cur, spec, "2998-01-01", "2999-01-01")
+    assert counts["moved"] == 1
+
+    cur.execute("""
+        SELECT transaction_date, COUNT(*) FROM production.transaction_items
+        WHERE transaction_id = %s GROUP BY transaction_date
+    """, (transaction_id,))
+    assert cur.fetchall() == [(corrected, items)]
+
+    conn.rollback()
+    conn.close()
+
+
+def test_full_load_keeps_latest_staging_version():
+    from datetime import timedelta
+    from scripts.transformation.bulk_load import table_structure
+    from scripts.transformation.load_to_production import (
+        PRODUCTION_TABLES,
+        build_shadow,
+        shadow_table
+    )
+
+    conn = get_connection()
+    cur = conn.cursor()
+
+    # A second, later version of one transaction with a corrected date,
+    # as an append-only staging table keeps it; rolled back at the end
+    cur.execute("""
+        SELECT transaction_id, transaction_date FROM staging.transactions
+        ORDER BY transaction_id LIMIT 1
+    """)
+    transaction_id, transaction_date = cur.fetchone()
+    cur.execute("""
+        INSERT INTO staging.transactions
+        SELECT * FROM staging.transactions WHERE transaction_id = %s
+    """, (transaction_id,))
+    cur.execute("""
+        UPDATE staging.transactions
+        SET transaction_date = transaction_date + 45,
+            loaded_at = '2999-01-01'
+        WHERE ctid = (
+            SELECT MAX(ctid) FROM staging.transactions
+            WHERE transaction_id = %s
+        )
+    """, (transaction_id,))
+
+    for spec in PRODUCTION_TABLES[:3]:
+        build_shadow(cur, spec, table_structure(cur, spec["table"]))
+
+    cur.execute(f"""
+        SELECT transaction_date
+        FROM {shadow_table('production.transactions')}
+        WHERE transaction_id = %s
+    """, (transaction_id,))
+    assert cur.fetchall() == [(transaction_date + timedelta(days=45),)]
+
+    conn.rollback()
+    conn.close()
@@ -19,10 +19,14 @@ def test_warehouse_counts():
     conn = get_connection()
     cur = conn.cursor()
 
-    cur.execute("SELECT COUNT(*) FROM warehouse.dim_customers")
+    cur.execute(
+        "SELECT COUNT(*) FROM warehouse.dim_customers WHERE is_current"
+    )
     assert cur.fetchone()[0] == 1000
 
-    cur.execute("SELECT COUNT(*) FROM warehouse.dim_products")
+    cur.execute(
+        "SELECT COUNT(*) FROM warehouse.dim_products WHERE is_current"
+    )
     assert cur.fetchone()[0] == 500
 
     cur.execute("SELECT COUNT(*) FROM warehouse.fact_sales")
@@ -43,3 +47,297 @@ def test_fact_sales_grain():
     assert cur.fetchone()[0] == 0
 
     conn.close()
+
+
+def test_fact_sales_secondary_structure_restored():
+    from scripts.transformation.bulk_load import (
+        secondary_structure,
+        table_structure
+    )
+
+    conn = get_connection()
+    cur = conn.cursor()
+
+    structure = secondary_structure(
+        table_structure(cur, "warehouse.fact_sales")
+    )
+
+    assert {name for name, _, _ in structure["constraints"]} == {
+        "fk_fact_date", "fk_fact_customer",
+        "fk_fact_product", "fk_fact_payment",
+    }
+    assert {
+        "idx_fact_sales_date", "idx_fact_sales_customer",
+        "idx_fact_sales_product", "idx_fact_sales_payment",
+    } <= {name for name, _ in structure["indexes"]}
+
+    conn.close()
+
+
+def test_scd2_versions_do_not_overlap():
+    conn = get_connection()
+    cur = conn.cursor()
+
+    for table, key, surrogate in [
+        ("warehouse.dim_customers", "customer_id", "customer_key"),
+        ("warehouse.dim_products", "product_id", "product_key"),
+    ]:
+        # Closed versions have an end date, current ones do not
+        cur.execute(f"""
+            SELECT COUNT(*) FROM {table}
+            WHERE is_current <> (end_date IS NULL)
+        """)
+        assert cur.fetchone()[0] == 0
+
+        # Each version starts where the previous one ended
+        cur.execute(f"""
+            SELECT COUNT(*) FROM (
+                SELECT effective_date,
+                       LAG(end_date) OVER (
+                           PARTITION BY {key} ORDER BY {surrogate}
+                       ) AS previous_end
+                FROM {table}
+            ) v
+            WHERE previous_end IS NOT NULL
+              AND previous_end <> effective_date
+        """)
+        assert cur.fetchone()[0] == 0
+
+    conn.close()
+
+
+def test_fact_sales_has_one_row_per_production_item():
+    conn = get_connection()
+    cur = conn.cursor()
+
+    cur.execute("SELECT COUNT(*) FROM production.transaction_items")
+    items = cur.fetchone()[0]
+    cur.execute("SELECT COUNT(*) FROM warehouse.fact_sales")
+    assert cur.fetchone()[0] == items
+
+    cur.execute("""
+        SELECT last_loaded_at FROM warehouse.load_watermarks
+        WHERE table_name = 'warehouse.fact_sales'
+    """)
+    assert cur.fetchone() is not None
+
+    conn.close()
+
+
+def test_aggregates_match_full_recompute():
+    from scripts.transformation.aggregates import check_aggregates
+
+    conn = get_connection()
+    cur = conn.cursor()
+
+    cur.execute("SELECT COUNT(*) FROM warehouse.agg_daily_sales")
+    assert cur.fetchone()[0] > 0
+    assert not any(check_aggregates(cur).values())
+
+    conn.close()
+
+
+def test_aggregate_rewrites_match_fact_queries():
+    from scripts.analytics.query_runner import (
+        FACT_SOURCE,
+        query_plans,
+        run_query,
+        same_rows
+    )
+
+    plans = query_plans()
+    assert len(plans) == 10
+
+    conn = get_connection()
+    cur = conn.cursor()
+
+    for plan in plans.values():
+        *rewrites, fact = plan["candidates"]
+        assert fact["source"] == FACT_SOURCE
+        _, expected = run_query(cur, fact["sql"])
+        for rewrite in rewrites:
+            assert same_rows(run_query(cur, rewrite["sql"])[1], expected)
+
+    conn.close()
+
+
+def test_aggregate_backed_queries_route_to_agg_tables():
+    from scripts.analytics.query_runner import (
+        FACT_SOURCE,
+        choose_source,
+        query_plans,
+        source_size
+    )
+
+    conn = get_connection()
+    cur = conn.cursor()
+
+    # fact_sales is partitioned: its size is that of its partitions
+    assert source_size(cur, FACT_SOURCE) > 0
+
+    plan = query_plans()["monthly_sales_trend"]
+    assert choose_source(cur, plan)["source"].startswith("warehouse.agg_")
+    assert choose_source(cur, plan, False)["source"] == FACT_SOURCE
+
+    conn.close()
+
+
+def test_result_cache_tiers_versions_and_eviction(tmp_path):
+    from scripts.analytics.result_cache import ResultCache
+
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return ["x" * 1000]
+
+    cache = ResultCache(memory_entries=1, disk_dir=str(tmp_path),
+                        disk_max_mb=2500 / (1024 * 1024))
+
+    assert cache.get_or_compute("SELECT  1", {}, 1, compute)[1] == "miss"
+    assert cache.get_or_compute("SELECT 1", {}, 1, compute)[1] == "memory"
+    # A new load version is a different entry
+    assert cache.get_or_compute("SELECT 1", {}, 2, compute)[1] == "miss"
+    # Pushed out of the one-entry memory tier, still on disk
+    assert cache.get_or_compute("SELECT 1", {}, 1, compute)[1] == "disk"
+    assert len(calls) == 2
+
+    # A third entry exceeds the disk budget; the oldest one is evicted
+    cache.get_or_compute("SELECT 2", {}, 1, compute)
+    stats = cache.summary()
+    assert stats["disk_evictions"] == 1
+    assert stats["disk_bytes"] <= 2500
+    assert stats["memory_hits"] == 1 and stats["disk_hits"] == 1
+
+
+def test_dim_date_is_a_contiguous_calendar():
+    conn = get_connection()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT
+            COUNT(*) = MAX(full_date) - MIN(full_date) + 1,
+            COUNT(*) FILTER (
+                WHERE date_key <> TO_CHAR(full_date, 'YYYYMMDD')::INTEGER
+            )
+        FROM warehouse.dim_date
+    """)
+    contiguous, wrong_keys = cur.fetchone()
+    assert contiguous
+    assert wrong_keys == 0
+
+    conn.close()
+
+
+def test_fact_sales_rows_sit_in_their_month_partition():
+    conn = get_connection()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT COUNT(*) FROM warehouse.fact_sales
+        WHERE tableoid::regclass::text
+            <> 'warehouse.fact_sales_' || (date_key / 10000) || '_'
+               || LPAD((date_key / 100 % 100)::text, 2, '0')
+    """)
+    assert cur.fetchone()[0] == 0
+
+    cur.execute("""
+        SELECT am.amname FROM pg_class c
+        JOIN pg_am am ON am.oid = c.relam
+        WHERE c.oid = 'warehouse.idx_fact_sales_date'::regclass
+    """)
+    assert cur.fetchone()[0] == "brin"
+
+    conn.close()
+
+
+def test_fact_changes_follow_the_staging_load_window():
+    from scripts.transformation.load_to_warehouse import (
+        collect_changed_transactions,
+        fact_high_water
+    )
+
+    conn = get_connection()
+    cur = conn.cursor()
+
+    # Up to what production applied; production write times (rewritten
+    # by every full reload) play no part
+    high_water = fact_high_water(cur)
+    cur.execute("""
+        SELECT MIN(last_loaded_at) FROM production.load_watermarks
+        WHERE table_name IN (
+            'production.transactions', 'production.transaction_items'
+        )
+    """)
+    assert high_water == cur.fetchone()[0]
+    cur.execute("UPDATE production.transactions SET updated_at = now()")
+    assert collect_changed_transactions(cur, high_water, high_water)[0] == 0
+    cur.execute("DROP TABLE fact_changes")
+
+    # One item loaded again: its transaction changes
+    cur.execute("""
+        UPDATE staging.transaction_items SET loaded_at = '2999-01-01'
+        WHERE item_id = (SELECT MIN(item_id) FROM staging.transaction_items)
+    """)
+    changed, total = collect_changed_transactions(
+        cur, "2998-01-01", "2999-01-01"
+    )
+    assert changed == 1 and total > 1
+
+    conn.rollback()
+    conn.close()
+
+
+def test_facts_map_to_the_dimension_version_of_their_date():
+    from scripts.transformation.load_to_warehouse import FACT_SALES_INSERT
+
+    conn = get_connection()
+    cur = conn.cursor()
+
+    # Split the current version of a busy customer at the middle of its
+    # transactions; rolled back at the end
+    cur.execute("""
+        SELECT customer_id,
+               percentile_disc(0.5) WITHIN GROUP (ORDER BY transaction_date)
+        FROM production.transactions
+        GROUP BY customer_id ORDER BY COUNT(*) DESC, customer_id LIMIT 1
+    """)
+    customer_id, split = cur.fetchone()
+    cur.execute("""
+        UPDATE warehouse.dim_customers
+        SET end_date = %(split)s, is_current = FALSE
+        WHERE customer_id = %(id)s AND is_current
+        RETURNING customer_key
+    """, {"id": customer_id, "split": split})
+    old_key = cur.fetchone()[0]
+    cur.execute("""
+        INSERT INTO warehouse.dim_customers (
+            customer_id, full_name, effective_date, is_current
+        )
+        VALUES (%(id)s, 'Renamed', %(split)s, TRUE)
+        RETURNING customer_key
+    """, {"id": customer_id, "split": split})
+    new_key = cur.fetchone()[0]
+
+    cur.execute("""
+        DELETE FROM warehouse.fact_sales f
+        USING production.transactions t
+        WHERE f.transaction_id = t.transaction_id AND t.customer_id = %s
+    """, (customer_id,))
+    cur.execute(
+        FACT_SALES_INSERT.format(filter="WHERE t.customer_id = %s"),
+        (customer_id,)
+    )
+
+    cur.execute("""
+        SELECT d.full_date >= %s, f.customer_key, COUNT(*)
+        FROM warehouse.fact_sales f
+        JOIN warehouse.dim_date d ON d.date_key = f.date_key
+        WHERE f.customer_key IN (%s, %s)
+        GROUP BY 1, 2
+    """, (split, old_key, new_key))
+    keys = {after: key for after, key, _ in cur.fetchall()}
+    assert keys == {False: old_key, True: new_key}
+
+    conn.rollback()
+    conn.close()